@@ -0,0 +1,88 @@
+import csv
+import random
+from locust import HttpUser, task, between, events
+
+# Latency of the blog comment listing by page size.
+# Every page of root comments comes with one page of replies per root, loaded in a single query,
+# so the response time should grow with the amount of data returned, not with round trips.
+# At the end of the run a table of latency by page size is printed (also written to
+# load_test/comment_pages_latency.csv), from the "/comments/blog size=N" rows of the locust statistics.
+#
+# usage: locust -f load_test/locust_comment_pages.py --host http://localhost:8001
+#        add --headless -u 50 -r 10 -t 2m for a run without the web UI
+
+TARGET_BLOGS = []
+PAGE_SIZES = [5, 10, 20, 50]
+REPLIES_SIZE = 5
+
+
+try:
+    with open("./load_test/created_blogs.csv", "r") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            if row.get("blog_id"):
+                TARGET_BLOGS.append(row)
+except FileNotFoundError:
+    print("Error! Can not find created_blogs.csv, please run the blog creation script first!")
+    exit(1)
+
+
+class CommentReader(HttpUser):
+    wait_time = between(0.1, 0.5)
+
+    def list_comments(self, size):
+        blog_id = random.choice(TARGET_BLOGS)["blog_id"]
+        params = {
+            "page": 1,
+            "size": size,
+            "replies_page": 1,
+            "replies_size": REPLIES_SIZE,
+        }
+        with self.client.get(f"/comments/blog/{blog_id}", params=params, name=f"/comments/blog size={size}",
+                             catch_response=True) as response:
+            if response.status_code == 200:
+                response.success()
+            else:
+                response.failure(f"List comments failed: {response.status_code} - {response.text}")
+
+    @task
+    def list_5(self):
+        self.list_comments(PAGE_SIZES[0])
+
+    @task
+    def list_10(self):
+        self.list_comments(PAGE_SIZES[1])
+
+    @task
+    def list_20(self):
+        self.list_comments(PAGE_SIZES[2])
+
+    @task
+    def list_50(self):
+        self.list_comments(PAGE_SIZES[3])
+
+
+@events.test_stop.add_listener
+def report_latency_by_page_size(environment, **kwargs):
+    rows = []
+    for size in PAGE_SIZES:
+        entry = environment.stats.get(f"/comments/blog size={size}", "GET")
+        if not entry.num_requests:
+            continue
+        rows.append([
+            size, entry.num_requests, entry.num_failures, round(entry.get_response_time_percentile(0.5)),
+            round(entry.get_response_time_percentile(0.95)), round(entry.get_response_time_percentile(0.99)),
+            round(entry.avg_content_length),
+        ])
+    if not rows:
+        return
+
+    header = ["size", "requests", "failures", "p50_ms", "p95_ms", "p99_ms", "avg_bytes"]
+    print(f"Comment list latency by page size ({REPLIES_SIZE} replies per root)")
+    print("".join(f"{h:>10}" for h in header))
+    for row in rows:
+        print("".join(f"{v:>10}" for v in row))
+    with open("./load_test/comment_pages_latency.csv", "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(header)
+        writer.writerows(rows)
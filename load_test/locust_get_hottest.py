@@ -38,7 +38,7 @@ class BlogViewer(HttpUser):
             "page": 1,
             "limit": 5,
         }
-        with self.client.get("/search/discover", params=params, name="/discover", catch_response=True) as response:
+        with self.client.get("/search/discover", params=params, name="/search/discover", catch_response=True) as response:
             if response.status_code in (200, 201):
                 response.success()
             else:
@@ -52,7 +52,7 @@ class BlogViewer(HttpUser):
     def view_blog_post(self):
         blog_id = random.choice(TARGET_BLOGS)["blog_id"]
 
-        with self.client.get(f"/blogs/{blog_id}", name="/blogs", cookies=self.cookies, catch_response=True) as response:
+        with self.client.get(f"/blogs/{blog_id}", name="/blogs/{blog_id}", cookies=self.cookies, catch_response=True) as response:
             if response.status_code in (200, 201):
                 response.success()
 
@@ -67,7 +67,7 @@ class BlogViewer(HttpUser):
             return
 
         blog_id = random.choice(TARGET_BLOGS)["blog_id"]
-        with self.client.post(f"/blogs/{blog_id}/like", name="/blogs/like", cookies=self.cookies, catch_response=True) as response:
+        with self.client.post(f"/blogs/{blog_id}/like", name="/blogs/{blog_id}/like", cookies=self.cookies, catch_response=True) as response:
             if response.status_code in (200, 201):
                 response.success()
 
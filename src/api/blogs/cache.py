@@ -0,0 +1,70 @@
+# src/api/blogs/cache.py
+import json
+from datetime import datetime
+from typing import Iterable, Optional
+
+from bson import ObjectId
+
+from src.core.config import BLOG_DETAIL_CACHE_TTL_SECONDS
+from src.core.redis import redis_client
+from src.logger import get_logger
+from src.utils.metrics import BLOG_DETAIL_CACHE
+
+DETAIL_KEY = "blog_detail:{}"
+# bumped by every edit or delete of a blog, part of the ETags of lists showing blogs
+LIST_GENERATION_KEY = "blogs:generation"
+
+logger = get_logger()
+
+
+def _encode(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"Cannot cache value of type {type(value).__name__}")
+
+
+async def get_blog_detail(blog_id: str) -> Optional[dict]:
+    """
+    Return the cached blog detail (with author_username, without is_liked), or None on a miss.
+    """
+    try:
+        data = await redis_client.get(DETAIL_KEY.format(blog_id))
+    except Exception as e:
+        logger.error(f"Failed to read blog detail cache: {e}")
+        data = None
+
+    if data is None:
+        BLOG_DETAIL_CACHE.labels(result="miss").inc()
+        return None
+    BLOG_DETAIL_CACHE.labels(result="hit").inc()
+    return json.loads(data)
+
+
+async def set_blog_detail(blog_id: str, doc: dict) -> None:
+    try:
+        await redis_client.set(
+            DETAIL_KEY.format(blog_id),
+            json.dumps(doc, default=_encode),
+            ex=BLOG_DETAIL_CACHE_TTL_SECONDS,
+        )
+    except Exception as e:
+        logger.error(f"Failed to cache blog detail: {e}")
+
+
+async def invalidate_blog_details(blog_ids: Iterable[str]) -> None:
+    """
+    Drop the cached detail of the given blogs, called after every write that changes them.
+    """
+    keys = [DETAIL_KEY.format(blog_id) for blog_id in blog_ids]
+    if not keys:
+        return
+    try:
+        await redis_client.delete(*keys)
+    except Exception as e:
+        logger.error(f"Failed to invalidate blog detail cache: {e}")
+
+
+async def invalidate_blog_detail(blog_id: str) -> None:
+    await invalidate_blog_details([blog_id])
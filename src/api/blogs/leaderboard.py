@@ -0,0 +1,101 @@
+# src/api/blogs/leaderboard.py
+from typing import List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from src.core.redis import redis_client
+from src.logger import get_logger
+
+# blog_id -> view_count, updated whenever a view is counted
+LEADERBOARD_KEY = "leaderboard:views"
+# member added by rebuild_leaderboard, ranked last: without it the key is missing or was recreated
+# by the views counted since (Redis restart, eviction), a partial ranking that is not read
+BUILT_MEMBER = "__built__"
+BATCH_SIZE = 1000
+
+logger = get_logger()
+
+
+async def set_view_count(blog_id: str, view_count: int) -> None:
+    try:
+        await redis_client.zadd(LEADERBOARD_KEY, {blog_id: view_count})
+    except Exception as e:
+        logger.error(f"Failed to update view leaderboard: {e}")
+
+
+async def remove_blogs(blog_ids: List[str]) -> None:
+    if not blog_ids:
+        return
+    try:
+        await redis_client.zrem(LEADERBOARD_KEY, *blog_ids)
+    except Exception as e:
+        logger.error(f"Failed to remove blogs from view leaderboard: {e}")
+
+
+async def get_top(limit: int) -> Optional[List[Tuple[str, int]]]:
+    """
+    Return the top (blog_id, view_count) pairs, empty when no blog was viewed, or None if the
+    leaderboard is not built or Redis can't be read (the caller sorts in MongoDB then).
+    """
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.zscore(LEADERBOARD_KEY, BUILT_MEMBER)
+        pipe.zrevrange(LEADERBOARD_KEY, 0, limit - 1, withscores=True)
+        built, entries = await pipe.execute()
+    except Exception as e:
+        logger.error(f"Failed to read view leaderboard: {e}")
+        return None
+    if built is None:
+        return None
+    return [(blog_id, int(score)) for blog_id, score in entries if blog_id != BUILT_MEMBER]
+
+
+async def rebuild_leaderboard(db: AsyncIOMotorDatabase) -> int:
+    """
+    Rebuild the leaderboard from MongoDB plus the views still buffered in Redis.
+    Used on cold start and to drop deleted blogs; return the number of ranked blogs.
+    """
+    # imported here, view_counter updates the leaderboard on every view
+    from src.api.blogs.view_counter import PENDING_KEY, FLUSHING_KEY
+
+    tmp_key = f"{LEADERBOARD_KEY}:rebuild"
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.delete(tmp_key)
+    # also when no blog has views: an empty leaderboard is built, not missing
+    pipe.zadd(tmp_key, {BUILT_MEMBER: float("-inf")})
+    await pipe.execute()
+    cursor = db.blogs.find({"view_count": {"$gt": 0}}, {"view_count": 1})
+    total = 0
+    batch = {}
+    async for doc in cursor:
+        batch[str(doc["_id"])] = doc["view_count"]
+        if len(batch) >= BATCH_SIZE:
+            await redis_client.zadd(tmp_key, batch)
+            total += len(batch)
+            batch = {}
+    if batch:
+        await redis_client.zadd(tmp_key, batch)
+        total += len(batch)
+
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.hgetall(FLUSHING_KEY)
+    pipe.hgetall(PENDING_KEY)
+    buffered = await pipe.execute()
+    pipe = redis_client.pipeline(transaction=False)
+    for views in buffered:
+        for blog_id, count in views.items():
+            pipe.zincrby(tmp_key, int(count), blog_id)
+    await pipe.execute()
+
+    await redis_client.rename(tmp_key, LEADERBOARD_KEY)
+    logger.info("View leaderboard rebuilt, %s blogs ranked", total)
+    return total
+
+
+async def ensure_leaderboard(db: AsyncIOMotorDatabase) -> None:
+    """
+    Build the leaderboard when it is not built: on cold start (e.g. fresh Redis), and when it was
+    lost and recreated by the views counted since.
+    """
+    if await redis_client.zscore(LEADERBOARD_KEY, BUILT_MEMBER) is None:
+        await rebuild_leaderboard(db)
@@ -1,13 +1,30 @@
-from typing import Optional, List
+from typing import Optional, List, Tuple
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
-from datetime import datetime
+from datetime import datetime, timedelta
 from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
 from src.api.search.schemas import SortDirection, BlogSortField
+from src.api.blogs import view_counter
+from src.api.blogs import cache as blog_cache
+from src.api.blogs import trending
+from src.api.blogs import leaderboard
+from src.api.blogs import search_index
+from src.core.config import VIEW_COUNTER_MODE
+from src.db.transactions import run_in_transaction
+from src.utils.conditional import bump_generation
+from src.utils.pagination import TotalMode, find_page
+from src.logger import get_logger
+
+logger = get_logger()
 
 
 async def add_blog(db: AsyncIOMotorDatabase, blog_doc: dict) -> dict:
+    """
+    Insert the blog and return it serialized. The _id is generated here, so the inserted
+    document is returned as is instead of being read back.
+    """
     if "tags" not in blog_doc:
         blog_doc["tags"] = []
     if "view_count" not in blog_doc:
@@ -16,16 +33,30 @@ async def add_blog(db: AsyncIOMotorDatabase, blog_doc: dict) -> dict:
         blog_doc["like_count"] = 0
     if "comment_count" not in blog_doc:
         blog_doc["comment_count"] = 0
-
-    res = await db.blogs.insert_one(blog_doc)
-    created = await db.blogs.find_one({"_id": res.inserted_id})
+    if "root_comment_count" not in blog_doc:
+        blog_doc["root_comment_count"] = 0
+    # bumped by every write changing the blog as served (version) or its comments (comments_version),
+    # the ETags are made of them
+    blog_doc["version"] = 1
+    blog_doc["comments_version"] = 1
+    blog_doc["_id"] = ObjectId()
+
+    await db.blogs.insert_one(blog_doc)
     # serialize
-    created["id"] = str(created["_id"])
-    created.pop("_id", None)
+    created = dict(blog_doc)
+    created["id"] = str(created.pop("_id"))
+    await search_index.index_blog(created)
     return created
 
 
-async def update_blog(db: AsyncIOMotorDatabase, blog_id: str, blog_doc: dict) -> Optional[dict]:
+async def update_blog(
+    db: AsyncIOMotorDatabase, blog_id: str, blog_doc: dict, author_id: Optional[str] = None
+) -> Optional[Tuple[dict, dict]]:
+    """
+    Set the given title / content / tags in one find_one_and_update.
+    With author_id, only a blog of that author is updated.
+    Return (before, after) serialized, or None if no blog matched.
+    """
     update_fields = {}
     if "title" in blog_doc:
         update_fields["title"] = blog_doc["title"]
@@ -36,27 +67,63 @@ async def update_blog(db: AsyncIOMotorDatabase, blog_id: str, blog_doc: dict) ->
 
     update_fields["updated_at"] = datetime.utcnow()
 
-    await db.blogs.update_one({"_id": ObjectId(blog_id)}, {"$set": update_fields})
-    updated = await db.blogs.find_one({"_id": ObjectId(blog_id)})
-    if not updated:
+    query = {"_id": ObjectId(blog_id)}
+    if author_id is not None:
+        query["author_id"] = author_id
+    # the old version is needed for the tag counters, the new one is the old one plus update_fields
+    before = await db.blogs.find_one_and_update(
+        query,
+        {"$set": update_fields, "$inc": {"version": 1}},
+        projection={"liked_by": 0},
+        return_document=ReturnDocument.BEFORE,
+    )
+    if not before:
         return None
-    updated["id"] = str(updated["_id"])
-    updated.pop("_id", None)
-    return updated
+    await blog_cache.invalidate_blog_detail(blog_id)
+    await bump_generation(blog_cache.LIST_GENERATION_KEY)
+    before["id"] = str(before.pop("_id"))
+    updated = {**before, **update_fields, "version": before.get("version", 0) + 1}
+    await search_index.index_blog(updated)
+    return before, updated
 
 
-async def delete_blog(db: AsyncIOMotorDatabase, blog_id: str) -> bool:
-    res = await db.blogs.delete_one({"_id": ObjectId(blog_id)})
-    return res.deleted_count == 1
+async def delete_blog(db: AsyncIOMotorDatabase, blog_id: str, author_id: Optional[str] = None) -> Optional[dict]:
+    """
+    Delete the blog and its likes. With author_id, only a blog of that author is deleted.
+    Return the deleted blog (tags and created_at, for the tag counters), or None if no blog matched.
+    """
+    oid = ObjectId(blog_id)
+    query = {"_id": oid}
+    if author_id is not None:
+        query["author_id"] = author_id
+
+    async def _delete(session):
+        doc = await db.blogs.find_one_and_delete(
+            query, projection={"tags": 1, "created_at": 1}, session=session
+        )
+        if doc:
+            await db.blog_likes.delete_many({"blog_id": oid}, session=session)
+        return doc
+
+    deleted = await run_in_transaction(db, _delete)
+    if not deleted:
+        return None
+    await blog_cache.invalidate_blog_detail(blog_id)
+    await bump_generation(blog_cache.LIST_GENERATION_KEY)
+    await trending.remove_blog(blog_id)
+    await leaderboard.remove_blogs([blog_id])
+    await search_index.remove_blog(blog_id)
+    deleted["id"] = str(deleted.pop("_id"))
+    return deleted
 
 
-async def find_blog_by_id(db: AsyncIOMotorDatabase, blog_id: str) -> Optional[dict]:
+async def find_blog_by_id(db: AsyncIOMotorDatabase, blog_id: str, projection: dict = None) -> Optional[dict]:
     try:
         oid = ObjectId(blog_id)
     except Exception:
         return None
 
-    doc = await db.blogs.find_one({"_id": oid})
+    doc = await db.blogs.find_one({"_id": oid}, projection)
     if not doc:
         return None
 
@@ -69,6 +136,41 @@ async def find_blog_by_id(db: AsyncIOMotorDatabase, blog_id: str) -> Optional[di
 
     return doc
 
+async def find_blogs_by_ids(db: AsyncIOMotorDatabase, blog_ids: List[str]) -> List[dict]:
+    """
+    Fetch blog previews (without content) in one $in query, in the order of blog_ids.
+    Missing blogs are skipped.
+    """
+    oid_list = [ObjectId(bid) for bid in blog_ids if ObjectId.is_valid(bid)]
+    if not oid_list:
+        return []
+    cursor = db.blogs.find({"_id": {"$in": oid_list}}, {"content": 0, "liked_by": 0})
+    docs = {str(doc["_id"]): _serialize(doc) async for doc in cursor}
+    return [docs[bid] for bid in blog_ids if bid in docs]
+
+async def find_blogs_by_ids_sorted(
+    db: AsyncIOMotorDatabase,
+    blog_ids: List[str],
+    sort_by: BlogSortField,
+    sort_order: SortDirection,
+    skip: int = 0,
+    limit: int = 10,
+) -> List[dict]:
+    """
+    Return one page of the given blogs (without content) ordered by sort_by.
+    """
+    oid_list = [ObjectId(bid) for bid in blog_ids if ObjectId.is_valid(bid)]
+    if not oid_list:
+        return []
+    cursor = (
+        db.blogs
+        .find({"_id": {"$in": oid_list}}, {"content": 0, "liked_by": 0})
+        .sort(blog_filters_sort(sort_by, sort_order))
+        .skip(skip)
+        .limit(limit)
+    )
+    return [_serialize(doc) async for doc in cursor]
+
 def _serialize(doc: dict) -> dict:
     return {
         "id": str(doc["_id"]),
@@ -83,13 +185,26 @@ def _serialize(doc: dict) -> dict:
         "comment_count": doc.get("comment_count", 0),
     }
 
+AUTHOR_BLOGS_SORT = [("created_at", -1), ("_id", -1)]
+
+async def find_blog_ids_by_author(db: AsyncIOMotorDatabase, author_id: str) -> List[str]:
+    # covered by idx_author_created_id, no document is fetched
+    cursor = db.blogs.find({"author_id": author_id}, {"_id": 1})
+    return [str(doc["_id"]) async for doc in cursor]
+
 async def list_blogs_by_author(
     db: AsyncIOMotorDatabase,
     author_id: str,
     limit: int = 10,
     skip: int = 0,
     exclude: str = None,
-) -> List[dict]:
+    cursor: str = None,
+    mode: TotalMode = TotalMode.EXACT,
+) -> Tuple[List[dict], Optional[int], Optional[str]]:
+    """
+    Return (blogs, total, next_cursor), see find_page.
+    With a cursor, skip is ignored and the page starts right after it.
+    """
     projection = {
         "content": 0,
         "liked_by": 0,
@@ -99,17 +214,11 @@ async def list_blogs_by_author(
         exclude_oid = ObjectId(exclude)
         query["_id"] = {"$ne": exclude_oid}
 
-    cursor = (
-        db.blogs
-        .find(query, projection=projection)
-        .sort("created_at", -1)
-        .skip(skip)
-        .limit(limit)
+    docs, total, next_cursor = await find_page(
+        db.blogs, query, AUTHOR_BLOGS_SORT, limit,
+        skip=skip, cursor=cursor, projection=projection, mode=mode,
     )
-    items: List[dict] = []
-    async for doc in cursor:
-        items.append(_serialize(doc))
-    return items
+    return [_serialize(doc) for doc in docs], total, next_cursor
 
 async def count_blogs_by_author(db: AsyncIOMotorDatabase, author_id: str) -> int:
     return await db.blogs.count_documents({"author_id": author_id})
@@ -169,6 +278,14 @@ async def count_blogs(db: AsyncIOMotorDatabase, keyword: str=None, tags: List[st
         query["tags"] = {"$all": tags}
     return await db.blogs.count_documents(query)
 
+def blog_filters_sort(sort_by: BlogSortField, sort_order: SortDirection) -> List[tuple]:
+    direction = -1 if sort_order == SortDirection.DESC else 1
+    return [
+        (sort_by.value, direction),
+        # Secondary sort by _id to ensure consistent ordering, same direction so one index serves both orders
+        ("_id", direction)
+    ]
+
 async def find_blogs_by_filters(
         db: AsyncIOMotorDatabase,
         keyword: str=None,
@@ -177,7 +294,13 @@ async def find_blogs_by_filters(
         limit: int=10,
         sort_by: BlogSortField=BlogSortField.CREATED_AT,
         sort_order: SortDirection=SortDirection.DESC,
-) -> List[dict]:
+        cursor: str=None,
+        mode: TotalMode = TotalMode.EXACT,
+) -> Tuple[List[dict], Optional[int], Optional[str]]:
+    """
+    Return (blogs, total, next_cursor), see find_page.
+    With a cursor, skip is ignored and the page starts right after it.
+    """
     query = {}
     if keyword:
         query["title"] = {
@@ -188,90 +311,76 @@ async def find_blogs_by_filters(
         # Match blogs that contain all specified tags
         query["tags"] = {"$all": tags}
 
-    direction = -1 if sort_order == SortDirection.DESC else 1
-    sort_criteria = [
-        (sort_by.value, direction),
-        ("_id", -1)  # Secondary sort by _id to ensure consistent ordering
-    ]
-
     # using projection to exclude content field, prevent large memory usage
     projection = {"content": 0}
 
-    cursor = (
-        db.blogs
-        .find(query, projection)
-        .sort(sort_criteria)
-        .skip(skip)
-        .limit(limit)
+    docs, total, next_cursor = await find_page(
+        db.blogs, query, blog_filters_sort(sort_by, sort_order), limit,
+        skip=skip, cursor=cursor, projection=projection, mode=mode,
     )
+    return [_serialize(doc) for doc in docs], total, next_cursor
 
-    items: List[dict] = []
-    async for doc in cursor:
-        items.append(_serialize(doc))
-    return items
-
-async def get_hottest_tags(db: AsyncIOMotorDatabase,limit: int = 10,) -> List[dict]:
+# count one view of a blog
+async def inc_view_count(db: AsyncIOMotorDatabase, blog_id: str, view_count: int) -> Optional[int]:
     """
-    Aggregate and compute the currently hottest tags.
-    Sort tags by the number of blogs that use them in descending order, and return the top limit tags.
+    Count one view of the blog.
+    view_count is the value read with the blog; return the view count to show,
+    or None if the blog does not exist.
     """
-    cutoff_date = datetime.utcnow() - timedelta(days=30)
-    pipeline = [
-        {"$match": {"created_at": {"$gte": cutoff_date}}},
-        {"$unwind": "$tags"},
-        {
-            "$group": {
-                "_id": "$tags",
-                "blog_count": {"$sum": 1},
-            }
-        },
-        {"$sort": {"blog_count": -1}},
-        {"$limit": limit},
-    ]
-
-
-    cursor = db.blogs.aggregate(pipeline)
-    results: List[dict] = []
-    async for doc in cursor:
-        # Keep result here; it will be converted to HottestTagResponse in the service layer.
-        results.append(doc)
-    return results
-
-# read blog
-async def find_blog_by_id_and_inc_view(db: AsyncIOMotorDatabase, blog_id: str, user_id:str=None) -> Optional[dict]:
     try:
         oid = ObjectId(blog_id)
     except Exception:
         return None
 
+    if VIEW_COUNTER_MODE == "buffered":
+        # the view is buffered in Redis and flushed later in bulk
+        try:
+            pending = await view_counter.record_view(db, blog_id)
+            return view_count + pending
+        except Exception as e:
+            logger.error(f"Failed to buffer view, fall back to direct increment: {e}")
+
     doc = await db.blogs.find_one_and_update(
         {"_id": oid},
         {"$inc": {"view_count": 1}},
+        projection={"view_count": 1},
         return_document=ReturnDocument.AFTER,
     )
     if not doc:
         return None
+    await trending.mark_dirty([blog_id])
+    await leaderboard.set_view_count(blog_id, doc.get("view_count", 0))
+    return doc.get("view_count", 0)
 
-    liked_by_list = doc.get("liked_by", [])
-    if user_id:
-        try:
-            u_oid = ObjectId(user_id)
-            doc["is_liked"] = u_oid in liked_by_list
-        except Exception as e:
-            doc["is_liked"] = False
-    else:
-        doc["is_liked"] = False
 
-    doc.pop("liked_by", None)
-    doc["id"] = str(doc["_id"])
-    doc.pop("_id", None)
-    if "tags" not in doc:
-        doc["tags"] = []
-    if "view_count" not in doc:
-        doc["view_count"] = 0
-    if "like_count" not in doc:
-        doc["like_count"] = 0
-    return doc
+async def is_blog_liked(db: AsyncIOMotorDatabase, blog_id: str, user_id: str) -> bool:
+    try:
+        b_oid = ObjectId(blog_id)
+        u_oid = ObjectId(user_id)
+    except Exception:
+        return False
+
+    doc = await db.blog_likes.find_one({"blog_id": b_oid, "user_id": u_oid, "active": True}, {"_id": 1})
+    return doc is not None
+
+
+async def find_liked_blog_ids(db: AsyncIOMotorDatabase, user_id: str, blog_ids: List[str]) -> set:
+    """
+    Return the subset of blog_ids liked by the user, in one query (for list pages).
+    """
+    try:
+        u_oid = ObjectId(user_id)
+    except Exception:
+        return set()
+    oid_list = [ObjectId(bid) for bid in blog_ids if ObjectId.is_valid(bid)]
+    if not oid_list:
+        return set()
+
+    cursor = db.blog_likes.find(
+        {"blog_id": {"$in": oid_list}, "user_id": u_oid, "active": True},
+        {"blog_id": 1, "_id": 0},
+    )
+    return {str(doc["blog_id"]) async for doc in cursor}
 
 async def list_blogs_by_views(
     db: AsyncIOMotorDatabase,
@@ -299,40 +408,66 @@ async def list_blogs_by_views(
         })
     return items
 
-async def modify_liked_by(
-    db: AsyncIOMotorDatabase,
-    blog_id: str,
-    user_id: str,
-    like_num: int,
-) -> bool:
-    try:
-        b_oid = ObjectId(blog_id)
-        u_oid = ObjectId(user_id)
-    except Exception:
-        return False
-    query = {"_id": b_oid}
-    update_op = {"$inc": {"like_count": like_num}}
-
-    if like_num < 0:
-        query["liked_by"] = u_oid
-        update_op["$pull"] = {"liked_by": u_oid}
-    else:
-        query["liked_by"] = {"$ne": u_oid}
-        update_op["$addToSet"] = {"liked_by": u_oid}
-
-    result = await db.blogs.update_one(query, update_op)
-    return result.matched_count == 1
+async def toggle_like(db: AsyncIOMotorDatabase, blog_id: str, user_id: str) -> Optional[dict]:
+    """
+    Flip the like of user on blog and keep like_count in sync.
+    Two writes, the like row and the blog are in different collections: the row is flipped
+    in one round trip (upsert + pipeline update, unliked rows are kept inactive), then like_count
+    is moved by one. Both run in a transaction when available; without one, a failure between
+    them leaves like_count off by one until `python -m src.scripts.migrate_likes --repair-counts`
+    recomputes it from blog_likes.
+    Return {"is_liked", "like_count"}, or None if the blog does not exist.
+    """
+    b_oid = ObjectId(blog_id)
+    u_oid = ObjectId(user_id)
+
+    flip = [{"$set": {
+        "active": {"$ne": ["$active", True]},
+        "updated_at": "$$NOW",
+    }}]
+
+    async def _toggle(session):
+        like = await db.blog_likes.find_one_and_update(
+            {"blog_id": b_oid, "user_id": u_oid},
+            flip,
+            upsert=True,
+            projection={"active": 1},
+            return_document=ReturnDocument.AFTER,
+            session=session,
+        )
+        is_liked = like["active"]
+
+        blog = await db.blogs.find_one_and_update(
+            {"_id": b_oid},
+            {"$inc": {"like_count": 1 if is_liked else -1, "version": 1}},
+            projection={"like_count": 1},
+            return_document=ReturnDocument.AFTER,
+            session=session,
+        )
+        if not blog:
+            await db.blog_likes.delete_one({"blog_id": b_oid, "user_id": u_oid}, session=session)
+            return None
+        return is_liked, blog
 
+    try:
+        result = await run_in_transaction(db, _toggle)
+    except DuplicateKeyError:
+        # a concurrent toggle inserted the row first, the retry flips the existing one
+        result = await run_in_transaction(db, _toggle)
+    if result is None:
+        return None
+    is_liked, blog = result
 
-from datetime import datetime, timedelta
-from typing import List, Optional
-from motor.motor_asyncio import AsyncIOMotorDatabase
-from bson import ObjectId
+    await blog_cache.invalidate_blog_detail(blog_id)
+    await trending.mark_dirty([blog_id])
+    return {
+        "is_liked": is_liked,
+        "like_count": blog.get("like_count", 0),
+    }
 
 
 async def get_trending_feed(
         db: AsyncIOMotorDatabase,
-        user_id: Optional[str],
         page: int = 1,
         size: int = 10,
         days_window: int = 100,
@@ -384,15 +519,6 @@ async def get_trending_feed(
         {"$limit": size},
     ]
 
-    if user_id:
-        pipeline.append({
-            "$addFields": {
-                "is_liked": {"$in": [ObjectId(user_id), {"$ifNull": ["$liked_by", []]}]}
-            }
-        })
-    else:
-        pipeline.append({"$addFields": {"is_liked": False}})
-
     pipeline.append({
         "$project": {
             "liked_by": 0, "content": 0,
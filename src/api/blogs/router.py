@@ -11,6 +11,9 @@ router = APIRouter(
 from fastapi import APIRouter, Depends, status, Path, Query
 from src.api.blogs import service
 from src.auth import auth
+from src.core.config import HOT_LISTS_MAX_AGE_SECONDS
+from src.utils.conditional import Conditional, conditional
+from src.utils.pagination import total_mode
 
 @router.post(
     "",
@@ -68,11 +71,12 @@ async def delete_blog_endpoint(
 )
 async def get_blog_by_id_endpoint(
     blog_id: str = Path(..., min_length=24, max_length=24, description="MongoDB ObjectId string"),
-    current_user: dict | None = Depends(auth.try_get_current_user)
+    current_user: dict | None = Depends(auth.try_get_current_user),
+    cond: Conditional = Depends(conditional(vary_credentials=True)),
 ):
     logger.debug("list the blog, blog_id is=%s", blog_id)
     user_id = current_user["id"] if current_user else None
-    return await service.get_blog(blog_id, user_id)
+    return await service.get_blog(blog_id, user_id, cond=cond)
 
 @router.get(
     "/{blog_id}/preview",
@@ -83,9 +87,10 @@ async def get_blog_by_id_endpoint(
 )
 async def get_blog_preview_endpoint(
     blog_id: str = Path(..., min_length=24, max_length=24, description="MongoDB ObjectId string"),
+    cond: Conditional = Depends(conditional()),
 ):
     logger.debug("get blog preview, blog_id is %s", blog_id)
-    return await service.get_blog_preview(blog_id)
+    return await service.get_blog_preview(blog_id, cond=cond)
 
 
 # get my blog
@@ -97,11 +102,16 @@ async def get_blog_preview_endpoint(
 async def list_my_blogs_endpoint(
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page, replaces page"),
+    include_total: bool = Query(True, description="Count the total, false skips the count"),
+    approx_total: bool = Query(False, description="Serve the total from a short-lived cache"),
     claims: dict = Depends(auth.verify_access_token),
 ):
     author_id = claims["sub"]
     logger.debug("list my blog, author_id is=%s",author_id)
-    return await service.list_author_blogs(author_id, page, size)
+    return await service.list_author_blogs(
+        author_id, page, size, cursor=cursor, mode=total_mode(include_total, approx_total)
+    )
 
 #get other people blog
 @router.get(
@@ -113,10 +123,15 @@ async def list_blogs_by_author_endpoint(
     author_id: str = Path(..., description="User ID of the author"),
     page: int = Query(1, ge=1),
     size: int = Query(10, ge=1, le=50),
-    exclude_blog_id: Optional[str] = Query(None, description="Blog ID to exclude from results")
+    exclude_blog_id: Optional[str] = Query(None, description="Blog ID to exclude from results"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page, replaces page"),
+    include_total: bool = Query(True, description="Count the total, false skips the count"),
+    approx_total: bool = Query(False, description="Serve the total from a short-lived cache"),
 ):
     logger.debug("list others blog, author_id is=%s", author_id)
-    return await service.list_author_blogs(author_id, page, size, exclude_blog_id)
+    return await service.list_author_blogs(
+        author_id, page, size, exclude_blog_id, cursor, mode=total_mode(include_total, approx_total)
+    )
 
 # hottest blog tag
 @router.get(
@@ -129,12 +144,9 @@ async def list_blogs_by_author_endpoint(
 async def get_hottest_tags_endpoint(
     # background_tasks: BackgroundTasks,
     limit: int = Query(10, ge=1, le=50, description="Maximum number of tags to return"),
+    cond: Conditional = Depends(conditional(max_age=HOT_LISTS_MAX_AGE_SECONDS)),
 ):
-    tags = await service.get_cached_hot_tags(limit)
-    if tags:
-        return tags
-    # background_tasks.add_task(service.get_hottest_tags, limit)
-    return []
+    return await service.get_hottest_tags(limit, cond=cond)
 # hottest view count blog
 @router.get(
     "/views/hottest",
@@ -145,8 +157,9 @@ async def get_hottest_tags_endpoint(
 )
 async def get_hottest_blogs_by_views_endpoint(
     limit: int = Query(10, ge=1, le=50, description="Maximum number of blogs to return"),
+    cond: Conditional = Depends(conditional(max_age=HOT_LISTS_MAX_AGE_SECONDS)),
 ):
-    return await service.list_hottest_blogs_by_views(limit)
+    return await service.list_hottest_blogs_by_views(limit, cond=cond)
 
 @router.post(
     "/{blog_id}/like",
@@ -0,0 +1,272 @@
+# src/api/blogs/search_index.py
+import hashlib
+import json
+import math
+import re
+import unicodedata
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from src.core.config import (
+    SEARCH_BM25_K1, SEARCH_BM25_B, SEARCH_TITLE_WEIGHT,
+    SEARCH_QUERY_CACHE_SECONDS, SEARCH_MAX_CANDIDATES,
+)
+from src.core.redis import redis_client
+from src.logger import get_logger
+
+# posting list of a term: blog_id -> BM25 term-frequency part (the query multiplies it by the idf)
+TERM_KEY = "search:term:{}"
+# blog_id -> {"terms", "tags", "len"}, what the blog was indexed with (to unindex it later)
+DOC_KEY = "search:doc:{}"
+# set of blog_ids having the tag
+TAG_KEY = "search:tag:{}"
+# blog_id -> timestamp, to order matches by date without reading MongoDB
+CREATED_KEY = "search:created"
+UPDATED_KEY = "search:updated"
+# {"docs": number of indexed blogs, "total_len": sum of their lengths}
+STATS_KEY = "search:stats"
+# matches of one query, cached for SEARCH_QUERY_CACHE_SECONDS
+QUERY_KEY = "search:query:{}"
+# set once the index was built from MongoDB
+READY_KEY = "search:ready"
+
+# the matches of these sorts are ordered in Redis, other sorts are done by MongoDB on the candidates
+RELEVANCE = "relevance"
+DATE_KEYS = {"created_at": CREATED_KEY, "updated_at": UPDATED_KEY}
+
+BATCH_SIZE = 500
+MAX_TOKEN_LENGTH = 40
+
+STOP_WORDS = frozenset(
+    "a an and are as at be but by for from has have in is it its of on or that the "
+    "this to was were will with".split()
+)
+_WORD_RE = re.compile(r"[^\W_]+")
+# scripts written without spaces are indexed as overlapping character pairs
+_CJK_RE = re.compile(r"([\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]+)")
+
+logger = get_logger()
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Split text into normalized search terms (NFKC, case-folded, stop words dropped).
+    """
+    if not text:
+        return []
+    text = unicodedata.normalize("NFKC", text).casefold()
+    tokens = []
+    for word in _WORD_RE.findall(text):
+        for i, part in enumerate(_CJK_RE.split(word)):
+            if not part:
+                continue
+            if i % 2:
+                tokens.extend([part] if len(part) == 1 else [part[j:j + 2] for j in range(len(part) - 1)])
+            elif part not in STOP_WORDS and len(part) <= MAX_TOKEN_LENGTH:
+                tokens.append(part)
+    return tokens
+
+
+def _term_weights(blog: dict) -> Dict[str, int]:
+    weights = Counter(tokenize(blog.get("content")))
+    for term in tokenize(blog.get("title")):
+        weights[term] += SEARCH_TITLE_WEIGHT
+    return dict(weights)
+
+
+def _bm25_tf(tf: float, doc_len: float, avg_len: float) -> float:
+    norm = 1 - SEARCH_BM25_B + SEARCH_BM25_B * doc_len / (avg_len or 1)
+    return tf * (SEARCH_BM25_K1 + 1) / (tf + SEARCH_BM25_K1 * norm)
+
+
+def _idf(docs: int, df: int) -> float:
+    return math.log(1 + (docs - df + 0.5) / (df + 0.5))
+
+
+def _timestamp(value: Optional[datetime]) -> float:
+    return value.timestamp() if isinstance(value, datetime) else 0
+
+
+def _add_postings(pipe, blog_id: str, blog: dict, weights: Dict[str, int], doc_len: int, avg_len: float) -> None:
+    for term, tf in weights.items():
+        pipe.zadd(TERM_KEY.format(term), {blog_id: _bm25_tf(tf, doc_len, avg_len)})
+    for tag in blog.get("tags") or []:
+        pipe.sadd(TAG_KEY.format(tag), blog_id)
+    pipe.zadd(CREATED_KEY, {blog_id: _timestamp(blog.get("created_at"))})
+    pipe.zadd(UPDATED_KEY, {blog_id: _timestamp(blog.get("updated_at") or blog.get("created_at"))})
+    pipe.hset(DOC_KEY.format(blog_id), mapping={
+        "terms": json.dumps(list(weights)),
+        "tags": json.dumps(list(blog.get("tags") or [])),
+        "len": doc_len,
+    })
+
+
+def _remove_postings(pipe, blog_id: str, indexed: dict) -> None:
+    for term in json.loads(indexed.get("terms", "[]")):
+        pipe.zrem(TERM_KEY.format(term), blog_id)
+    for tag in json.loads(indexed.get("tags", "[]")):
+        pipe.srem(TAG_KEY.format(tag), blog_id)
+    pipe.zrem(CREATED_KEY, blog_id)
+    pipe.zrem(UPDATED_KEY, blog_id)
+    pipe.delete(DOC_KEY.format(blog_id))
+
+
+async def index_blog(blog: dict) -> None:
+    """
+    (Re)index a serialized blog (with "id", "title", "content", "tags" and dates) after it was written.
+    """
+    blog_id = blog["id"]
+    weights = _term_weights(blog)
+    doc_len = sum(weights.values())
+    try:
+        pipe = redis_client.pipeline(transaction=False)
+        pipe.hgetall(DOC_KEY.format(blog_id))
+        pipe.hgetall(STATS_KEY)
+        indexed, stats = await pipe.execute()
+
+        old_len = float(indexed.get("len", 0)) if indexed else 0
+        docs = int(stats.get("docs", 0)) + (0 if indexed else 1)
+        total_len = float(stats.get("total_len", 0)) - old_len + doc_len
+
+        pipe = redis_client.pipeline(transaction=True)
+        if indexed:
+            _remove_postings(pipe, blog_id, indexed)
+        _add_postings(pipe, blog_id, blog, weights, doc_len, total_len / max(docs, 1))
+        if not indexed:
+            pipe.hincrby(STATS_KEY, "docs", 1)
+        pipe.hincrbyfloat(STATS_KEY, "total_len", doc_len - old_len)
+        await pipe.execute()
+    except Exception as e:
+        logger.error(f"Failed to index blog {blog_id}: {e}")
+
+
+async def remove_blog(blog_id: str) -> None:
+    try:
+        indexed = await redis_client.hgetall(DOC_KEY.format(blog_id))
+        if not indexed:
+            return
+        pipe = redis_client.pipeline(transaction=True)
+        _remove_postings(pipe, blog_id, indexed)
+        pipe.hincrby(STATS_KEY, "docs", -1)
+        pipe.hincrbyfloat(STATS_KEY, "total_len", -float(indexed.get("len", 0)))
+        await pipe.execute()
+    except Exception as e:
+        logger.error(f"Failed to remove blog {blog_id} from search index: {e}")
+
+
+async def _build_matches(key: str, terms: List[str], tags: List[str], sort_by: str) -> None:
+    """
+    Store the matches of the query in key: blogs having any of the terms and all the tags,
+    scored by BM25 (or by date for the date sorts).
+    """
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.hget(STATS_KEY, "docs")
+    for term in terms:
+        pipe.zcard(TERM_KEY.format(term))
+    docs, *dfs = await pipe.execute()
+    docs = int(docs or 0)
+
+    pipe = redis_client.pipeline(transaction=True)
+    pipe.zunionstore(key, {TERM_KEY.format(term): _idf(docs, df) for term, df in zip(terms, dfs)})
+    if tags:
+        pipe.zinterstore(key, {key: 1, **{TAG_KEY.format(tag): 0 for tag in tags}})
+    if sort_by in DATE_KEYS:
+        pipe.zinterstore(key, {key: 0, DATE_KEYS[sort_by]: 1})
+    pipe.expire(key, SEARCH_QUERY_CACHE_SECONDS)
+    await pipe.execute()
+
+
+async def is_ready() -> bool:
+    """
+    False until the index was built from MongoDB (searches must use MongoDB meanwhile).
+    """
+    return bool(await redis_client.exists(READY_KEY))
+
+
+async def search(
+    keyword: str,
+    tags: Optional[List[str]] = None,
+    sort_by: str = RELEVANCE,
+    descending: bool = True,
+    offset: int = 0,
+    limit: int = 10,
+) -> Tuple[List[str], int]:
+    """
+    Return (blog_ids, total) of the page of matches, check is_ready first.
+    For sorts other than relevance and dates, the SEARCH_MAX_CANDIDATES best ranked blog_ids
+    are returned instead, for the caller to sort.
+    """
+    terms = sorted(set(tokenize(keyword)))
+    if not terms:
+        return [], 0
+
+    tags = sorted(set(tags or []))
+    redis_sort = sort_by if sort_by in DATE_KEYS else RELEVANCE
+    digest = hashlib.sha1(json.dumps([terms, tags, redis_sort]).encode()).hexdigest()
+    key = QUERY_KEY.format(digest)
+
+    if not await redis_client.exists(key):
+        await _build_matches(key, terms, tags, redis_sort)
+
+    if sort_by != redis_sort:
+        offset, limit, descending = 0, SEARCH_MAX_CANDIDATES, True
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.zcard(key)
+    if descending:
+        pipe.zrevrange(key, offset, offset + limit - 1)
+    else:
+        pipe.zrange(key, offset, offset + limit - 1)
+    total, blog_ids = await pipe.execute()
+    return blog_ids, total
+
+
+async def _delete_index() -> None:
+    async for key in redis_client.scan_iter(match="search:*", count=BATCH_SIZE):
+        await redis_client.delete(key)
+
+
+def _iter_blogs(db: AsyncIOMotorDatabase):
+    return db.blogs.find({}, {"title": 1, "content": 1, "tags": 1, "created_at": 1, "updated_at": 1})
+
+
+async def rebuild_index(db: AsyncIOMotorDatabase) -> int:
+    """
+    Rebuild the whole index from MongoDB, return the number of blogs indexed.
+    Searches fall back to MongoDB while it runs.
+    """
+    await redis_client.delete(READY_KEY)
+    await _delete_index()
+
+    # first pass for the average length, which the stored BM25 parts depend on
+    docs, total_len = 0, 0
+    async for blog in _iter_blogs(db):
+        docs += 1
+        total_len += sum(_term_weights(blog).values())
+    avg_len = total_len / max(docs, 1)
+
+    pipe = redis_client.pipeline(transaction=False)
+    pending = 0
+    async for blog in _iter_blogs(db):
+        weights = _term_weights(blog)
+        _add_postings(pipe, str(blog["_id"]), blog, weights, sum(weights.values()), avg_len)
+        pending += 1
+        if pending >= BATCH_SIZE:
+            await pipe.execute()
+            pending = 0
+    pipe.hset(STATS_KEY, mapping={"docs": docs, "total_len": total_len})
+    pipe.set(READY_KEY, datetime.utcnow().isoformat())
+    await pipe.execute()
+
+    logger.info("Search index rebuilt, %s blogs", docs)
+    return docs
+
+
+async def ensure_index(db: AsyncIOMotorDatabase) -> None:
+    """
+    Build the index on cold start (e.g. fresh Redis).
+    """
+    if not await redis_client.exists(READY_KEY):
+        await rebuild_index(db)
@@ -1,5 +1,4 @@
 import asyncio
-import json
 from datetime import datetime
 
 from bson import ObjectId
@@ -11,10 +10,17 @@ from fastapi import HTTPException, status
 from typing import Dict, Any, Optional
 from src.api.users import repository as user_repository
 from src.logger import get_logger
-from src.core.redis import redis_client
-
-CACHE_KEY = "hot_tags:top10"
-_is_refreshing = False
+from src.api.blogs import view_counter
+from src.api.blogs import cache as blog_cache
+from src.api.blogs import trending
+from src.api.blogs import leaderboard
+from src.api.blogs import tag_counter
+from src.api.blogs import search_index
+from src.utils.conditional import Conditional, make_etag, get_generation
+from src.utils.pagination import TotalMode
+
+# extra leaderboard entries read in case some ranked blogs were deleted
+LEADERBOARD_SPARE = 10
 logger = get_logger()
 async def create_blog(author_id: str, blog_in: BlogCreate) -> dict:
     blog_doc = {
@@ -26,27 +32,31 @@ async def create_blog(author_id: str, blog_in: BlogCreate) -> dict:
         "tags": blog_in.tags,
         "view_count": 0,
         "like_count": 0,
-        "liked_by": [],
     }
-    created = await asyncio.wait_for(repository.add_blog(db, blog_doc), timeout=5)
-    user = await user_repository.find_by_id(db, created["author_id"])
+    # the author lookup does not depend on the insert, both are sent at once
+    created, user = await asyncio.gather(
+        asyncio.wait_for(repository.add_blog(db, blog_doc), timeout=5),
+        user_repository.find_by_id(db, author_id),
+    )
+    await tag_counter.apply_tag_delta(created["created_at"], added=created["tags"])
     user_name = user["username"] if user else "Unknown"
     created["author_username"] = user_name
     return created
 
-async def edit_blog(blog_id: str, author_id: str, update_fields: Dict[str, Any]) -> dict:
+async def _raise_not_found_or_forbidden(blog_id: str) -> None:
     """
-    Only author can edit blog
+    A write filtered on (_id, author_id) matched nothing: 404 if the blog does not exist, 403 otherwise.
+    Only run on that error path, the successful writes skip the ownership read.
     """
-    # check blog existed
-    existing = await repository.find_blog_by_id(db, blog_id)
+    existing = await repository.find_blog_by_id(db, blog_id, projection={"_id": 1})
     if not existing:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Blog not found")
+    raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
 
-    # only author can edit
-    if existing["author_id"] != author_id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
-
+async def edit_blog(blog_id: str, author_id: str, update_fields: Dict[str, Any]) -> dict:
+    """
+    Only author can edit blog
+    """
     # if nothing update,ignore
     filtered: Dict[str, Any] = {}
     if "title" in update_fields and update_fields["title"] is not None:
@@ -58,12 +68,24 @@ async def edit_blog(blog_id: str, author_id: str, update_fields: Dict[str, Any])
 
     if not filtered:
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="No fields to update")
+    if not ObjectId.is_valid(blog_id):
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Blog not found")
 
-
-    updated = await asyncio.wait_for(repository.update_blog(db, blog_id, filtered), timeout=5)
-    if not updated:
-        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail="Update failed")
-    user = await user_repository.find_by_id(db, updated["author_id"])
+    # ownership is part of the update filter, the author is the caller
+    result, user = await asyncio.gather(
+        asyncio.wait_for(repository.update_blog(db, blog_id, filtered, author_id=author_id), timeout=5),
+        user_repository.find_by_id(db, author_id),
+    )
+    if not result:
+        await _raise_not_found_or_forbidden(blog_id)
+    existing, updated = result
+    if "tags" in filtered:
+        old_tags, new_tags = set(existing.get("tags", [])), set(filtered["tags"])
+        await tag_counter.apply_tag_delta(
+            existing["created_at"],
+            added=new_tags - old_tags,
+            removed=old_tags - new_tags,
+        )
     user_name = user["username"] if user else "Unknown"
     updated["author_username"] = user_name
     return updated
@@ -73,44 +95,82 @@ async def remove_blog(blog_id: str, author_id: str) -> None:
     """
     Only author can delete blog
     """
-    # check blog existed
-    existing = await repository.find_blog_by_id(db, blog_id)
-    if not existing:
+    if not ObjectId.is_valid(blog_id):
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Blog not found")
 
-    # only author can delete
-    if existing["author_id"] != author_id:
-        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Forbidden")
-
-    ok = await asyncio.wait_for(repository.delete_blog(db, blog_id), timeout=5)
-    if not ok:
-        raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Delete failed")
+    deleted = await asyncio.wait_for(repository.delete_blog(db, blog_id, author_id=author_id), timeout=5)
+    if not deleted:
+        await _raise_not_found_or_forbidden(blog_id)
+    await tag_counter.apply_tag_delta(deleted["created_at"], removed=deleted.get("tags", []))
 
 #get blog by blog_id, read blog detail content,increase view count
-async def get_blog(blog_id: str, user_id: str = None) -> dict:
-    doc = await repository.find_blog_by_id_and_inc_view(db, blog_id, user_id)
-    # Batch query author usernames (to avoid repeated database lookups).
-    if not doc:
+async def get_blog(blog_id: str, user_id: str = None, cond: Optional[Conditional] = None) -> dict:
+    """
+    With cond, a client holding the current version gets a 304 before is_liked is looked up;
+    the view is counted either way. The ETag is per user (is_liked), every like bumps the version,
+    and it holds the author's version the detail was assembled with (author_username).
+    """
+    doc = await blog_cache.get_blog_detail(blog_id)
+    if doc is None:
+        doc = await repository.find_blog_by_id(db, blog_id, projection={"liked_by": 0})
+        if not doc:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Blog not found")
+        user = await user_repository.find_by_id(db, doc["author_id"])
+        user_name = user["username"] if user else "Unknown"
+        doc["author_username"] = user_name
+        doc["author_version"] = user.get("version", 0) if user else 0
+        doc.setdefault("like_count", 0)
+        await blog_cache.set_blog_detail(blog_id, doc)
+
+    etag = make_etag("blog", blog_id, doc.get("version", 0), doc.get("author_version", 0), user_id)
+    if cond and cond.validate(etag):
+        await repository.inc_view_count(db, blog_id, doc["view_count"])
+        raise cond.not_modified()
+
+    # the cached detail is shared by all readers, view count and is_liked are resolved per request
+    if user_id:
+        view_count, is_liked = await asyncio.gather(
+            repository.inc_view_count(db, blog_id, doc["view_count"]),
+            repository.is_blog_liked(db, blog_id, user_id),
+        )
+    else:
+        view_count = await repository.inc_view_count(db, blog_id, doc["view_count"])
+        is_liked = False
+    if view_count is None:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Blog not found")
-    user = await user_repository.find_by_id(db, doc["author_id"])
-    user_name = user["username"] if user else "Unknown"
-    doc["author_username"] = user_name
-    logger.debug(f"Get blog detail: {doc}")
+    doc["view_count"] = view_count
+    doc["is_liked"] = is_liked
+    logger.debug("Get blog detail: %s", doc)
     return doc
 
+# called on a username change: the cached details of the author's blogs hold the old name
+async def invalidate_author_blog_details(author_id: str) -> None:
+    blog_ids = await repository.find_blog_ids_by_author(db, author_id)
+    await blog_cache.invalidate_blog_details(blog_ids)
+
+# write buffered views to MongoDB, run by the scheduler
+async def flush_view_counts() -> int:
+    return await view_counter.flush_views(db)
+
+# rescore the trending feed, run by the scheduler
+async def refresh_trending_feed(full: bool = False) -> int:
+    return await trending.refresh_trending(db, full=full)
+
 # get blog preview without content
-async def get_blog_preview(blog_id: str) -> BlogPreviewResponse:
+async def get_blog_preview(blog_id: str, cond: Optional[Conditional] = None) -> BlogPreviewResponse:
     """
-    get blog without detail content
+    get blog without detail content, from the cached detail when there is one
     """
-    doc = await repository.find_blog_by_id(db, blog_id)
+    doc = await blog_cache.get_blog_detail(blog_id)
+    if doc is None:
+        doc = await repository.find_blog_by_id(db, blog_id, projection={"content": 0, "liked_by": 0})
     if not doc:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Blog not found",
         )
 
-    return BlogPreviewResponse(
+    preview = BlogPreviewResponse(
         id=doc["id"],
         title=doc["title"],
         author_id=doc["author_id"],
@@ -118,105 +178,108 @@ async def get_blog_preview(blog_id: str) -> BlogPreviewResponse:
         updated_at=doc.get("updated_at"),
         tags=doc.get("tags", []),
     )
+    # every edit of these fields sets updated_at
+    last_modified = preview.updated_at or preview.created_at
+    if cond and cond.validate(make_etag("preview", blog_id, last_modified), last_modified):
+        raise cond.not_modified()
+    return preview
 
 #get blog by author
-async def list_author_blogs(author_id: str, page: int = 1, size: int = 10, exclude_blog_id: str=None) -> Dict[str, Any]:
+async def list_author_blogs(
+    author_id: str,
+    page: int = 1,
+    size: int = 10,
+    exclude_blog_id: str=None,
+    cursor: str=None,
+    mode: TotalMode = TotalMode.EXACT,
+) -> Dict[str, Any]:
     page = max(page, 1)
     size = max(min(size, 50), 1)
     skip = (page - 1) * size
 
-    items = await repository.list_blogs_by_author(db, author_id, limit=size, skip=skip, exclude = exclude_blog_id)
-    total = await repository.count_blogs_by_author(db, author_id)
+    try:
+        items, total, next_cursor = await repository.list_blogs_by_author(
+            db, author_id, limit=size, skip=skip, exclude=exclude_blog_id, cursor=cursor, mode=mode
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     return {
         "items": items,
         "page": page,
         "size": size,
         "total": total,
-        "has_next": page * size < total,
+        "has_next": next_cursor is not None,
+        "next_cursor": next_cursor,
     }
 
 # hottest blog tagSort tags by the number of blogs that use them, in descending order.
-async def get_hottest_tags(limit: int = 10) -> List[HottestTagResponse]:
+async def get_hottest_tags(limit: int = 10, cond: Optional[Conditional] = None) -> List[HottestTagResponse]:
     """
-    Sort tags by the number of blogs that use them, in descending order.
+    Sort tags by the number of blogs created in the window that use them, in descending order.
     """
-    global _is_refreshing
-    if _is_refreshing: # prevent multiple refreshes
-        return []
-    _is_refreshing = True
-    raw = await repository.get_hottest_tags(db, limit=limit)
-    hot_tags = [
-            {"name": item["_id"], "blog_count": item["blog_count"]}
-            for item in raw
-        ]
     try:
-        await redis_client.set(CACHE_KEY, json.dumps(hot_tags), ex=600)
+        hot_tags = await tag_counter.get_hot_tags(limit)
     except Exception as e:
-        logger.error(f"Failed to cache hottest tags: {e}")
-    finally:
-        _is_refreshing = False
+        logger.error(f"Failed to read tag counters: {e}")
+        return []
 
+    # read from Redis, the ranking itself is the validator
+    if cond and cond.validate(make_etag("hot_tags", hot_tags)):
+        raise cond.not_modified()
 
     return [
         HottestTagResponse(
-            tag=item["_id"],
-            blog_count=item["blog_count"],
-        )
-        for item in raw
-    ]
-
-
-async def get_cached_hot_tags(limit: int = 10) -> List[HottestTagResponse]:
-    data = await redis_client.get(CACHE_KEY)
-
-    if data:
-        return [
-        HottestTagResponse(
-            tag=item["name"],
-            blog_count=item["blog_count"],
+            tag=tag,
+            blog_count=blog_count,
         )
-        for item in json.loads(data)
+        for tag, blog_count in hot_tags
     ]
 
+async def ensure_tag_counters() -> None:
+    await tag_counter.ensure_tag_buckets(db)
 
-    return []
+async def ensure_search_index() -> None:
+    await search_index.ensure_index(db)
 
 # hottest view blog
-async def list_hottest_blogs_by_views(limit: int = 10) -> List[BlogViewRankResponse]:
-    items = await repository.list_blogs_by_views(db, limit=limit)
-    return [BlogViewRankResponse(**item) for item in items]
+async def list_hottest_blogs_by_views(limit: int = 10, cond: Optional[Conditional] = None) -> List[BlogViewRankResponse]:
+    top = await leaderboard.get_top(limit + LEADERBOARD_SPARE)
+    if top is None:
+        # leaderboard not built yet or Redis down, sort in MongoDB
+        items = await repository.list_blogs_by_views(db, limit=limit)
+        result = [BlogViewRankResponse(**item) for item in items]
+        if cond and cond.validate(make_etag("hot_views", [item.model_dump() for item in result])):
+            raise cond.not_modified()
+        return result
+
+    if cond:
+        # the ranking and the edits of the blogs shown, checked before the blogs are read
+        generation = await get_generation(blog_cache.LIST_GENERATION_KEY)
+        if generation is not None and cond.validate(make_etag("hot_views", limit, top, generation)):
+            raise cond.not_modified()
+
+    view_counts = dict(top)
+    items = await repository.find_blogs_by_ids(db, [blog_id for blog_id, _ in top])
+    found = {item["id"] for item in items}
+    # deleted blogs still ranked, drop them
+    await leaderboard.remove_blogs([blog_id for blog_id in view_counts if blog_id not in found])
+
+    result = []
+    for item in items[:limit]:
+        item["view_count"] = view_counts[item["id"]]
+        result.append(BlogViewRankResponse(**item))
+    return result
+
+async def ensure_view_leaderboard() -> None:
+    await leaderboard.ensure_leaderboard(db)
 
 
 async def like_blog(blog_id: str, user_id: str):
-
-    blog = await repository.find_blog_by_id(db, blog_id)
-
-    if not blog:
-        raise HTTPException(status_code=404, detail="Blog post not found")
-
-    liked_by_list = blog.get("liked_by", [])
-
-    is_liked = True
-    try:
-        b_oid = ObjectId(blog_id)
-        u_oid = ObjectId(user_id)
-    except Exception:
+    if not ObjectId.is_valid(blog_id) or not ObjectId.is_valid(user_id):
         raise HTTPException(status_code=400, detail="Invalid ObjectId format")
 
-    like_num = 1
-    if u_oid in liked_by_list:
-        like_num *= -1
-        is_liked = False
-    success = await repository.modify_liked_by(db, blog_id, user_id, like_num)
-
-    if not success:
-        raise HTTPException(status_code=500, detail="Failed to update like status")
-
-    updated_blog = await repository.find_blog_by_id(db, blog_id)
-    like_count = updated_blog.get("like_count", 0)
-
-    return {
-        "is_liked": is_liked,
-        "like_count": like_count
-    }
+    result = await repository.toggle_like(db, blog_id, user_id)
+    if result is None:
+        raise HTTPException(status_code=404, detail="Blog post not found")
 
+    return result
@@ -0,0 +1,121 @@
+# src/api/blogs/tag_counter.py
+from datetime import datetime, timedelta
+from typing import Iterable, List, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from src.core.config import HOT_TAGS_WINDOW_DAYS, HOT_TAGS_READ_CACHE_SECONDS
+from src.core.redis import redis_client
+from src.logger import get_logger
+
+# tag -> number of blogs created that day having the tag
+DAY_KEY = "tags:day:{}"
+# sum of the day buckets in the window, cached for HOT_TAGS_READ_CACHE_SECONDS
+WINDOW_KEY = "tags:window"
+# set once the buckets were backfilled from MongoDB
+READY_KEY = "tags:ready"
+
+logger = get_logger()
+
+
+def _day_key(day: datetime) -> str:
+    return DAY_KEY.format(day.strftime("%Y%m%d"))
+
+
+def _window_keys(now: datetime) -> List[str]:
+    return [_day_key(now - timedelta(days=i)) for i in range(HOT_TAGS_WINDOW_DAYS)]
+
+
+def _expire_at(day: datetime) -> datetime:
+    # a bucket is dropped once its day left the window
+    return datetime(day.year, day.month, day.day) + timedelta(days=HOT_TAGS_WINDOW_DAYS + 1)
+
+
+async def apply_tag_delta(created_at: datetime, added: Iterable[str] = (), removed: Iterable[str] = ()) -> None:
+    """
+    Count tags added to / removed from a blog in the bucket of the day the blog was created.
+    """
+    added, removed = list(added), list(removed)
+    now = datetime.utcnow()
+    if not (added or removed) or created_at < now - timedelta(days=HOT_TAGS_WINDOW_DAYS + 1):
+        return
+
+    key = _day_key(created_at)
+    try:
+        pipe = redis_client.pipeline(transaction=True)
+        for tag in added:
+            pipe.zincrby(key, 1, tag)
+        for tag in removed:
+            pipe.zincrby(key, -1, tag)
+        pipe.zremrangebyscore(key, "-inf", 0)
+        pipe.expireat(key, _expire_at(created_at))
+        pipe.delete(WINDOW_KEY)
+        await pipe.execute()
+    except Exception as e:
+        logger.error(f"Failed to update tag counters: {e}")
+
+
+async def get_hot_tags(limit: int) -> List[Tuple[str, int]]:
+    """
+    Return the top (tag, blog_count) pairs of the sliding window.
+    """
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.exists(WINDOW_KEY)
+    pipe.zrevrange(WINDOW_KEY, 0, limit - 1, withscores=True)
+    cached, entries = await pipe.execute()
+
+    if not cached:
+        pipe = redis_client.pipeline(transaction=True)
+        pipe.zunionstore(WINDOW_KEY, _window_keys(datetime.utcnow()))
+        pipe.expire(WINDOW_KEY, HOT_TAGS_READ_CACHE_SECONDS)
+        pipe.zrevrange(WINDOW_KEY, 0, limit - 1, withscores=True)
+        _, _, entries = await pipe.execute()
+
+    return [(tag, int(count)) for tag, count in entries if count >= 1]
+
+
+async def rebuild_tag_buckets(db: AsyncIOMotorDatabase) -> int:
+    """
+    Recompute the day buckets of the window from MongoDB, return the number of (day, tag) counters.
+    """
+    now = datetime.utcnow()
+    cutoff = datetime(now.year, now.month, now.day) - timedelta(days=HOT_TAGS_WINDOW_DAYS - 1)
+    pipeline = [
+        {"$match": {"created_at": {"$gte": cutoff}}},
+        {"$unwind": "$tags"},
+        {
+            "$group": {
+                "_id": {
+                    "day": {"$dateToString": {"format": "%Y%m%d", "date": "$created_at"}},
+                    "tag": "$tags",
+                },
+                "blog_count": {"$sum": 1},
+            }
+        },
+    ]
+    buckets = {}
+    async for doc in db.blogs.aggregate(pipeline):
+        buckets.setdefault(doc["_id"]["day"], {})[doc["_id"]["tag"]] = doc["blog_count"]
+
+    pipe = redis_client.pipeline(transaction=True)
+    for key in _window_keys(now):
+        pipe.delete(key)
+    for day, counts in buckets.items():
+        key = DAY_KEY.format(day)
+        pipe.zadd(key, counts)
+        pipe.expireat(key, _expire_at(datetime.strptime(day, "%Y%m%d")))
+    pipe.delete(WINDOW_KEY)
+    pipe.set(READY_KEY, now.isoformat())
+    await pipe.execute()
+
+    total = sum(len(counts) for counts in buckets.values())
+    logger.info("Tag buckets rebuilt, %s (day, tag) counters", total)
+    return total
+
+
+async def ensure_tag_buckets(db: AsyncIOMotorDatabase) -> None:
+    """
+    Backfill the buckets on cold start (e.g. fresh Redis).
+    """
+    if not await redis_client.exists(READY_KEY):
+        await rebuild_tag_buckets(db)
@@ -0,0 +1,171 @@
+# src/api/blogs/trending.py
+import uuid
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from src.core.config import TRENDING_GRAVITY, TRENDING_WINDOW_DAYS, TRENDING_FULL_REFRESH_MINUTES
+from src.core.redis import redis_client
+from src.logger import get_logger
+
+# blog_id -> trend_score
+SCORES_KEY = "trending:scores"
+# blogs whose views/likes changed since they were last scored
+DIRTY_KEY = "trending:dirty"
+# all scores are computed at this reference time, so the ranking stays consistent
+# between full refreshes even though only dirty blogs are rescored; it is the time of the last
+# full refresh, and marks the ranking as built (SCORES_KEY is missing when no blog is ranked)
+REF_TIME_KEY = "trending:ref_time"
+BATCH_SIZE = 1000
+# a rebuild left behind by a crashed run expires
+REBUILD_TTL_SECONDS = 3600
+
+logger = get_logger()
+
+
+def trend_score(view_count: int, like_count: int, created_at: datetime, ref_time: datetime) -> float:
+    """
+    score = (views + 5 * likes) / (hours_age + 2) ^ gravity
+    """
+    hours_age = max((ref_time - created_at).total_seconds() / 3600, 0)
+    interaction_score = (view_count or 0) + (like_count or 0) * 5
+    return interaction_score / (hours_age + 2) ** TRENDING_GRAVITY
+
+
+def _is_candidate(doc: dict, ref_time: datetime) -> bool:
+    created_at = doc.get("created_at")
+    if not created_at or created_at < ref_time - timedelta(days=TRENDING_WINDOW_DAYS):
+        return False
+    return doc.get("view_count", 0) > 0
+
+
+async def mark_dirty(blog_ids: Iterable[str]) -> None:
+    """
+    Queue blogs for rescoring on the next incremental refresh.
+    """
+    blog_ids = list(blog_ids)
+    if not blog_ids:
+        return
+    try:
+        await redis_client.sadd(DIRTY_KEY, *blog_ids)
+    except Exception as e:
+        logger.error(f"Failed to mark trending blogs dirty: {e}")
+
+
+async def remove_blog(blog_id: str) -> None:
+    try:
+        await redis_client.zrem(SCORES_KEY, blog_id)
+    except Exception as e:
+        logger.error(f"Failed to remove blog from trending: {e}")
+
+
+async def _full_refresh(db: AsyncIOMotorDatabase) -> int:
+    ref_time = datetime.utcnow()
+    # changes made while scanning stay dirty and are picked up by the next incremental run
+    await redis_client.delete(DIRTY_KEY)
+
+    # per run, two rebuilds never write into the same key
+    tmp_key = f"{SCORES_KEY}:rebuild:{uuid.uuid4().hex}"
+    cursor = db.blogs.find(
+        {
+            "created_at": {"$gte": ref_time - timedelta(days=TRENDING_WINDOW_DAYS)},
+            "view_count": {"$gt": 0},
+        },
+        {"view_count": 1, "like_count": 1, "created_at": 1},
+    )
+    total = 0
+    batch = {}
+    async for doc in cursor:
+        batch[str(doc["_id"])] = trend_score(doc.get("view_count", 0), doc.get("like_count", 0), doc["created_at"], ref_time)
+        if len(batch) >= BATCH_SIZE:
+            await _add_rebuild_batch(tmp_key, batch)
+            total += len(batch)
+            batch = {}
+    if batch:
+        await _add_rebuild_batch(tmp_key, batch)
+        total += len(batch)
+
+    pipe = redis_client.pipeline(transaction=True)
+    if total:
+        pipe.rename(tmp_key, SCORES_KEY)
+    else:
+        pipe.delete(SCORES_KEY)
+    pipe.set(REF_TIME_KEY, ref_time.isoformat())
+    await pipe.execute()
+    return total
+
+
+async def _add_rebuild_batch(tmp_key: str, batch: dict) -> None:
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.zadd(tmp_key, batch)
+    pipe.expire(tmp_key, REBUILD_TTL_SECONDS)
+    await pipe.execute()
+
+
+async def _incremental_refresh(db: AsyncIOMotorDatabase, ref_time: datetime) -> int:
+    total = 0
+    while True:
+        blog_ids = await redis_client.spop(DIRTY_KEY, BATCH_SIZE)
+        if not blog_ids:
+            break
+        oid_list = [ObjectId(bid) for bid in blog_ids if ObjectId.is_valid(bid)]
+        cursor = db.blogs.find(
+            {"_id": {"$in": oid_list}},
+            {"view_count": 1, "like_count": 1, "created_at": 1},
+        )
+        scores = {}
+        async for doc in cursor:
+            if _is_candidate(doc, ref_time):
+                scores[str(doc["_id"])] = trend_score(doc.get("view_count", 0), doc.get("like_count", 0), doc["created_at"], ref_time)
+
+        pipe = redis_client.pipeline(transaction=False)
+        if scores:
+            pipe.zadd(SCORES_KEY, scores)
+        # deleted blogs, blogs outside the window
+        gone = [bid for bid in blog_ids if bid not in scores]
+        if gone:
+            pipe.zrem(SCORES_KEY, *gone)
+        await pipe.execute()
+        total += len(blog_ids)
+    return total
+
+
+async def refresh_trending(db: AsyncIOMotorDatabase, full: bool = False) -> int:
+    """
+    Recompute trend scores into the sorted set.
+    Incremental runs only rescore dirty blogs at the stored reference time;
+    a full run rescans the window, applies the time decay and moves the reference time to now.
+    A full run is made when asked, when none was made yet (REF_TIME_KEY missing, e.g. fresh Redis),
+    or when the last one is TRENDING_FULL_REFRESH_MINUTES old: both
+    run from the one refresh_trending job, so they never overlap (the incremental scores would
+    be written at the old reference time into a ranking being replaced).
+    Return the number of blogs scored.
+    """
+    ref = await redis_client.get(REF_TIME_KEY)
+    ref_time = datetime.fromisoformat(ref) if ref is not None else None
+    if (
+        full
+        or ref_time is None
+        or datetime.utcnow() - ref_time >= timedelta(minutes=TRENDING_FULL_REFRESH_MINUTES)
+    ):
+        count = await _full_refresh(db)
+        logger.info("Trending feed fully refreshed, %s blogs ranked", count)
+        return count
+    return await _incremental_refresh(db, ref_time)
+
+
+async def get_trending_page(page: int, size: int) -> Optional[Tuple[List[str], int]]:
+    """
+    Return (blog_ids, total) for one page of the ranking, or None if the ranking was never built.
+    """
+    start = (page - 1) * size
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.zrevrange(SCORES_KEY, start, start + size - 1)
+    pipe.zcard(SCORES_KEY)
+    pipe.exists(REF_TIME_KEY)
+    blog_ids, total, built = await pipe.execute()
+    if not built:
+        return None
+    return blog_ids, total
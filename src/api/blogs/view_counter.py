@@ -0,0 +1,124 @@
+# src/api/blogs/view_counter.py
+import asyncio
+import uuid
+from typing import Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+from src.api.blogs import cache as blog_cache
+from src.api.blogs import trending
+from src.api.blogs.leaderboard import LEADERBOARD_KEY
+from src.core.config import VIEW_FLUSH_MAX_PENDING
+from src.core.redis import redis_client
+from src.logger import get_logger
+
+# Hash of blog_id -> views not yet written to MongoDB
+PENDING_KEY = "blog_views:pending"
+# Snapshot of PENDING_KEY currently being written to MongoDB
+FLUSHING_KEY = "blog_views:flushing"
+# id of the snapshot in FLUSHING_KEY, also stored on each blog it was applied to (last_view_flush)
+FLUSH_ID_KEY = "blog_views:flushing_id"
+FLUSH_LOCK_KEY = "blog_views:flush_lock"
+FLUSH_LOCK_SECONDS = 60
+
+logger = get_logger()
+_flush_task: Optional[asyncio.Task] = None
+_flush_lock = asyncio.Lock()
+
+
+async def record_view(db: AsyncIOMotorDatabase, blog_id: str) -> int:
+    """
+    Buffer one view of the blog in Redis and count it on the view leaderboard (if the leaderboard
+    is missing this starts a partial one, which is not read until ensure_leaderboard rebuilds it).
+    Return the number of views of this blog that are not in MongoDB yet,
+    so the caller can merge them into the view_count it read.
+    """
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.hincrby(PENDING_KEY, blog_id, 1)
+    pipe.hget(FLUSHING_KEY, blog_id)
+    pipe.hlen(PENDING_KEY)
+    pipe.zincrby(LEADERBOARD_KEY, 1, blog_id)
+    pending, flushing, pending_blogs, _ = await pipe.execute()
+
+    # flush early when too many blogs are waiting, don't wait for the scheduler
+    if pending_blogs >= VIEW_FLUSH_MAX_PENDING:
+        _schedule_flush(db)
+    return int(pending) + int(flushing or 0)
+
+
+def _schedule_flush(db: AsyncIOMotorDatabase) -> None:
+    global _flush_task
+    if _flush_task is None or _flush_task.done():
+        _flush_task = asyncio.create_task(flush_views(db))
+
+
+async def flush_views(db: AsyncIOMotorDatabase) -> int:
+    """
+    Write the buffered views to MongoDB as one bulk_write of $inc operations.
+    Return the number of blogs updated.
+    Idempotent: each update also sets last_view_flush to the id of the snapshot and skips blogs
+    already carrying it, so a snapshot written again (after a partial bulk_write, a failed DEL, or a
+    lock that expired under a slow write) does not count its views twice.
+    """
+    async with _flush_lock:
+        token = uuid.uuid4().hex
+        # only one worker may flush at a time, otherwise a snapshot could be applied twice
+        if not await redis_client.set(FLUSH_LOCK_KEY, token, nx=True, ex=FLUSH_LOCK_SECONDS):
+            return 0
+        try:
+            # a snapshot left by a failed flush is written first, with the id it already had
+            if not await redis_client.exists(FLUSHING_KEY):
+                if not await redis_client.exists(PENDING_KEY):
+                    return 0
+                pipe = redis_client.pipeline(transaction=True)
+                pipe.rename(PENDING_KEY, FLUSHING_KEY)
+                pipe.set(FLUSH_ID_KEY, uuid.uuid4().hex)
+                await pipe.execute()
+            # a snapshot left by a version without ids gets one, it was never applied with it
+            await redis_client.set(FLUSH_ID_KEY, uuid.uuid4().hex, nx=True)
+            snapshot_id = await redis_client.get(FLUSH_ID_KEY)
+
+            pending = await redis_client.hgetall(FLUSHING_KEY)
+            ops = []
+            flushed_ids = []
+            for blog_id, count in pending.items():
+                if not ObjectId.is_valid(blog_id) or int(count) <= 0:
+                    continue
+                ops.append(UpdateOne(
+                    {"_id": ObjectId(blog_id), "last_view_flush": {"$ne": snapshot_id}},
+                    {"$inc": {"view_count": int(count)}, "$set": {"last_view_flush": snapshot_id}},
+                ))
+                flushed_ids.append(blog_id)
+
+            if ops:
+                renewal = asyncio.create_task(_keep_lock(token))
+                try:
+                    await db.blogs.bulk_write(ops, ordered=False)
+                finally:
+                    renewal.cancel()
+            await redis_client.delete(FLUSHING_KEY, FLUSH_ID_KEY)
+            # cached details hold the old base count, the buffered part is gone now
+            await blog_cache.invalidate_blog_details(flushed_ids)
+            await trending.mark_dirty(flushed_ids)
+            logger.debug("Flushed buffered views of %s blogs", len(ops))
+            return len(ops)
+        except Exception as e:
+            logger.error(f"Failed to flush buffered views: {e}")
+            return 0
+        finally:
+            if await redis_client.get(FLUSH_LOCK_KEY) == token:
+                await redis_client.delete(FLUSH_LOCK_KEY)
+
+
+async def _keep_lock(token: str) -> None:
+    # a bulk_write slower than FLUSH_LOCK_SECONDS keeps the lock, no other worker takes the snapshot
+    while True:
+        await asyncio.sleep(FLUSH_LOCK_SECONDS / 3)
+        try:
+            if await redis_client.get(FLUSH_LOCK_KEY) != token:
+                return
+            await redis_client.expire(FLUSH_LOCK_KEY, FLUSH_LOCK_SECONDS)
+        except Exception as e:
+            logger.error(f"Failed to renew the view flush lock: {e}")
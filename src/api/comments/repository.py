@@ -1,7 +1,14 @@
-from typing import Optional, List
+from typing import Optional, List, Tuple, Dict
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
 
+from src.api.blogs import cache as blog_cache
+from src.db.transactions import run_in_transaction
+from src.utils.pagination import TotalMode, find_page
+
+# oldest first, _id breaks ties between comments created in the same millisecond
+COMMENTS_SORT = [("created_at", 1), ("_id", 1)]
+
 
 def _serialize(doc: dict) -> dict:
     """
@@ -18,21 +25,63 @@ def _serialize(doc: dict) -> dict:
         "reply_to_username": doc.get("reply_to_username"),
         "content": doc["content"],
         "created_at": doc["created_at"],
+        # maintained on root comments only, None on replies and on roots not backfilled yet
+        "reply_count": doc.get("reply_count"),
     }
 
-async def add_comment(db: AsyncIOMotorDatabase, comment_doc: dict, blog_id: str) -> dict:
-    res = await db.comments.insert_one(comment_doc)
-    if comment_doc.get("is_root") and not comment_doc.get("root_id"):
-        await db.comments.update_one(
-            {"_id": res.inserted_id},
-            {"$set": {"root_id": str(res.inserted_id)}},
+def _inc_existing(inc: dict, inc_if_present: dict) -> List[dict]:
+    """
+    Pipeline update doing the $inc of inc, and of the counters in inc_if_present only where they
+    exist: a plain $inc would create a counter never backfilled (e.g. root_comment_count: 1 on a blog
+    with 40 comments), and the readers would trust it instead of counting.
+    """
+    fields = {f: {"$add": [{"$ifNull": [f"${f}", 0]}, delta]} for f, delta in inc.items()}
+    for f, delta in inc_if_present.items():
+        # missing (or null) stays missing
+        fields[f] = {"$cond": [{"$eq": [{"$ifNull": [f"${f}", None]}, None]}, "$$REMOVE", {"$add": [f"${f}", delta]}]}
+    return [{"$set": fields}]
+
+
+async def add_comment(db: AsyncIOMotorDatabase, comment_doc: dict, blog_id: str) -> Optional[dict]:
+    """
+    Insert the comment and bump the counters: comment_count (and root_comment_count for a root)
+    on the blog, reply_count on the root of a reply. Each counter moves with one atomic update,
+    all in one transaction when available. root_comment_count / reply_count are only moved where
+    they exist, the readers count the comments of blogs and roots not backfilled yet.
+    The _id is generated here, so a root gets its root_id in the insert and the comment is
+    returned without being read back. Return None (nothing written) if the blog does not exist.
+    """
+    is_root = bool(comment_doc.get("is_root"))
+    comment_doc["_id"] = ObjectId()
+    if is_root:
+        comment_doc["reply_count"] = 0
+        if not comment_doc.get("root_id"):
+            comment_doc["root_id"] = str(comment_doc["_id"])
+
+    async def _add(session):
+        # the $inc doubles as the existence check of the blog
+        inc = {"comment_count": 1, "version": 1, "comments_version": 1}
+        blog = await db.blogs.find_one_and_update(
+            {"_id": ObjectId(blog_id)},
+            _inc_existing(inc, {"root_comment_count": 1}) if is_root else {"$inc": inc},
+            projection={"_id": 1},
+            session=session,
         )
-    created = await db.comments.find_one({"_id": res.inserted_id})
-    await db.blogs.update_one(
-        {"_id": ObjectId(blog_id)},
-        {"$inc": {"comment_count": 1}}
-    )
-    return _serialize(created)
+        if not blog:
+            return False
+        await db.comments.insert_one(comment_doc, session=session)
+        if not is_root:
+            await db.comments.update_one(
+                {"_id": ObjectId(comment_doc["root_id"]), "reply_count": {"$exists": True}},
+                {"$inc": {"reply_count": 1}},
+                session=session,
+            )
+        return True
+
+    if not await run_in_transaction(db, _add):
+        return None
+    await blog_cache.invalidate_blog_detail(blog_id)
+    return _serialize(comment_doc)
 
 # Get single comment by ID
 async def find_comment_by_id(db, comment_id: str) -> Optional[dict]:
@@ -48,12 +97,22 @@ async def find_comment_by_id(db, comment_id: str) -> Optional[dict]:
     return _serialize(doc)
 
 async def delete_root_thread(db: AsyncIOMotorDatabase, root_id: str, blog_id:str) -> int:
-    res = await db.comments.delete_many({"root_id": root_id})
-    await db.blogs.update_one(
-        {"_id": ObjectId(blog_id)},
-        {"$inc": {"comment_count": -res.deleted_count}}
-    )
-    return res.deleted_count
+    async def _delete(session):
+        res = await db.comments.delete_many({"root_id": root_id}, session=session)
+        if res.deleted_count:
+            await db.blogs.update_one(
+                {"_id": ObjectId(blog_id)},
+                _inc_existing(
+                    {"comment_count": -res.deleted_count, "version": 1, "comments_version": 1},
+                    {"root_comment_count": -1},
+                ),
+                session=session,
+            )
+        return res.deleted_count
+
+    deleted_count = await run_in_transaction(db, _delete)
+    await blog_cache.invalidate_blog_detail(blog_id)
+    return deleted_count
 
 
 async def delete_single_comment(db: AsyncIOMotorDatabase, comment_id: str, blog_id: str) -> bool:
@@ -66,12 +125,29 @@ async def delete_single_comment(db: AsyncIOMotorDatabase, comment_id: str, blog_
     except Exception:
         return False
 
-    res = await db.comments.delete_one({"_id": oid})
-    await db.blogs.update_one(
-        {"_id": ObjectId(blog_id)},
-        {"$inc": {"comment_count": -1}}
-    )
-    return res.deleted_count == 1
+    async def _delete(session):
+        deleted = await db.comments.find_one_and_delete(
+            {"_id": oid}, projection={"root_id": 1, "is_root": 1}, session=session
+        )
+        if not deleted:
+            return False
+        if not deleted.get("is_root") and ObjectId.is_valid(deleted.get("root_id")):
+            await db.comments.update_one(
+                {"_id": ObjectId(deleted["root_id"]), "reply_count": {"$exists": True}},
+                {"$inc": {"reply_count": -1}},
+                session=session,
+            )
+        await db.blogs.update_one(
+            {"_id": ObjectId(blog_id)},
+            {"$inc": {"comment_count": -1, "version": 1, "comments_version": 1}},
+            session=session,
+        )
+        return True
+
+    if not await run_in_transaction(db, _delete):
+        return False
+    await blog_cache.invalidate_blog_detail(blog_id)
+    return True
 
 
 async def list_root_comments_by_blog(
@@ -79,26 +155,22 @@ async def list_root_comments_by_blog(
     blog_id: str,
     skip: int = 0,
     limit: int = 10,
-) -> List[dict]:
+    cursor: Optional[str] = None,
+    mode: TotalMode = TotalMode.EXACT,
+) -> Tuple[List[dict], Optional[int], Optional[str]]:
     """
     List root comments (excluding replies) of a blog with pagination.
     Used for paginating the root comment list:
     - Filter: blog_id = blog_id, is_root = True
     - Sort: by created_at in ascending order (earliest first), or change to descending if needed
-    - Pagination: skip / limit
-    """
-    cursor = (
-        db.comments
-        .find({"blog_id": blog_id, "is_root": True})
-        .sort("created_at", 1)
-        .skip(skip)
-        .limit(limit)
+    - Pagination: skip / limit, or keyset after cursor when it is given
+    Return (comments, total, next_cursor), see find_page.
+    """
+    docs, total, next_cursor = await find_page(
+        db.comments, {"blog_id": blog_id, "is_root": True}, COMMENTS_SORT, limit,
+        skip=skip, cursor=cursor, mode=mode,
     )
-
-    items: List[dict] = []
-    async for doc in cursor:
-        items.append(_serialize(doc))
-    return items
+    return [_serialize(doc) for doc in docs], total, next_cursor
 
 
 async def count_root_comments_by_blog(db: AsyncIOMotorDatabase, blog_id: str) -> int:
@@ -114,25 +186,61 @@ async def list_replies_by_root(
     root_id: str,
     skip: int = 0,
     limit: int = 10,
-) -> List[dict]:
+    cursor: Optional[str] = None,
+    mode: TotalMode = TotalMode.EXACT,
+) -> Tuple[List[dict], Optional[int], Optional[str]]:
     """
     Paginate all non-root comments (flat replies) under a given root comment.
     root_id = given root_id
     is_root = False
     Sort by created_at in ascending order to preserve the conversation timeline.
+    Return (replies, total, next_cursor), see find_page.
     """
-    cursor = (
-        db.comments
-        .find({"root_id": root_id, "is_root": False})
-        .sort("created_at", 1)
-        .skip(skip)
-        .limit(limit)
+    docs, total, next_cursor = await find_page(
+        db.comments, {"root_id": root_id, "is_root": False}, COMMENTS_SORT, limit,
+        skip=skip, cursor=cursor, mode=mode,
     )
+    return [_serialize(doc) for doc in docs], total, next_cursor
+
+
+async def list_replies_by_roots(
+    db: AsyncIOMotorDatabase,
+    root_ids: List[str],
+    skip: int = 0,
+    limit: int = 10,
+) -> Dict[str, List[dict]]:
+    """
+    One page of replies of every given root comment, in a single aggregation
+    (instead of list_replies_by_root per root). The totals are the reply_count of the roots.
+    Each root looks up its page with $sort / $skip / $limit on the (root_id, is_root, created_at, _id)
+    index, so only skip + limit replies are read per root, however many it has.
+    Return {root_id: replies}.
+    """
+    if not root_ids:
+        return {}
+    pipeline = [
+        {"$match": {"_id": {"$in": [ObjectId(rid) for rid in root_ids if ObjectId.is_valid(rid)]}}},
+        {"$project": {"root_id": 1}},
+        {
+            "$lookup": {
+                "from": "comments",
+                "localField": "root_id",
+                "foreignField": "root_id",
+                "pipeline": [
+                    {"$match": {"is_root": False}},
+                    {"$sort": dict(COMMENTS_SORT)},
+                    {"$skip": skip},
+                    {"$limit": limit},
+                ],
+                "as": "replies",
+            }
+        },
+    ]
 
-    items: List[dict] = []
-    async for doc in cursor:
-        items.append(_serialize(doc))
-    return items
+    pages: Dict[str, List[dict]] = {rid: [] for rid in root_ids}
+    async for doc in db.comments.aggregate(pipeline):
+        pages[doc["root_id"]] = [_serialize(reply) for reply in doc["replies"]]
+    return pages
 
 
 async def count_replies_by_root(db: AsyncIOMotorDatabase, root_id: str) -> int:
@@ -143,6 +251,22 @@ async def count_replies_by_root(db: AsyncIOMotorDatabase, root_id: str) -> int:
     return await db.comments.count_documents({"root_id": root_id, "is_root": False})
 
 
+async def count_replies_by_roots(db: AsyncIOMotorDatabase, root_ids: List[str]) -> Dict[str, int]:
+    """
+    Count the replies of every given root comment in one aggregation, for the roots whose
+    reply_count is not backfilled yet. Return {root_id: count}.
+    """
+    if not root_ids:
+        return {}
+    counts = {rid: 0 for rid in root_ids}
+    async for doc in db.comments.aggregate([
+        {"$match": {"root_id": {"$in": root_ids}, "is_root": False}},
+        {"$group": {"_id": "$root_id", "replies": {"$sum": 1}}},
+    ]):
+        counts[doc["_id"]] = doc["replies"]
+    return counts
+
+
 
 
 
@@ -10,6 +10,9 @@ router = APIRouter(
 from fastapi import APIRouter, Depends, status, Path, Query
 from src.api.comments import service as comment_service
 from src.auth import auth
+from src.utils.conditional import Conditional, conditional
+from src.utils.pagination import total_mode
+from src.utils.responses import ModelResponse
 
 @router.post(
     "",
@@ -86,8 +89,12 @@ async def list_blog_comments_endpoint(
     size: int = Query(10, ge=1, le=50),
     replies_page: int = Query(1, ge=1),
     replies_size: int = Query(5, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page, replaces page"),
+    include_total: bool = Query(True, description="Count the total, false skips the count"),
+    approx_total: bool = Query(False, description="Serve the total from a short-lived cache"),
+    cond: Conditional = Depends(conditional()),
 ):
-    logger.info(
+    logger.debug(
         "List comments for blog, blog_id=%s (page=%s,size=%s,replies_page=%s,replies_size=%s)",
         blog_id, page, size, replies_page, replies_size,
     )
@@ -98,8 +105,11 @@ async def list_blog_comments_endpoint(
         size=size,
         replies_page=replies_page,
         replies_size=replies_size,
+        cursor=cursor,
+        mode=total_mode(include_total, approx_total),
+        cond=cond,
     )
-    return comments
+    return ModelResponse(COMMENT_LIST_ADAPTER, comments, headers=cond.headers)
 
 # get replies list of specific root comment
 @router.get(
@@ -117,14 +127,20 @@ async def list_replies_for_root_endpoint(
     root_id: str = Path(..., min_length=24, max_length=24, description="Root comment ID"),
     page: int = Query(1, ge=1, description="Replies page number (1-based)"),
     size: int = Query(5, ge=1, le=50, description="Replies per page"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page, replaces page"),
+    include_total: bool = Query(True, description="Count the total, false skips the count"),
+    approx_total: bool = Query(False, description="Serve the total from a short-lived cache"),
 ):
-    logger.info(
+    logger.debug(
         "List replies for root comment, root_id=%s (page=%s,size=%s)",
         root_id,
         page,
         size,
     )
-    return await comment_service.get_replies_for_root(root_id=root_id, page=page, size=size)
+    replies = await comment_service.get_replies_for_root(
+        root_id=root_id, page=page, size=size, cursor=cursor, mode=total_mode(include_total, approx_total)
+    )
+    return ModelResponse(REPLY_LIST_ADAPTER, replies)
 
 
 
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 from datetime import datetime
 from typing import Optional, List
 
@@ -44,13 +44,20 @@ class CommentListResponse(BaseModel):
     items: List[RootCommentResponse] = Field(...,description="List of root comments for the current page",)
     page: int = Field(..., description="Current root comment page number (1-based)")
     size: int = Field(..., description="Number of root comments per page")
-    total: int = Field(..., description="Total number of root comments for this blog")
+    total: Optional[int] = Field(..., description="Total number of root comments for this blog, null when not counted")
     has_next: bool = Field(..., description="Whether there are more root comment pages")
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor to get the next page, null on the last page")
 
 # replies list of specific comment
 class ReplyListResponse(BaseModel):
     items: List[CommentResponse] = Field(...,description="Current page of replies under the given root comment",)
     page: int = Field(..., description="Current replies page number (1-based)")
     size: int = Field(..., description="Number of replies per page")
-    total: int = Field(..., description="Total number of replies under this root comment")
-    has_next: bool = Field(..., description="Whether there are more reply pages")
\ No newline at end of file
+    total: Optional[int] = Field(..., description="Total number of replies under this root comment, null when not counted")
+    has_next: bool = Field(..., description="Whether there are more reply pages")
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor to get the next page, null on the last page")
+
+
+# precompiled serializers of the list responses, see src.utils.responses.ModelResponse
+COMMENT_LIST_ADAPTER = TypeAdapter(CommentListResponse)
+REPLY_LIST_ADAPTER = TypeAdapter(ReplyListResponse)
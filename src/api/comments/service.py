@@ -7,8 +7,10 @@ from fastapi import HTTPException, status
 from src.api.blogs import repository as blog_repository
 from src.api.users import repository as user_repository
 from src.api.users import service as user_service
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 
+from src.utils.conditional import Conditional, make_etag, get_generation
+from src.utils.pagination import TotalMode
 from src.logger import get_logger
 
 logger = get_logger()
@@ -25,15 +27,10 @@ async def create_comment(author_id: str, comment_in: CommentCreate) -> CommentRe
     Set is_root / root_id / reply_to_comment_id / reply_to_username
     Look up the author's username and fill author_username
     Return CommentResponse (to satisfy the router's response_model)
-    """
 
-    # make sure blog exists
-    blog = await blog_repository.find_blog_by_id(db, comment_in.blog_id)
-    if not blog:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail="Blog not found",
-        )
+    The blog is checked by the write itself (404 if it does not exist), and the user lookups
+    are sent concurrently with the queries they do not depend on.
+    """
 
     # Determine whether it is a root comment or a reply based on parent_id.
     if comment_in.parent_id is None:
@@ -42,6 +39,7 @@ async def create_comment(author_id: str, comment_in: CommentCreate) -> CommentRe
         root_id = None
         reply_to_comment_id = None
         reply_to_username = None
+        user = None
     else:
         # Reply to a comment, ensuring the parent comment exists first.
         parent = await comment_repository.find_comment_by_id(db, comment_in.parent_id)
@@ -55,8 +53,11 @@ async def create_comment(author_id: str, comment_in: CommentCreate) -> CommentRe
         root_id = parent["root_id"]
         reply_to_comment_id = comment_in.parent_id
 
-        #parent_user = await user_repository.find_by_id(db, parent["author_id"])
-        parent_user = await user_service.get_user_public(parent["author_id"])
+        # the parent's author name is stored on the reply, so it is needed before the insert
+        parent_user, user = await asyncio.gather(
+            user_service.get_user_public(parent["author_id"]),
+            user_service.get_user_public(author_id),
+        )
         if not parent_user:
             reply_to_username = "Unknown"
         else:
@@ -74,18 +75,21 @@ async def create_comment(author_id: str, comment_in: CommentCreate) -> CommentRe
         "reply_to_username": reply_to_username,
     }
 
-    created = await asyncio.wait_for(
+    add = asyncio.wait_for(
         comment_repository.add_comment(db, comment_doc, comment_in.blog_id),
         timeout=5,
     )
+    if user is None:
+        # fetch the author's username along with the insert
+        created, user = await asyncio.gather(add, user_service.get_user_public(author_id))
+    else:
+        created = await add
+    if created is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Blog not found",
+        )
 
-    # Root comment: if root_id is None, set it to its own id.
-    if created["is_root"] and created["root_id"] is None:
-        created["root_id"] = created["id"]
-
-    # fetch the author's username and populate author_username.
-    #user = await user_repository.find_by_id(db, author_id)
-    user = await user_service.get_user_public(author_id)
     author_username = user["username"] if user else "Unknown"
     author_avatar = user["avatar_url"] if user else "Unknown"
     return CommentResponse(
@@ -106,8 +110,13 @@ async def remove_comment(comment_id: str, blog_id: str, author_id: str) -> None:
     - A comment author can delete only their own comment
     """
 
+    # the comment and the blog author are fetched together
+    existing, blog = await asyncio.gather(
+        comment_repository.find_comment_by_id(db, comment_id),
+        blog_repository.find_blog_by_id(db, blog_id, projection={"author_id": 1}),
+    )
+
     # make sure comment/reply exists
-    existing = await comment_repository.find_comment_by_id(db, comment_id)
     if not existing:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -122,7 +131,6 @@ async def remove_comment(comment_id: str, blog_id: str, author_id: str) -> None:
         )
 
     # make sure blog exists
-    blog = await blog_repository.find_blog_by_id(db, blog_id)
     if not blog:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -162,31 +170,53 @@ async def get_comments_for_blog(
     size: int,
     replies_page: int = 1,
     replies_size: int = 10,
+    cursor: Optional[str] = None,
+    mode: TotalMode = TotalMode.EXACT,
+    cond: Optional[Conditional] = None,
 ) -> CommentListResponse:
     """
     Get paginated root comments for a blog, with one page of replies attached to each root comment.
+    cursor (next_cursor of the previous page) replaces page for deep pages.
+    With cond, an unchanged page (same comments_version of the blog, no profile edit since)
+    is answered with a 304 before any comment or user is read.
     """
     # ensure blog exists
-    blog = await blog_repository.find_blog_by_id(db, blog_id)
+    blog = await blog_repository.find_blog_by_id(
+        db, blog_id, projection={"root_comment_count": 1, "comments_version": 1}
+    )
     if not blog:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="Blog not found",
         )
+    if cond:
+        generation = await get_generation(user_service.PROFILE_GENERATION_KEY)
+        etag = make_etag(
+            "comments", blog_id, blog.get("comments_version", 0), generation,
+            page, size, replies_page, replies_size, cursor, mode,
+        )
+        if generation is not None and cond.validate(etag):
+            raise cond.not_modified()
 
-
+    # the blog carries the number of root comments, count only blogs not backfilled yet
+    root_count = blog.get("root_comment_count")
     skip = (page - 1) * size
-    root_comments = await comment_repository.list_root_comments_by_blog(
-        db, blog_id, skip=skip, limit=size
-    )
-    total = await comment_repository.count_root_comments_by_blog(db, blog_id)
+    try:
+        root_comments, total, next_cursor = await comment_repository.list_root_comments_by_blog(
+            db, blog_id, skip=skip, limit=size, cursor=cursor,
+            mode=TotalMode.NONE if root_count is not None else mode,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if root_count is not None and mode != TotalMode.NONE:
+        total = max(root_count, 0)
 
     if not root_comments:
         return CommentListResponse(
             items=[],
             page=page,
             size=size,
-            total=0,
+            total=total,
             has_next=False,
         )
 
@@ -194,22 +224,23 @@ async def get_comments_for_blog(
     author_ids = {c["author_id"] for c in root_comments}
     root_ids = [c["id"] for c in root_comments]
 
-    # The first page of replies and the total reply count for each root comment.
-    all_replies_per_root: Dict[str, List[dict]] = {}
-    all_reply_totals: Dict[str, int] = {}
-
-    for rid in root_ids:
-        rskip = (replies_page - 1) * replies_size
-        replies = await comment_repository.list_replies_by_root(
-            db, rid, skip=rskip, limit=replies_size
-        )
-        rtotal = await comment_repository.count_replies_by_root(db, rid)
+    # The requested page of replies for each root comment, in one query.
+    # The totals are the reply_count kept on the roots; the roots not backfilled yet
+    # are counted together, alongside the replies.
+    rskip = (replies_page - 1) * replies_size
+    all_replies_per_root, all_reply_totals = await asyncio.gather(
+        comment_repository.list_replies_by_roots(db, root_ids, skip=rskip, limit=replies_size),
+        comment_repository.count_replies_by_roots(
+            db, [root["id"] for root in root_comments if root.get("reply_count") is None]
+        ),
+    )
 
-        all_replies_per_root[rid] = replies
-        all_reply_totals[rid] = rtotal
+    for root in root_comments:
+        rtotal = all_reply_totals.get(root["id"], root.get("reply_count"))
+        all_reply_totals[root["id"]] = max(rtotal, 0)
 
         # collect author_id of replies
-        for rp in replies:
+        for rp in all_replies_per_root[root["id"]]:
             author_ids.add(rp["author_id"])
     # logger.info("list author_ids=%s", author_ids)
     users_list = await user_repository.find_by_id_list(db, list(author_ids))
@@ -268,11 +299,18 @@ async def get_comments_for_blog(
         page=page,
         size=size,
         total=total,
-        has_next=(page * size < total),
+        has_next=next_cursor is not None,
+        next_cursor=next_cursor,
     )
 
 # get replies list of oen specific root comment
-async def get_replies_for_root(root_id: str, page: int, size: int) -> ReplyListResponse:
+async def get_replies_for_root(
+    root_id: str,
+    page: int,
+    size: int,
+    cursor: Optional[str] = None,
+    mode: TotalMode = TotalMode.EXACT,
+) -> ReplyListResponse:
 
     root = await comment_repository.find_comment_by_id(db, root_id)
     if not root:
@@ -291,17 +329,23 @@ async def get_replies_for_root(root_id: str, page: int, size: int) -> ReplyListR
     size = max(min(size, 50), 1)
     skip = (page - 1) * size
 
-    replies = await comment_repository.list_replies_by_root(
-        db, root_id, skip=skip, limit=size
-    )
-    total = await comment_repository.count_replies_by_root(db, root_id)
+    reply_count = root.get("reply_count")
+    try:
+        replies, total, next_cursor = await comment_repository.list_replies_by_root(
+            db, root_id, skip=skip, limit=size, cursor=cursor,
+            mode=TotalMode.NONE if reply_count is not None else mode,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+    if reply_count is not None and mode != TotalMode.NONE:
+        total = max(reply_count, 0)
 
     if not replies:
         return ReplyListResponse(
             items=[],
             page=page,
             size=size,
-            total=0,
+            total=total,
             has_next=False,
         )
 
@@ -335,7 +379,8 @@ async def get_replies_for_root(root_id: str, page: int, size: int) -> ReplyListR
         page=page,
         size=size,
         total=total,
-        has_next=(page * size < total),
+        has_next=next_cursor is not None,
+        next_cursor=next_cursor,
     )
 
 
@@ -0,0 +1,53 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+
+from src.api.debug.schemas import QueryShapeSort, QueryTopResponse
+from src.auth import auth
+from src.core.config import DEBUG_USER_IDS
+from src.utils.query_shapes import query_shapes
+
+
+async def require_debug_user(claims: dict = Depends(auth.verify_access_token)) -> dict:
+    # only routed with DEBUG_ENDPOINTS_ENABLED (see src/api/routes.py), and then for DEBUG_USER_IDS only
+    if claims["sub"] not in DEBUG_USER_IDS:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Not allowed")
+    return claims
+
+
+router = APIRouter(
+    prefix="/debug",
+    tags=["debug"],
+    dependencies=[Depends(require_debug_user)],
+)
+
+
+@router.get(
+    "/queries/top",
+    response_model=QueryTopResponse,
+    status_code=status.HTTP_200_OK,
+    summary="Top MongoDB query shapes",
+    description=(
+        "MongoDB commands of this process aggregated by shape (values stripped, keys and operators kept), "
+        "most expensive first: the shapes worth an index. Each worker process has its own aggregate."
+    ),
+)
+async def top_query_shapes(
+    limit: int = Query(20, ge=1, le=200, description="Number of shapes to return"),
+    sort_by: QueryShapeSort = Query(QueryShapeSort.TOTAL, description="Rank by total time, count, average or p99"),
+):
+    return {
+        "since": query_shapes.since,
+        "tracked": len(query_shapes),
+        "dropped": query_shapes.dropped,
+        "shapes": query_shapes.top(limit, sort_by.value),
+    }
+
+
+@router.delete(
+    "/queries",
+    status_code=status.HTTP_204_NO_CONTENT,
+    summary="Reset the query shape aggregate",
+    description="Start a new aggregation, e.g. before a load test run.",
+)
+async def reset_query_shapes():
+    query_shapes.reset()
+    return None
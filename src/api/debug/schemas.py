@@ -0,0 +1,36 @@
+from datetime import datetime
+from enum import Enum
+from typing import List
+
+from pydantic import BaseModel, Field
+
+
+class QueryShapeSort(str, Enum):
+    TOTAL = "total"
+    COUNT = "count"
+    AVG = "avg"
+    P99 = "p99"
+
+
+class QueryShapeReport(BaseModel):
+    shape: str = Field(..., description="Command, collection and filter with the values replaced by ?")
+    command: str
+    collection: str
+    count: int = Field(..., ge=0, description="Commands of this shape")
+    errors: int = Field(..., ge=0, description="Commands of this shape that failed")
+    total_ms: float = Field(..., description="Time spent in commands of this shape")
+    avg_ms: float
+    p50_ms: float = Field(..., description="Median duration, upper bound of its bucket (buckets are 25% apart)")
+    p99_ms: float = Field(..., description="99th percentile duration, upper bound of its bucket")
+    max_ms: float
+    error_count: int = Field(
+        0, ge=0, description="Part of count inherited from an evicted shape (0 unless the registry was full)"
+    )
+    error_ms: float = Field(0, description="Part of total_ms inherited from an evicted shape")
+
+
+class QueryTopResponse(BaseModel):
+    since: datetime = Field(..., description="Start of the aggregation (process start or last reset)")
+    tracked: int = Field(..., ge=0, description="Shapes currently aggregated")
+    dropped: int = Field(..., ge=0, description="Shapes evicted to stay within QUERY_SHAPES_MAX")
+    shapes: List[QueryShapeReport]
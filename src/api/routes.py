@@ -4,6 +4,8 @@ from src.api.users.router import router as user_router
 from src.api.blogs.router import router as blog_router
 from src.api.comments.router import router as comment_router
 from src.api.search.router import router as search_router
+from src.api.debug.router import router as debug_router
+from src.core.config import DEBUG_ENDPOINTS_ENABLED
 
 router = APIRouter()
 
@@ -11,3 +13,5 @@ router.include_router(user_router)
 router.include_router(blog_router)
 router.include_router(comment_router)
 router.include_router(search_router)
+if DEBUG_ENDPOINTS_ENABLED:
+    router.include_router(debug_router)
@@ -3,10 +3,15 @@ import time
 from fastapi import APIRouter, HTTPException
 from src.logger import get_logger
 from src.api.search import service as search_service
-from src.api.search.schemas import SearchUserResult, SearchBlogsResult, BlogSortQuery, BlogSortField, SortDirection
+from src.api.search.schemas import (
+    SearchUserResult, SearchBlogsResult, BlogSortQuery, BlogSortField, SortDirection,
+    SEARCH_BLOGS_ADAPTER, SEARCH_USERS_ADAPTER,
+)
 from typing import List, Optional
 from fastapi import APIRouter, Depends, status, Path, Query
 from src.auth import auth
+from src.utils.pagination import total_mode
+from src.utils.responses import ModelResponse
 logger = get_logger(level="debug")
 router = APIRouter(
     prefix="/search",
@@ -19,9 +24,10 @@ SORT_MAPPING = {
     BlogSortQuery.COMMENTS: BlogSortField.COMMENTS_COUNT,
     BlogSortQuery.VIEWS: BlogSortField.VIEWS_COUNT,
     BlogSortQuery.LIKES: BlogSortField.LIKE_COUNT,
+    BlogSortQuery.RELEVANCE: BlogSortField.RELEVANCE,
 }
 
-@router.get("/discover", summary="Get trending blogs")
+@router.get("/discover", response_model=SearchBlogsResult, summary="Get trending blogs")
 async def get_discover_feed(
         page: int = Query(1, ge=1, description="Page number (1-based)"),
         size: int = Query(5, ge=1, le=50, description="Page size"),
@@ -29,7 +35,8 @@ async def get_discover_feed(
 ):
     user_id = current_user["id"] if current_user else None
     logger.debug("Get discover feed result: %s", user_id)
-    return await search_service.fetch_trending_blogs(user_id=user_id, page=page, size=size)
+    result = await search_service.fetch_trending_blogs(user_id=user_id, page=page, size=size)
+    return ModelResponse(SEARCH_BLOGS_ADAPTER, result)
 
 # @router.get(
 #     "/user",
@@ -65,23 +72,37 @@ async def get_discover_feed(
     "/blogs",
     response_model=SearchBlogsResult,
     status_code=status.HTTP_200_OK,
-    summary="Search blogs by title keyword",
+    summary="Search blogs by keyword",
     description=(
-        "Search blogs whose title contains the given keyword (case-insensitive), "
-        "and return a paginated list of blog previews."
+        "Full-text search of blog titles and contents, ranked by relevance (BM25), "
+        "optionally restricted to blogs having all the given tags. "
+        "Return a paginated list of blog previews."
     ),
 )
 async def search_blogs_endpoint(
-    keyword: Optional[str] = Query(None, description="Keyword to match in blog titles"),
+    keyword: Optional[str] = Query(
+        None, description="Words to search in blog titles and contents, matches are ranked by relevance (BM25)"
+    ),
     tags: Optional[List[str]] = Query(None, description="Filter by list of tags (e.g., ?tags=python&tags=api)"),
     page: int = Query(1, ge=1, description="Page number (1-based)"),
     size: int = Query(10, ge=1, le=50, description="Page size"),
-    sort_by: BlogSortQuery = Query(BlogSortQuery.CREATE_DATE, description="Field to sort by"),
+    sort_by: Optional[BlogSortQuery] = Query(
+        None,
+        description=(
+            "Field to sort by, defaults to relevance with a keyword and to created date otherwise. "
+            "With a keyword, a count sort (views, likes, comments) orders the most relevant matches only "
+            "(SEARCH_MAX_CANDIDATES): the pages end there, total still counts every match"
+        ),
+    ),
     sort_order: SortDirection = Query(SortDirection.DESC, description="Sort order"),
+    cursor: Optional[str] = Query(None, description="next_cursor of the previous page, replaces page"),
+    include_total: bool = Query(True, description="Count the total, false skips the count"),
+    approx_total: bool = Query(False, description="Serve the total from a short-lived cache"),
+    current_user: dict | None = Depends(auth.try_get_current_user),
 ):
     """
-    Search blog titles by keyword:
-    - Title contains the keyword (case-insensitive)
+    Search blogs by keyword:
+    - Title or content contains the words of the keyword (case-insensitive)
     - Return the paginated results
     """
     # logger.info(f"Search blogs by keyword={keyword}")
@@ -98,12 +119,15 @@ async def search_blogs_endpoint(
         tags=tags,
         page=page,
         size=size,
-        sort_by=SORT_MAPPING[sort_by],
+        sort_by=SORT_MAPPING[sort_by] if sort_by else None,
         sort_order=sort_order,
+        user_id=current_user["id"] if current_user else None,
+        cursor=cursor,
+        mode=total_mode(include_total, approx_total),
     )
     logger.debug("Search blogs result: %s", result)
-    logger.debug(f"time cost in search blogs: {time.time() - start_time}")
-    return result
+    logger.debug("time cost in search blogs: %.4f", time.time() - start_time)
+    return ModelResponse(SEARCH_BLOGS_ADAPTER, result)
 
 
 @router.get(
@@ -116,12 +140,16 @@ async def search_users_endpoint(
         q: str = Query(..., min_length=1, description="Search keyword"),
         page: int = Query(1, ge=1, description="Page number (1-based)"),
         size: int = Query(10, ge=1, le=50, description="Items per page"),
+        cursor: Optional[str] = Query(None, description="next_cursor of the previous page, replaces page"),
+        include_total: bool = Query(True, description="Count the total, false skips the count"),
+        # autocomplete: the exact count of a 1-2 letter prefix reads millions of index keys
+        approx_total: bool = Query(True, description="Serve the total from a short-lived cache, false counts exactly"),
 ):
 
-    users, total = await search_service.search_usernames_by_relevance(q, page, size)
+    users, total, next_cursor = await search_service.search_usernames_by_relevance(
+        q, page, size, cursor, mode=total_mode(include_total, approx_total)
+    )
 
-    return {
-        "users": users,
-        "total": total
-    }
+    result = SearchUserResult(users=users, total=total, next_cursor=next_cursor)
+    return ModelResponse(SEARCH_USERS_ADAPTER, result)
 
@@ -1,7 +1,7 @@
 from datetime import datetime
 from typing import List, Optional, Annotated
 
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, TypeAdapter
 from enum import Enum
 
 
@@ -31,16 +31,18 @@ class BlogListPage(BaseModel):
     size: number of items per page
     items: list of blog previews for the current page
     """
-    total: int = Field(..., ge=0, description="Total number of matched blogs")
+    total: Optional[int] = Field(..., ge=0, description="Total number of matched blogs, null when not counted")
     page: int = Field(..., ge=1, description="Current page number (1-based)")
     size: int = Field(..., ge=1, description="Page size")
     items: List[SearchBlogPreview]
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor to get the next page, null on the last page")
 
 # search username
 class SearchUserResult(BaseModel):
     users: Annotated[List[SearchUserPreview], Field(default_factory=list, description="List of found users")]
 
-    total: int = Field(..., ge=0, description="Total number of users found")
+    total: Optional[int] = Field(..., ge=0, description="Total number of users found, null when not counted")
+    next_cursor: Optional[str] = Field(None, description="Pass as cursor to get the next page, null on the last page")
 
 
 #search keyword
@@ -54,6 +56,8 @@ class BlogSortField(str, Enum):
     VIEWS_COUNT = "view_count"
     LIKE_COUNT = "like_count"
     COMMENTS_COUNT = "comment_count"
+    # full-text (BM25) rank of the keyword, only for keyword searches
+    RELEVANCE = "relevance"
 
 class SortDirection(str, Enum):
     ASC = "asc"
@@ -64,4 +68,10 @@ class BlogSortQuery(str, Enum):
     UPDATE_DATE = "updated"
     VIEWS = "views"
     LIKES = "likes"
-    COMMENTS = "comments"
\ No newline at end of file
+    COMMENTS = "comments"
+    RELEVANCE = "relevance"
+
+
+# precompiled serializers of the list responses, see src.utils.responses.ModelResponse
+SEARCH_BLOGS_ADAPTER = TypeAdapter(SearchBlogsResult)
+SEARCH_USERS_ADAPTER = TypeAdapter(SearchUserResult)
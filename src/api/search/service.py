@@ -1,8 +1,15 @@
 from typing import List, Optional, Dict
 
+from fastapi import HTTPException, status
+
 from src.db.mongo import db
 from src.api.users import repository as user_repository
 from src.api.blogs import repository as blog_repository
+from src.api.blogs import trending
+from src.api.blogs import search_index
+from src.core.config import TRENDING_GRAVITY, TRENDING_WINDOW_DAYS, SEARCH_MAX_CANDIDATES
+from src.utils.pagination import TotalMode, encode_cursor, decode_cursor
+from src.logger import get_logger
 
 from .schemas import (
     SearchUserPreview,
@@ -12,19 +19,29 @@ from .schemas import (
     SearchBlogsResult, BlogSortField, SortDirection
 )
 
+logger = get_logger()
+
+# cursors of full-text results hold the offset of the next page (the rank has no keyset)
+INDEX_CURSOR_SORT = [("offset", 1)]
+
 async def _build_blog_list_page(
     blog_docs: List[dict],
-    total: int,
+    total: Optional[int],
     page: int,
     size: int,
+    user_id: Optional[str] = None,
 ) -> BlogListPage:
     """
     Build the paginated response model from blog documents:
     auto-collect author IDs -> batch query usernames -> convert to a list of SearchBlogPreview.
+    If user_id is given, is_liked is filled with one batched lookup in blog_likes.
     """
 
     # Collect all author IDs (there may be multiple authors in keyword search results).
     author_ids = {doc["author_id"] for doc in blog_docs}
+    liked_ids = set()
+    if user_id and blog_docs:
+        liked_ids = await blog_repository.find_liked_blog_ids(db, user_id, [doc["id"] for doc in blog_docs])
 
     # Batch query author usernames (to avoid repeated database lookups).
     # username_map: Dict[str, str] = {}
@@ -53,7 +70,7 @@ async def _build_blog_list_page(
                 tags=doc.get("tags", []),
                 view_count=doc.get("view_count", 0),
                 like_count=doc.get("like_count",0),
-                is_liked=doc.get("is_liked",False),
+                is_liked=doc["id"] in liked_ids,
                 comment_count=doc.get("comment_count",0),
             )
         )
@@ -108,73 +125,173 @@ async def search_user_with_blogs(username: str, page, size) -> SearchUserResult:
     )
 
 
+async def _search_blogs_in_index(
+    keyword: str,
+    tags: Optional[List[str]],
+    skip: int,
+    size: int,
+    sort_by: BlogSortField,
+    sort_order: SortDirection,
+    cursor: Optional[str],
+    mode: TotalMode,
+):
+    """
+    Serve a keyword search from the full-text index.
+    Return (blog_docs, total, next_cursor), or None if the index is not available.
+    total is the number of matches (counted in Redis, so EXACT and APPROX are the same), None with
+    TotalMode.NONE. Sorted by a counter, only the SEARCH_MAX_CANDIDATES most relevant matches are
+    ranked: the pages end there, the total still counts every match.
+    """
+    try:
+        if not await search_index.is_ready():
+            return None
+    except Exception as e:
+        logger.error(f"Full-text index unavailable, fall back to MongoDB: {e}")
+        return None
+
+    if cursor:
+        skip = decode_cursor(cursor, INDEX_CURSOR_SORT)[0]
+    try:
+        blog_ids, total = await search_index.search(
+            keyword,
+            tags,
+            sort_by=sort_by.value,
+            descending=sort_order == SortDirection.DESC,
+            offset=skip,
+            limit=size,
+        )
+    except Exception as e:
+        logger.error(f"Full-text search failed, fall back to MongoDB: {e}")
+        return None
+
+    last = total
+    if sort_by == BlogSortField.RELEVANCE or sort_by.value in search_index.DATE_KEYS:
+        blog_docs = await blog_repository.find_blogs_by_ids(db, blog_ids)
+    else:
+        # blog_ids are the best ranked candidates, ordered by the counter in MongoDB
+        last = min(total, SEARCH_MAX_CANDIDATES)
+        blog_docs = await blog_repository.find_blogs_by_ids_sorted(
+            db, blog_ids, sort_by, sort_order, skip=skip, limit=size
+        )
+
+    next_cursor = None
+    if skip + size < last:
+        next_cursor = encode_cursor({"offset": skip + size}, INDEX_CURSOR_SORT)
+    return blog_docs, None if mode == TotalMode.NONE else total, next_cursor
+
+
 async def search_blogs_by_keyword(
     keyword: Optional[str] = None,
     tags: Optional[List[str]] = None,
     page: int = 0,
     size: int = 10,
-    sort_by: BlogSortField = BlogSortField.CREATED_AT,
+    sort_by: Optional[BlogSortField] = None,
     sort_order: SortDirection = SortDirection.DESC,
+    user_id: Optional[str] = None,
+    cursor: Optional[str] = None,
+    mode: TotalMode = TotalMode.EXACT,
 ) -> SearchBlogsResult:
     """
-    Search blog titles by keyword (case-insensitive).
-    Return the paginated blog results.
+    Search blogs by keyword (title and content, ranked by BM25) and/or tags.
+    Return the paginated blog results. With a cursor (next_cursor of the previous page)
+    the page is read by keyset instead of skip.
+    Without sort_by, keyword searches are ordered by relevance and tag searches by date.
     """
     skip = (page - 1) * size
+    if sort_by is None:
+        sort_by = BlogSortField.RELEVANCE if keyword else BlogSortField.CREATED_AT
 
-    total = await blog_repository.count_blogs(db, keyword, tags)
-    if total == 0:
-        empty_page = BlogListPage(total=0, page=page, size=size, items=[])
-        return SearchBlogsResult(blogs=empty_page)
-
-    # current page
-    blog_docs = await blog_repository.find_blogs_by_filters(
-        db=db,
-        keyword=keyword,
-        tags=tags,
-        skip=skip,
-        limit=size,
-        sort_by=sort_by,
-        sort_order=sort_order,
-    )
+    if keyword:
+        try:
+            found = await _search_blogs_in_index(keyword, tags, skip, size, sort_by, sort_order, cursor, mode)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+        if found is not None:
+            blog_docs, total, next_cursor = found
+            blogs_page = await _build_blog_list_page(
+                blog_docs=blog_docs,
+                total=total,
+                page=page,
+                size=size,
+                user_id=user_id,
+            )
+            blogs_page.next_cursor = next_cursor
+            return SearchBlogsResult(blogs=blogs_page)
+
+    # index not built yet (or tags only): title regex / tag match in MongoDB
+    if sort_by == BlogSortField.RELEVANCE:
+        sort_by = BlogSortField.CREATED_AT
+
+    # current page and total
+    try:
+        blog_docs, total, next_cursor = await blog_repository.find_blogs_by_filters(
+            db=db,
+            keyword=keyword,
+            tags=tags,
+            skip=skip,
+            limit=size,
+            sort_by=sort_by,
+            sort_order=sort_order,
+            cursor=cursor,
+            mode=mode,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
 
     blogs_page = await _build_blog_list_page(
         blog_docs=blog_docs,
         total=total,
         page=page,
         size=size,
+        user_id=user_id,
     )
+    blogs_page.next_cursor = next_cursor
 
     return SearchBlogsResult(blogs=blogs_page)
 
 async def fetch_trending_blogs(user_id: str,page: int=1, size: int = 5) -> SearchBlogsResult:
-    LOOKBACK_DAYS = 100
-    GRAVITY = 1.8
-    recommended_blogs = await blog_repository.get_trending_feed(
-        db,
-        user_id,
-        page=page,
-        size=size,
-        days_window=LOOKBACK_DAYS,
-        gravity=GRAVITY
-    )
-
-    total = len(recommended_blogs)
+    ranking = await trending.get_trending_page(page, size)
+    if ranking is not None:
+        blog_ids, total = ranking
+        recommended_blogs = await blog_repository.find_blogs_by_ids(db, blog_ids)
+    else:
+        # ranking not built yet (cold start), compute this page directly
+        recommended_blogs = await blog_repository.get_trending_feed(
+            db,
+            page=page,
+            size=size,
+            days_window=TRENDING_WINDOW_DAYS,
+            gravity=TRENDING_GRAVITY
+        )
+        total = len(recommended_blogs)
 
     blogs_page = await _build_blog_list_page(
         blog_docs=recommended_blogs,
         total=total,
         page=page,
         size=size,
+        user_id=user_id,
     )
 
     return SearchBlogsResult(blogs=blogs_page)
 
-async def search_usernames_by_relevance(username: str, page: int = 1, limit: int = 10) -> List[SearchUserPreview]:
+async def search_usernames_by_relevance(
+    username: str,
+    page: int = 1,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    mode: TotalMode = TotalMode.EXACT,
+) -> List[SearchUserPreview]:
     """
     Search usernames by relevance using the repository function.
+    Return (previews, total, next_cursor).
     """
-    user_docs, total = await user_repository.search_users_by_relevance(db, username, page=page, limit=limit)
+    try:
+        user_docs, total, next_cursor = await user_repository.search_users_by_relevance(
+            db, username, page=page, limit=limit, cursor=cursor, mode=mode
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
     user_docs_previews = [
         SearchUserPreview(
             username=doc["username"],
@@ -184,4 +301,4 @@ async def search_usernames_by_relevance(username: str, page: int = 1, limit: int
         )
         for doc in user_docs
     ]
-    return user_docs_previews, total
\ No newline at end of file
+    return user_docs_previews, total, next_cursor
\ No newline at end of file
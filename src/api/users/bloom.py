@@ -0,0 +1,141 @@
+# src/api/users/bloom.py
+import hashlib
+import math
+from datetime import datetime
+from typing import List
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from src.core.config import USER_BLOOM_CAPACITY, USER_BLOOM_ERROR_RATE
+from src.core.redis import redis_client
+from src.logger import get_logger
+
+# Bloom filters of the taken usernames and emails, Redis bitmaps shared by all workers.
+# "not in the filter" is definite, "in the filter" may be a false positive and is checked in MongoDB.
+# Removed values stay in the filter (a renamed user's old name is just a false positive).
+USERNAME = "username"
+EMAIL = "email"
+
+BATCH_SIZE = 1000
+
+# bits and hash functions for USER_BLOOM_CAPACITY values at USER_BLOOM_ERROR_RATE false positives
+NUM_BITS = math.ceil(-USER_BLOOM_CAPACITY * math.log(USER_BLOOM_ERROR_RATE) / math.log(2) ** 2)
+NUM_HASHES = max(1, round(NUM_BITS / USER_BLOOM_CAPACITY * math.log(2)))
+
+# the keys carry the geometry: after a sizing change the old filters are not read and get rebuilt
+FILTER_KEY = f"bloom:users:{NUM_BITS}:{NUM_HASHES}:{{}}"
+# set once the filters were built from MongoDB, lookups answer "maybe" until then
+READY_KEY = f"bloom:users:{NUM_BITS}:{NUM_HASHES}:ready"
+
+logger = get_logger()
+
+# a value could not be added and READY_KEY could not be dropped either (Redis down): this worker
+# drops it with its next Redis call, before it reads the filter again
+_invalidate_pending = False
+
+
+def _offsets(value: str) -> List[int]:
+    # double hashing: the k positions are h1 + i * h2
+    digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+    h1 = int.from_bytes(digest[:8], "big")
+    h2 = int.from_bytes(digest[8:], "big") | 1
+    return [(h1 + i * h2) % NUM_BITS for i in range(NUM_HASHES)]
+
+
+def _add_to_pipe(pipe, kind: str, value: str) -> None:
+    for offset in _offsets(value):
+        pipe.setbit(FILTER_KEY.format(kind), offset, 1)
+
+
+def _pipeline():
+    # (pipeline, whether its first command is the pending drop of READY_KEY)
+    pipe = redis_client.pipeline(transaction=False)
+    if _invalidate_pending:
+        pipe.delete(READY_KEY)
+    return pipe, _invalidate_pending
+
+
+async def _invalidate() -> None:
+    # a filter missing a taken value would answer "free" for good: lookups go to MongoDB
+    # until ensure_filters (a periodic job) rebuilds it
+    global _invalidate_pending
+    try:
+        await redis_client.delete(READY_KEY)
+        _invalidate_pending = False
+        logger.warning("User bloom filters invalidated, lookups go to MongoDB until the rebuild")
+    except Exception as e:
+        _invalidate_pending = True
+        logger.error(f"Failed to invalidate the user bloom filters, retried on the next call: {e}")
+
+
+async def add(kind: str, value: str) -> None:
+    """
+    Record a taken value, after it was written to MongoDB. If that fails the filters are
+    invalidated, so they never answer "free" for it.
+    """
+    global _invalidate_pending
+    try:
+        pipe, dropping = _pipeline()
+        _add_to_pipe(pipe, kind, value)
+        await pipe.execute()
+        if dropping:
+            _invalidate_pending = False
+    except Exception as e:
+        logger.error(f"Failed to add {kind} to the bloom filter: {e}")
+        await _invalidate()
+
+
+async def might_exist(kind: str, value: str) -> bool:
+    """
+    False only if value is certainly not taken. True if it may be, or if the filter
+    can't tell (not built yet, Redis error): the caller then checks MongoDB.
+    """
+    global _invalidate_pending
+    try:
+        pipe, dropping = _pipeline()
+        pipe.exists(READY_KEY)
+        for offset in _offsets(value):
+            pipe.getbit(FILTER_KEY.format(kind), offset)
+        results = await pipe.execute()
+    except Exception as e:
+        logger.error(f"Failed to read the {kind} bloom filter: {e}")
+        return True
+    if dropping:
+        _invalidate_pending = False
+        results = results[1:]
+    ready, *bits = results
+    return not ready or all(bits)
+
+
+async def rebuild_filters(db: AsyncIOMotorDatabase) -> int:
+    """
+    Rebuild both filters from MongoDB, return the number of users added.
+    Lookups go to MongoDB while it runs, values added meanwhile are kept.
+    """
+    await redis_client.delete(READY_KEY)
+    # also the filters of a previous sizing
+    async for key in redis_client.scan_iter(match="bloom:users:*", count=BATCH_SIZE):
+        await redis_client.delete(key)
+    users = 0
+    pipe = redis_client.pipeline(transaction=False)
+    async for user in db.users.find({}, {"username": 1, "email": 1}):
+        if user.get("username"):
+            _add_to_pipe(pipe, USERNAME, user["username"])
+        if user.get("email"):
+            _add_to_pipe(pipe, EMAIL, user["email"])
+        users += 1
+        if users % BATCH_SIZE == 0:
+            await pipe.execute()
+    pipe.set(READY_KEY, datetime.utcnow().isoformat())
+    await pipe.execute()
+    logger.info("User bloom filters rebuilt, %s users", users)
+    return users
+
+
+async def ensure_filters(db: AsyncIOMotorDatabase) -> None:
+    """
+    Build the filters when they are missing: on cold start (e.g. fresh Redis) and after
+    an add failed and invalidated them.
+    """
+    if not await redis_client.exists(READY_KEY):
+        await rebuild_filters(db)
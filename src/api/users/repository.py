@@ -1,9 +1,32 @@
-from typing import Optional
+from typing import List, Optional
 from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
 import re
 
 from pymongo import ReturnDocument
+from pymongo.errors import ExecutionTimeout
+
+from src.core.config import USER_SEARCH_SUBSTRING_MAX_TIME_MS
+from src.utils.pagination import TotalMode, find_page
+from src.logger import get_logger
+
+# relevance order of search_users_by_relevance: an exact match is the shortest name having the
+# prefix, then longer names; served as is by the idx_username_len_lower index, _id keeps it total for the cursor
+USER_SEARCH_SORT = [("username_len", 1), ("username_lower", 1), ("_id", 1)]
+USER_SEARCH_INDEX = "idx_username_len_lower"
+USER_SEARCH_PROJECTION = {"email": 0, "password": 0}
+# substring matches are only looked for with queries at least this long
+SUBSTRING_MIN_LENGTH = 3
+
+logger = get_logger()
+
+
+def username_search_fields(username: str) -> dict:
+    """
+    Normalized copies of the username that the search index is built on, stored with every username write.
+    """
+    lower = username.lower()
+    return {"username_lower": lower, "username_len": len(lower)}
 
 
 async def find_by_email(db: AsyncIOMotorDatabase, email: str) -> Optional[dict]:
@@ -13,58 +36,68 @@ async def find_by_username(db: AsyncIOMotorDatabase, username: str) -> Optional[
     return await db.users.find_one({"username": username})
 
 
-async def search_users_by_relevance(db: AsyncIOMotorDatabase, query: str, page:int=1, limit: int = 10):
-    if not query:
+async def _find_substring_matches(db: AsyncIOMotorDatabase, query: str, exclude: set, limit: int) -> List[dict]:
+    """
+    Users whose name contains query but does not start with it, best ranked first.
+    An unanchored regex reads every key of the index, so the scan is cut after
+    USER_SEARCH_SUBSTRING_MAX_TIME_MS: the keys are read shortest names first, a short budget still
+    finds the best ranked matches of common substrings, and bounds the search latency for the rare ones.
+    """
+    cursor = (
+        db.users
+        .find({"username_lower": {"$regex": re.escape(query)}}, USER_SEARCH_PROJECTION)
+        .sort(USER_SEARCH_SORT)
+        .hint(USER_SEARCH_INDEX)
+        .limit(limit + len(exclude))
+        .max_time_ms(USER_SEARCH_SUBSTRING_MAX_TIME_MS)
+    )
+    try:
+        docs = [doc async for doc in cursor if doc["_id"] not in exclude]
+    except ExecutionTimeout:
+        logger.warning("Substring user search for %r timed out, prefix matches only", query)
         return []
-    safe_query = re.escape(query)
+    return docs[:limit]
+
+
+async def search_users_by_relevance(
+    db: AsyncIOMotorDatabase,
+    query: str,
+    page:int=1,
+    limit: int = 10,
+    cursor: Optional[str] = None,
+    mode: TotalMode = TotalMode.EXACT,
+):
+    """
+    Return (users, total, next_cursor), ranked exact > prefix (shorter names first) > substring.
+    Prefix matches are a range of the idx_username_len_lower index, paged by find_page. Substring matches only fill the first page when there are not enough
+    prefix matches to fill it. With a cursor the page starts after it instead of skipping.
+    """
+    if not query:
+        return [], 0, None
+    query = query.lower()
     skip_count = (page - 1) * limit
-    pipeline = [
-        {
-            "$match": {
-                "username": {"$regex": safe_query, "$options": "i"}
-            }
-        },
-        {
-            "$addFields": {
-                "match_score": {
-                    "$switch": {
-                        "branches": [
-                            {
-                                "case": {
-                                    "$eq": [{"$toLower": "$username"}, query.lower()]
-                                },
-                                "then": 3
-                            },
-                            {
-                                "case": {
-                                    "$eq": [{"$indexOfCP": [{"$toLower": "$username"}, query.lower()]}, 0]
-                                },
-                                "then": 2
-                            }
-                        ],
-                        "default": 1
-                    }
-                },
-                "username_len": {"$strLenCP": "$username"}
-            }
-        },
-        {
-            "$sort": {
-                "match_score": -1,
-                "username_len": 1,
-                "username": 1
-            }
-        },
-        {"$skip": skip_count},
-        {"$limit": limit},
-        {"$project": {"match_score": 0, "username_len": 0, "email": 0, "password": 0}},
-    ]
-
-    users = await db.users.aggregate(pipeline).to_list(length=limit)
-
-    total = await db.users.count_documents({"username": {"$regex": safe_query, "$options": "i"}})
-
-    return users, total
+    prefix_filter = {
+        "username_len": {"$gte": len(query)},
+        "username_lower": {"$regex": "^" + re.escape(query)},
+    }
+    users, total, next_cursor = await find_page(
+        db.users, prefix_filter, USER_SEARCH_SORT, limit,
+        skip=skip_count, cursor=cursor, projection=USER_SEARCH_PROJECTION, mode=mode,
+    )
+
+    first_page = skip_count == 0 and cursor is None
+    if first_page and next_cursor is None and len(users) < limit and len(query) >= SUBSTRING_MIN_LENGTH:
+        # every prefix match is on this page
+        extra = await _find_substring_matches(db, query, {u["_id"] for u in users}, limit - len(users))
+        users.extend(extra)
+        if total is not None:
+            total += len(extra)
+
+    for user in users:
+        user.pop("username_lower", None)
+        user.pop("username_len", None)
+
+    return users, total, next_cursor
 
 async def find_by_id(db: AsyncIOMotorDatabase, user_id: str) -> Optional[dict]:
     try:
@@ -81,12 +114,13 @@ async def find_by_id(db: AsyncIOMotorDatabase, user_id: str) -> Optional[dict]:
     return doc
 
 async def insert_user(db: AsyncIOMotorDatabase, user_doc: dict) -> dict:
-    res = await db.users.insert_one(user_doc)
-    created = await db.users.find_one({"_id": res.inserted_id})
+    # the _id is generated here, the inserted document is returned without being read back
+    user_doc["_id"] = ObjectId()
+    user_doc.update(username_search_fields(user_doc["username"]))
+    await db.users.insert_one(user_doc)
     # serialize
-    created["id"] = str(created["_id"])
-    created.pop("_id", None)
-    created.pop("password", None)
+    created = {k: v for k, v in user_doc.items() if k not in ("password", "username_lower", "username_len")}
+    created["id"] = str(created.pop("_id"))
     return created
 
 #change password
@@ -95,9 +129,11 @@ async def update_password_hash(db: AsyncIOMotorDatabase, user_id: ObjectId, new_
     return res.matched_count == 1
 
 async def update_user_info(db: AsyncIOMotorDatabase, user_id: ObjectId, update_fields: dict) -> dict:
+    if "username" in update_fields:
+        update_fields = {**update_fields, **username_search_fields(update_fields["username"])}
     res = await db.users.find_one_and_update(
         {"_id": user_id},
-        {"$set": update_fields},
+        {"$set": update_fields, "$inc": {"version": 1}},
         return_document = ReturnDocument.AFTER
     )
     return res
@@ -1,7 +1,6 @@
 from fastapi import APIRouter, HTTPException, status, Depends, Query
 from src.api.users.service import *
 from src.logger import get_logger
-from fastapi.encoders import jsonable_encoder
 from src.api.users.schemas import PasswordChange
 from src.auth.auth import *
 
@@ -13,7 +12,8 @@ router = APIRouter(
 from bson import ObjectId
 from src.auth.auth import create_access_token, create_refresh_token
 from fastapi import APIRouter, Response, status, Path
-from fastapi.responses import JSONResponse
+from fastapi.responses import ORJSONResponse
+from src.utils.conditional import Conditional, conditional
 
 @router.post(
     "/register",
@@ -34,7 +34,8 @@ async def register_user(user: UserCreate):
         raise HTTPException(status_code=400, detail=str(e))
 
     resp_body = {"user": created}
-    response = JSONResponse(status_code=status.HTTP_201_CREATED, content=jsonable_encoder(resp_body))
+    # created only holds str fields, orjson encodes it as is
+    response = ORJSONResponse(status_code=status.HTTP_201_CREATED, content=resp_body)
     response.set_cookie("access_token", access_token, httponly=True, secure=False, samesite="lax")
     response.set_cookie("refresh_token", refresh_token, httponly=True, secure=False, samesite="lax")
     return response
@@ -58,7 +59,7 @@ async def login_user(credentials: UserLogin):
     payload = {"sub": user["id"], "email": user["email"]}
     access = create_access_token(payload)
     refresh = create_refresh_token(payload)
-    resp = JSONResponse(content=jsonable_encoder({"user": user}))
+    resp = ORJSONResponse(content={"user": user})
     resp.set_cookie("access_token", access, httponly=True, secure=False, samesite="lax")
     resp.set_cookie("refresh_token", refresh, httponly=True, secure=False, samesite="lax")
     return resp
@@ -93,8 +94,9 @@ async def get_user_by_email_api(email: str):
 )
 async def get_user_public_endpoint(
     user_id: str = Path(..., min_length=24, max_length=24, description="User ID (MongoDB ObjectId string)"),
+    cond: Conditional = Depends(conditional()),
 ):
-    return await get_user_public(user_id)
+    return await get_user_public(user_id, cond=cond)
 
 
 #change password
@@ -119,7 +121,7 @@ async def logout_user():
     """
     Remove access and refresh tokens from cookies.
     """
-    response = JSONResponse(
+    response = ORJSONResponse(
         content={"message": "Successfully logged out"},
         status_code=200
     )
@@ -148,7 +150,7 @@ async def logout_user():
     description="Fetch the currently authenticated user's information."
 )
 async def read_users_me(current_user: dict = Depends(get_current_user)):
-    logger.debug(f"Current user info: {current_user}")
+    logger.debug("Current user info: %s", current_user)
     return current_user
 
 
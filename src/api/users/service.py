@@ -3,29 +3,63 @@ import asyncio
 from src.db.mongo import db
 from . import repository
 from src.api.users.schemas import *
-from src.api.users.utils import hash_password, verify_password
+from src.api.users.utils import hash_password, verify_password, verify_and_rehash
+from src.api.users import bloom
+from src.api.blogs import service as blog_service
 from src.logger import get_logger
 from src.auth import auth
-from typing import Tuple
+from src.utils.conditional import Conditional, make_etag, bump_generation
+from typing import Optional, Tuple
 from bson import ObjectId
 from fastapi import HTTPException, status
+from pymongo.errors import DuplicateKeyError
 from src.db.mongo import db
 logger = get_logger(__name__)
 
+# bumped by every profile edit, part of the ETags of lists showing usernames / avatars (comments)
+PROFILE_GENERATION_KEY = "users:profile_generation"
+
+async def _is_taken(kind: str, value: str) -> bool:
+    """
+    Availability pre-check, MongoDB is only asked when the bloom filter can't rule value out.
+    The unique indexes on username / email are what actually prevent duplicates.
+    """
+    if not await bloom.might_exist(kind, value):
+        return False
+    find = repository.find_by_email if kind == bloom.EMAIL else repository.find_by_username
+    return await asyncio.wait_for(find(db, value), timeout=5) is not None
+
+def _duplicate_field(e: DuplicateKeyError) -> str:
+    key_pattern = (e.details or {}).get("keyPattern") or {}
+    return bloom.EMAIL if bloom.EMAIL in key_pattern else bloom.USERNAME
+
 async def create_user(user_in: UserCreate) -> Tuple[dict, str, str]:
 
-    existing_email = await asyncio.wait_for(repository.find_by_email(db, user_in.email), timeout=5)
-    if existing_email:
+    # both checks are independent, send them at once
+    email_taken, username_taken = await asyncio.gather(
+        _is_taken(bloom.EMAIL, user_in.email),
+        _is_taken(bloom.USERNAME, user_in.username),
+    )
+    if email_taken:
         raise ValueError("Email already registered")
 
-    existing_username = await asyncio.wait_for(repository.find_by_username(db, user_in.username), timeout=5)
-    if existing_username:
+    if username_taken:
         raise ValueError("Username already registered")
 
 
-    hashed = hash_password(user_in.password)
+    hashed = await hash_password(user_in.password)
     user_doc = {"username": user_in.username, "email": user_in.email, "password": hashed, "avatar_url": user_in.avatar_url, "bio": ""}
-    created = await asyncio.wait_for(repository.insert_user(db, user_doc), timeout=5)
+    try:
+        created = await asyncio.wait_for(repository.insert_user(db, user_doc), timeout=5)
+    except DuplicateKeyError as e:
+        # registered concurrently, after the pre-check
+        if _duplicate_field(e) == bloom.EMAIL:
+            raise ValueError("Email already registered")
+        raise ValueError("Username already registered")
+    await asyncio.gather(
+        bloom.add(bloom.EMAIL, created["email"]),
+        bloom.add(bloom.USERNAME, created["username"]),
+    )
 
     payload = {"sub": created["id"], "email": created["email"]}
     access = auth.create_access_token(payload)
@@ -40,7 +74,7 @@ async def get_user_by_email(email: str):
         del user["password"]
     return user
 
-async def get_user_public(user_id: str) -> dict:
+async def get_user_public(user_id: str, cond: Optional[Conditional] = None) -> dict:
     """
     use user_id return username
     """
@@ -51,6 +85,8 @@ async def get_user_public(user_id: str) -> dict:
             detail="User not found",
         )
 
+    if cond and cond.validate(make_etag("user", user_id, user_doc.get("version", 0))):
+        raise cond.not_modified()
     return user_doc
 
 
@@ -60,8 +96,15 @@ async def authenticate_user(email: str, password: str):
     user_doc = await repository.find_by_email(db, email)
     if not user_doc:
         return None
-    if not verify_password(password, user_doc["password"]):
+    valid, new_hash = await verify_and_rehash(password, user_doc["password"])
+    if not valid:
         return None
+    if new_hash:
+        # hashed with an older work factor, store it with the current one
+        try:
+            await repository.update_password_hash(db, user_doc["_id"], new_hash)
+        except Exception as e:
+            logger.error(f"Failed to rehash password of user {user_doc['_id']}: {e}")
     # sanitize
     user = {
         "id": str(user_doc["_id"]),
@@ -79,18 +122,21 @@ async def change_password(user_id: str, old_password: str, new_password: str) ->
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="User not found")
 
     # check old pw
-    if not verify_password(old_password, user_doc["password"]):
+    if not await verify_password(old_password, user_doc["password"]):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Old password is incorrect")
 
-    new_hash = hash_password(new_password)
+    new_hash = await hash_password(new_password)
 
     ok = await repository.update_password_hash(db, ObjectId(user_id), new_hash)
     if not ok:
         raise HTTPException(status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail="Failed to update password")
+    auth.invalidate_user(user_id)
 
 async def check_username_exists(username: str) -> bool:
-    existing = await repository.find_by_username(db, username)
-    return existing is not None
+    return await _is_taken(bloom.USERNAME, username)
+
+async def ensure_user_filters() -> None:
+    await bloom.ensure_filters(db)
 
 async def update_user_info(user_id, user_update) -> dict:
     update_data = user_update.model_dump(exclude_unset=True)
@@ -103,7 +149,9 @@ async def update_user_info(user_id, user_update) -> dict:
     if "username" in update_data:
         new_username = update_data["username"]
 
-        existing_user = await repository.find_by_username(db, new_username)
+        existing_user = None
+        if await bloom.might_exist(bloom.USERNAME, new_username):
+            existing_user = await repository.find_by_username(db, new_username)
 
         if existing_user and str(existing_user["_id"]) != user_id:
             raise HTTPException(
@@ -111,7 +159,18 @@ async def update_user_info(user_id, user_update) -> dict:
                 detail="Username is already taken by another user."
             )
 
-        updated_user = await repository.update_user_info(db, ObjectId(user_id), update_data)
+        try:
+            updated_user = await repository.update_user_info(db, ObjectId(user_id), update_data)
+        except DuplicateKeyError:
+            # taken concurrently, after the check above
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Username is already taken by another user."
+            )
+        auth.invalidate_user(user_id)
+        await bloom.add(bloom.USERNAME, new_username)
+        await bump_generation(PROFILE_GENERATION_KEY)
+        await blog_service.invalidate_author_blog_details(user_id)
 
         if not updated_user:
             raise HTTPException(status_code=404, detail="User not found")
@@ -1,13 +1,98 @@
 # app/api/users/utils.py
+import asyncio
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from fastapi import HTTPException, status
 from passlib.context import CryptContext
 
-# Password hashing context
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+from src.core.config import (
+    BCRYPT_ROUNDS, PASSWORD_HASH_EXECUTOR, PASSWORD_HASH_WORKERS, PASSWORD_HASH_MAX_PENDING,
+)
+from src.utils.metrics import (
+    PASSWORD_HASH_QUEUE_WAIT, PASSWORD_HASH_DURATION, PASSWORD_HASH_PENDING, PASSWORD_HASH_REJECTED,
+)
+
+# Password hashing context, hashes with another number of rounds than BCRYPT_ROUNDS need an update
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__default_rounds=BCRYPT_ROUNDS,
+    bcrypt__min_rounds=BCRYPT_ROUNDS,
+    bcrypt__max_rounds=BCRYPT_ROUNDS,
+)
+
+_executor: Optional[Executor] = None
+# hashes submitted to the pool and not finished yet
+_pending = 0
+
+
+# run in the pool, they return the time they started and took so queue wait and work are measured apart
+
+def _hash(password: str) -> Tuple[str, float, float]:
+    started = time.time()
+    return pwd_context.hash(password), started, time.time() - started
+
+
+def _verify_and_update(plain_password: str, hashed_password: str) -> Tuple[Tuple[bool, Optional[str]], float, float]:
+    started = time.time()
+    return pwd_context.verify_and_update(plain_password, hashed_password), started, time.time() - started
 
 
-def hash_password(password: str) -> str:
-    return pwd_context.hash(password)
+def _get_executor() -> Executor:
+    global _executor
+    if _executor is None:
+        if PASSWORD_HASH_EXECUTOR == "process":
+            _executor = ProcessPoolExecutor(max_workers=PASSWORD_HASH_WORKERS)
+        else:
+            _executor = ThreadPoolExecutor(max_workers=PASSWORD_HASH_WORKERS, thread_name_prefix="password-hash")
+    return _executor
+
+
+async def _run(op: str, fn, *args):
+    """
+    Run fn in the pool, or answer 429 right away when PASSWORD_HASH_MAX_PENDING hashes are already waiting.
+    """
+    global _pending
+    if _pending >= PASSWORD_HASH_MAX_PENDING:
+        PASSWORD_HASH_REJECTED.labels(op).inc()
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Server busy, try again shortly",
+            headers={"Retry-After": "1"},
+        )
+    _pending += 1
+    PASSWORD_HASH_PENDING.inc()
+    submitted = time.time()
+    try:
+        result, started, duration = await asyncio.get_running_loop().run_in_executor(_get_executor(), fn, *args)
+    finally:
+        _pending -= 1
+        PASSWORD_HASH_PENDING.dec()
+    PASSWORD_HASH_QUEUE_WAIT.labels(op).observe(max(started - submitted, 0))
+    PASSWORD_HASH_DURATION.labels(op).observe(duration)
+    return result
+
+
+async def hash_password(password: str) -> str:
+    return await _run("hash", _hash, password)
     # return "fake_hashed_" + password # For demonstration purposes only
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    return pwd_context.verify(plain_password, hashed_password)
+async def verify_password(plain_password: str, hashed_password: str) -> bool:
+    valid, _ = await _run("verify", _verify_and_update, plain_password, hashed_password)
+    return valid
+
+async def verify_and_rehash(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """
+    Return (valid, new_hash). new_hash is set when the password is valid but was hashed
+    with other settings (e.g. BCRYPT_ROUNDS changed) and should be stored instead.
+    """
+    return await _run("verify", _verify_and_update, plain_password, hashed_password)
+
+
+def shutdown_password_pool() -> None:
+    global _executor
+    if _executor is not None:
+        _executor.shutdown(wait=False, cancel_futures=True)
+        _executor = None
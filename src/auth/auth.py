@@ -4,7 +4,10 @@ from fastapi import Depends, HTTPException, Request, status
 from jose import jwt, JWTError
 from bson import ObjectId
 from src.db.mongo import db
+from src.core.config import AUTH_TOKEN_CACHE_SIZE, AUTH_USER_CACHE_SIZE, AUTH_USER_CACHE_SECONDS
+from src.utils.ttl_cache import TTLCache
 
+import hashlib
 import os
 
 SECRET_KEY = os.environ.get("SECRET_KEY", "DEFAULTSECRETKEY")
@@ -13,6 +16,16 @@ if not SECRET_KEY:
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60 * 24 * 30
 
+# fields of the authenticated user handed to the endpoints (never the password hash)
+PRINCIPAL_PROJECTION = {"username": 1, "email": 1, "avatar_url": 1, "bio": 1}
+
+# sha256(token) -> verified claims, until the token's exp.
+# The caches are not locked: they are used from the event loop only, so the dependencies
+# reading them are async (a sync dependency would run in the threadpool).
+_claims_cache = TTLCache(AUTH_TOKEN_CACHE_SIZE, ttl=ACCESS_TOKEN_EXPIRE_MINUTES * 60)
+# user_id -> principal (PRINCIPAL_PROJECTION fields + "id")
+_user_cache = TTLCache(AUTH_USER_CACHE_SIZE, ttl=AUTH_USER_CACHE_SECONDS)
+
 
 def create_access_token(data: dict, expires_minutes: int = ACCESS_TOKEN_EXPIRE_MINUTES):
     to_encode = data.copy()
@@ -26,20 +39,28 @@ def create_refresh_token(data: dict, expires_days: int = 7):
     to_encode.update({"exp": expire, "type": "refresh"})
     return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
-def verify_access_token(request: Request):
+def decode_token(token: str) -> dict:
+    """
+    Verify the token and return a copy of its claims, cached until it expires.
+    Raise JWTError if it is invalid or expired.
+    """
+    key = hashlib.sha256(token.encode()).hexdigest()
+    payload = _claims_cache.get(key)
+    if payload is None:
+        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        _claims_cache.set(key, payload, expires_at=payload.get("exp"))
+    return dict(payload)
 
-    token = request.cookies.get("access_token")
 
-    if not token:
-        authz = request.headers.get("Authorization", "")
-        if authz.startswith("Bearer "):
-            token = authz.split(" ", 1)[1]
+async def verify_access_token(request: Request):
+
+    token = get_token_from_request(request)
 
     if not token:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Not authenticated")
 
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
     except JWTError:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid or expired token")
 
@@ -57,6 +78,28 @@ def get_token_from_request(request: Request) -> str | None:
     return token
 
 
+async def load_principal(user_id: str) -> dict | None:
+    """
+    The user as seen by the endpoints (PRINCIPAL_PROJECTION fields and "id"), cached for
+    AUTH_USER_CACHE_SECONDS. Return a copy, or None if the user does not exist.
+    """
+    user = _user_cache.get(user_id)
+    if user is None:
+        user = await db.users.find_one({"_id": ObjectId(user_id)}, PRINCIPAL_PROJECTION)
+        if user is None:
+            return None
+        user["id"] = str(user.pop("_id"))
+        _user_cache.set(user_id, user)
+    return dict(user)
+
+
+def invalidate_user(user_id: str) -> None:
+    """
+    Drop the cached principal after the user was changed.
+    """
+    _user_cache.pop(str(user_id))
+
+
 async def get_current_user(
         payload: dict = Depends(verify_access_token)
 ):
@@ -66,13 +109,11 @@ async def get_current_user(
     if not ObjectId.is_valid(user_id):
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid user ID format")
 
-
-    user = await db.users.find_one({"_id": ObjectId(user_id)})
+    user = await load_principal(user_id)
 
     if user is None:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
 
-    user["id"] = str(user["_id"])
     return user
 
 
@@ -83,19 +124,14 @@ async def try_get_current_user(request: Request) -> dict | None:
         return None
 
     try:
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        payload = decode_token(token)
         user_id = payload.get("sub")
         if not user_id or not ObjectId.is_valid(user_id):
             return None
 
-        user = await db.users.find_one({"_id": ObjectId(user_id)})
-        if not user:
-            return None
-        user["id"] = str(user["_id"])
-        return user
+        return await load_principal(user_id)
 
     except JWTError:
         return None
     except Exception:
         return None
-
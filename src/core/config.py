@@ -0,0 +1,99 @@
+# src/core/config.py
+import os
+
+# view counting: "buffered" gathers increments in Redis and flushes them in bulk,
+# "direct" increments the blog document on every read (old behaviour)
+VIEW_COUNTER_MODE = os.getenv("VIEW_COUNTER_MODE", "buffered")
+VIEW_FLUSH_INTERVAL_SECONDS = int(os.getenv("VIEW_FLUSH_INTERVAL_SECONDS", "10"))
+VIEW_FLUSH_MAX_PENDING = int(os.getenv("VIEW_FLUSH_MAX_PENDING", "500"))
+# how often the view leaderboard is checked, and rebuilt when Redis lost it
+LEADERBOARD_CHECK_SECONDS = int(os.getenv("LEADERBOARD_CHECK_SECONDS", "60"))
+
+# blog detail read-through cache
+BLOG_DETAIL_CACHE_TTL_SECONDS = int(os.getenv("BLOG_DETAIL_CACHE_TTL_SECONDS", "300"))
+
+# trending feed (/search/discover), ranked in a Redis sorted set by a background job
+TRENDING_GRAVITY = float(os.getenv("TRENDING_GRAVITY", "1.8"))
+TRENDING_WINDOW_DAYS = int(os.getenv("TRENDING_WINDOW_DAYS", "100"))
+TRENDING_REFRESH_SECONDS = int(os.getenv("TRENDING_REFRESH_SECONDS", "60"))
+TRENDING_FULL_REFRESH_MINUTES = int(os.getenv("TRENDING_FULL_REFRESH_MINUTES", "30"))
+
+# hottest tags: blogs created in the last HOT_TAGS_WINDOW_DAYS days, counted per day in Redis
+HOT_TAGS_WINDOW_DAYS = int(os.getenv("HOT_TAGS_WINDOW_DAYS", "30"))
+HOT_TAGS_READ_CACHE_SECONDS = int(os.getenv("HOT_TAGS_READ_CACHE_SECONDS", "60"))
+
+# full-text blog search (/search/blogs): BM25 over an inverted index of title + content in Redis
+SEARCH_BM25_K1 = float(os.getenv("SEARCH_BM25_K1", "1.2"))
+SEARCH_BM25_B = float(os.getenv("SEARCH_BM25_B", "0.75"))
+# a title occurrence counts as this many content occurrences
+SEARCH_TITLE_WEIGHT = int(os.getenv("SEARCH_TITLE_WEIGHT", "3"))
+SEARCH_QUERY_CACHE_SECONDS = int(os.getenv("SEARCH_QUERY_CACHE_SECONDS", "30"))
+# sorting matches by a counter (views, likes, comments) only looks at the best ranked ones:
+# the pages of such a search end after them, its total still counts every match
+SEARCH_MAX_CANDIDATES = int(os.getenv("SEARCH_MAX_CANDIDATES", "1000"))
+
+# listings asked for an approximate total (approx_total=true) reuse a count this many seconds old
+APPROX_TOTAL_TTL_SECONDS = int(os.getenv("APPROX_TOTAL_TTL_SECONDS", "60"))
+
+# multi-document writes run in a transaction: "auto" when the server is a replica set or
+# a sharded cluster, "on" / "off" to force it
+MONGO_TRANSACTIONS = os.getenv("MONGO_TRANSACTIONS", "auto").lower()
+
+# authenticated requests: verified tokens are cached (per process) until they expire,
+# users for AUTH_USER_CACHE_SECONDS; an edit invalidates the user in the process that served it,
+# the other workers see it after at most AUTH_USER_CACHE_SECONDS
+AUTH_TOKEN_CACHE_SIZE = int(os.getenv("AUTH_TOKEN_CACHE_SIZE", "10000"))
+AUTH_USER_CACHE_SIZE = int(os.getenv("AUTH_USER_CACHE_SIZE", "10000"))
+AUTH_USER_CACHE_SECONDS = int(os.getenv("AUTH_USER_CACHE_SECONDS", "60"))
+
+# password hashing (bcrypt) runs in a pool, off the event loop: "thread" (bcrypt releases the GIL)
+# or "process"; above PASSWORD_HASH_MAX_PENDING queued + running hashes, requests get a 429
+PASSWORD_HASH_EXECUTOR = os.getenv("PASSWORD_HASH_EXECUTOR", "thread")
+PASSWORD_HASH_WORKERS = int(os.getenv("PASSWORD_HASH_WORKERS", str(os.cpu_count() or 2)))
+PASSWORD_HASH_MAX_PENDING = int(os.getenv("PASSWORD_HASH_MAX_PENDING", str(PASSWORD_HASH_WORKERS * 4)))
+# work factor, hashes made with another one are rehashed at the next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+
+# username / email availability: Bloom filters in Redis answer "free" without MongoDB,
+# sized for USER_BLOOM_CAPACITY users (about 1.2 MB per million at 1%)
+USER_BLOOM_CAPACITY = int(os.getenv("USER_BLOOM_CAPACITY", "10000000"))
+USER_BLOOM_ERROR_RATE = float(os.getenv("USER_BLOOM_ERROR_RATE", "0.01"))
+# how often the filters are checked and rebuilt when missing or invalidated (a failed add drops them)
+USER_BLOOM_CHECK_SECONDS = int(os.getenv("USER_BLOOM_CHECK_SECONDS", "60"))
+
+# /search/users: the substring fallback (an unanchored regex over the username index) is cut after
+# this many ms, it bounds the latency of a first page with few prefix matches
+USER_SEARCH_SUBSTRING_MAX_TIME_MS = int(os.getenv("USER_SEARCH_SUBSTRING_MAX_TIME_MS", "5"))
+
+# conditional GET: responses carry an ETag and are revalidated (304 when unchanged); the hottest
+# tags / views lists may also be reused by clients for this many seconds without asking
+HOT_LISTS_MAX_AGE_SECONDS = int(os.getenv("HOT_LISTS_MAX_AGE_SECONDS", "10"))
+
+# MongoDB commands slower than this are logged and counted in mongo_slow_commands_total
+MONGO_SLOW_QUERY_MS = float(os.getenv("MONGO_SLOW_QUERY_MS", "100"))
+
+# per-request MongoDB accounting: a warning is logged when one request issues more than
+# DB_QUERY_WARN_THRESHOLD commands, or the same command shape DB_REPEAT_WARN_THRESHOLD times (N+1)
+DB_QUERY_WARN_THRESHOLD = int(os.getenv("DB_QUERY_WARN_THRESHOLD", "20"))
+DB_REPEAT_WARN_THRESHOLD = int(os.getenv("DB_REPEAT_WARN_THRESHOLD", "5"))
+
+# /debug/queries/top: per process aggregate of the MongoDB commands by shape (values stripped),
+# at most QUERY_SHAPES_MAX shapes
+QUERY_SHAPES_MAX = int(os.getenv("QUERY_SHAPES_MAX", "500"))
+# the /debug endpoints show collection / field names and latencies: not routed unless enabled,
+# and then only for the users listed (comma separated user ids)
+DEBUG_ENDPOINTS_ENABLED = os.getenv("DEBUG_ENDPOINTS_ENABLED", "false").lower() == "true"
+DEBUG_USER_IDS = {i.strip() for i in os.getenv("DEBUG_USER_IDS", "").split(",") if i.strip()}
+
+# logging: records go through a queue of at most LOG_QUEUE_SIZE records to a writer thread (dropped
+# when it is full); each debug / info message may be logged LOG_RATE_PER_SECOND times a second
+# per logger, in bursts of LOG_RATE_BURST, the rest is counted and summed up in the next one let through
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+LOG_RATE_PER_SECOND = float(os.getenv("LOG_RATE_PER_SECOND", "20"))
+LOG_RATE_BURST = int(os.getenv("LOG_RATE_BURST", "50"))
+
+# background jobs (src/core/jobs.py): each periodic run is delayed by up to JOB_JITTER_RATIO of its
+# interval, and the instance that runs it keeps a Redis lease for JOB_LEASE_RATIO of the interval,
+# so with several workers / hosts a job runs about once per interval
+JOB_JITTER_RATIO = float(os.getenv("JOB_JITTER_RATIO", "0.1"))
+JOB_LEASE_RATIO = float(os.getenv("JOB_LEASE_RATIO", "0.9"))
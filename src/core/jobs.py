@@ -0,0 +1,147 @@
+# src/core/jobs.py
+import asyncio
+import os
+import socket
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+
+from src.core.config import JOB_JITTER_RATIO, JOB_LEASE_RATIO
+from src.core.redis import redis_client
+from src.logger import get_logger
+from src.utils.metrics import JOB_RUNS, JOB_DURATION, JOB_LAST_SUCCESS
+
+logger = get_logger()
+
+LEASE_KEY_PREFIX = "jobs:lease:"
+# what a lease holds: which instance runs the job
+INSTANCE_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+@dataclass
+class Job:
+    name: str
+    func: Callable[..., Awaitable]
+    kwargs: dict = field(default_factory=dict)
+    # how long the lease is kept after the run started, renewed while the run goes on
+    lease_seconds: float = 60
+    # release the lease once done (run_once) instead of keeping it until it expires
+    release: bool = False
+
+
+class JobRunner:
+    """
+    Runs background jobs on the scheduler so that with several workers / hosts only one instance
+    runs each of them:
+
+        jobs = JobRunner(scheduler)
+        jobs.every(refresh_trending_feed, seconds=60, name="refresh_trending")
+        await jobs.run_once("ensure_search_index", ensure_search_index)
+
+    A run first takes the Redis lease of its job (SET NX PX). A periodic job keeps the lease for
+    JOB_LEASE_RATIO of its interval: the other instances, whose ticks fall within it, skip their run,
+    and the holder takes it again on its next tick. The ticks are jittered so the instances don't
+    all hit Redis at the same moment. A run still going on in this process is never started twice.
+    Outcome and duration of every run go to job_runs_total / job_duration_seconds.
+    """
+
+    def __init__(self, scheduler: AsyncIOScheduler):
+        self.scheduler = scheduler
+        self._running = set()
+
+    def every(self, func: Callable[..., Awaitable], *, name: str, seconds: float,
+              kwargs: Optional[dict] = None, jitter: Optional[float] = None) -> Job:
+        """
+        Run func(**kwargs) every seconds seconds, delayed by up to jitter seconds
+        (JOB_JITTER_RATIO of the interval by default).
+        """
+        job = Job(name=name, func=func, kwargs=kwargs or {}, lease_seconds=seconds * JOB_LEASE_RATIO)
+        self.scheduler.add_job(
+            self.run,
+            'interval',
+            seconds=seconds,
+            jitter=seconds * JOB_JITTER_RATIO if jitter is None else jitter,
+            args=[job],
+            id=name,
+            replace_existing=True,
+            max_instances=1,
+            coalesce=True,
+        )
+        return job
+
+    async def run_once(self, name: str, func: Callable[..., Awaitable], lease_seconds: float = 300,
+                       **kwargs) -> Optional[object]:
+        """
+        Run func(**kwargs) now unless another instance is already running it, e.g. the cold start
+        rebuilds of the Redis structures. Return what func returned, None if it did not run.
+        """
+        return await self.run(Job(name=name, func=func, kwargs=kwargs, lease_seconds=lease_seconds, release=True))
+
+    async def run(self, job: Job) -> Optional[object]:
+        if job.name in self._running:
+            JOB_RUNS.labels(job.name, "skipped_overlap").inc()
+            logger.warning("Job %s is still running, this run is skipped", job.name)
+            return None
+        self._running.add(job.name)
+        try:
+            return await self._run_leased(job)
+        finally:
+            self._running.discard(job.name)
+
+    async def _run_leased(self, job: Job) -> Optional[object]:
+        key = LEASE_KEY_PREFIX + job.name
+        token = f"{INSTANCE_ID}:{uuid.uuid4().hex}"
+        lease_ms = max(int(job.lease_seconds * 1000), 1)
+        try:
+            acquired = await redis_client.set(key, token, nx=True, px=lease_ms)
+        except Exception as e:
+            JOB_RUNS.labels(job.name, "failed").inc()
+            logger.error(f"Job {job.name}: failed to take the lease: {e}")
+            return None
+        if not acquired:
+            JOB_RUNS.labels(job.name, "skipped_lease").inc()
+            logger.debug("Job %s: lease held by another instance, skipped", job.name)
+            return None
+
+        renewal = asyncio.create_task(self._renew(key, token, job.lease_seconds))
+        start = time.perf_counter()
+        outcome = "failed"
+        try:
+            result = await job.func(**job.kwargs)
+            outcome = "success"
+            JOB_LAST_SUCCESS.labels(job.name).set(time.time())
+            return result
+        except Exception as e:
+            logger.error(f"Job {job.name} failed: {e}")
+            return None
+        finally:
+            renewal.cancel()
+            duration = time.perf_counter() - start
+            JOB_RUNS.labels(job.name, outcome).inc()
+            JOB_DURATION.labels(job.name, outcome).observe(duration)
+            logger.debug("Job %s: %s in %.3f s", job.name, outcome, duration)
+            if job.release:
+                await self._release(key, token)
+
+    async def _renew(self, key: str, token: str, lease_seconds: float) -> None:
+        # a run longer than its lease keeps it, so no other instance starts the job meanwhile
+        lease_ms = max(int(lease_seconds * 1000), 1)
+        while True:
+            await asyncio.sleep(lease_seconds / 3)
+            try:
+                if await redis_client.get(key) != token:
+                    logger.warning("Job lease %s was lost while running", key)
+                    return
+                await redis_client.pexpire(key, lease_ms)
+            except Exception as e:
+                logger.error(f"Failed to renew job lease {key}: {e}")
+
+    async def _release(self, key: str, token: str) -> None:
+        try:
+            if await redis_client.get(key) == token:
+                await redis_client.delete(key)
+        except Exception as e:
+            logger.error(f"Failed to release job lease {key}: {e}")
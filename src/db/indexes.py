@@ -0,0 +1,289 @@
+# src/db/indexes.py
+"""
+Every MongoDB index of the app, declared next to the repository functions that need it,
+and the query shapes those functions send (checked with explain() by src.scripts.indexes).
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo.errors import OperationFailure
+
+from src.api.blogs.repository import AUTHOR_BLOGS_SORT, blog_filters_sort
+from src.api.comments.repository import COMMENTS_SORT
+from src.api.search.schemas import BlogSortField, SortDirection
+from src.api.users.repository import USER_SEARCH_INDEX, USER_SEARCH_SORT
+from src.logger import get_logger
+
+logger = get_logger()
+
+
+@dataclass(frozen=True)
+class IndexSpec:
+    collection: str
+    keys: Tuple[Tuple[str, int], ...]
+    name: str
+    used_by: Tuple[str, ...]
+    unique: bool = False
+
+
+@dataclass(frozen=True)
+class QueryShape:
+    """
+    One query sent by a repository function. Either a find (filter + sort) or an aggregate (pipeline).
+    allowed lists plan stages accepted for this shape, e.g. a sort on computed fields.
+    max_docs_examined bounds the documents fetched: an IXSCAN that reads every match is still O(matches).
+    """
+    used_by: str
+    collection: str
+    filter: dict = field(default_factory=dict)
+    sort: Optional[List[Tuple[str, int]]] = None
+    pipeline: Optional[List[dict]] = None
+    allowed: Tuple[str, ...] = ()
+    max_docs_examined: Optional[int] = None
+
+
+# sort fields of the blog search, each also indexed behind tags for the $all filter
+BLOG_SORT_FIELDS = [f for f in BlogSortField if f != BlogSortField.RELEVANCE]
+
+INDEXES: List[IndexSpec] = [
+    IndexSpec(
+        "blogs", (("author_id", 1), ("created_at", -1), ("_id", -1)), "idx_author_created_id",
+        used_by=("blogs.list_blogs_by_author", "blogs.count_blogs_by_author"),
+    ),
+    *[
+        IndexSpec(
+            "blogs", ((f.value, -1), ("_id", -1)), f"idx_{f.value}_id",
+            used_by=("blogs.find_blogs_by_filters", "blogs.list_blogs_by_views", "trending._full_refresh",
+                     "leaderboard.rebuild_leaderboard"),
+        )
+        for f in BLOG_SORT_FIELDS
+    ],
+    *[
+        IndexSpec(
+            "blogs", (("tags", 1), (f.value, -1), ("_id", -1)), f"idx_tags_{f.value}_id",
+            used_by=("blogs.find_blogs_by_filters",),
+        )
+        for f in BLOG_SORT_FIELDS
+    ],
+    # one like per (blog, user), also serves batched membership checks
+    IndexSpec(
+        "blog_likes", (("blog_id", 1), ("user_id", 1)), "uniq_blog_user",
+        used_by=("blogs.toggle_like", "blogs.is_blog_liked", "blogs.find_liked_blog_ids", "blogs.delete_blog"),
+        unique=True,
+    ),
+    IndexSpec(
+        "comments", (("blog_id", 1), ("is_root", 1), ("created_at", 1), ("_id", 1)), "idx_blog_root_created",
+        used_by=("comments.list_root_comments_by_blog", "comments.count_root_comments_by_blog"),
+    ),
+    IndexSpec(
+        "comments", (("root_id", 1), ("is_root", 1), ("created_at", 1), ("_id", 1)), "idx_root_thread_created",
+        used_by=("comments.list_replies_by_root", "comments.list_replies_by_roots", "comments.count_replies_by_root",
+                 "comments.count_replies_by_roots", "comments.delete_root_thread"),
+    ),
+    # unique: registration and renames rely on DuplicateKeyError, not on the read before the write
+    IndexSpec("users", (("email", 1),), "uniq_email", used_by=("users.find_by_email", "users.insert_user"), unique=True),
+    IndexSpec(
+        "users", (("username", 1),), "uniq_username",
+        used_by=("users.find_by_username", "users.insert_user", "users.update_user_info"),
+        unique=True,
+    ),
+    # prefix matches in relevance order; also scanned (hinted) for substring matches
+    IndexSpec(
+        "users", tuple(USER_SEARCH_SORT), USER_SEARCH_INDEX,
+        used_by=("users.search_users_by_relevance", "users._find_substring_matches"),
+    ),
+]
+
+# replaced by the indexes above, dropped once those exist
+OBSOLETE_INDEXES: List[Tuple[str, str]] = [
+    ("blogs", "idx_author_created"),
+    ("blogs", "idx_view_count"),
+    ("users", "idx_email"),
+    ("users", "idx_username"),
+]
+
+
+def _page_shape(used_by: str, collection: str, query: dict, sort: List[Tuple[str, int]],
+                bounded: bool = True) -> QueryShape:
+    # what pagination.find_page sends for a page of 10 (its total is a count_documents of query).
+    # bounded: the filter is answered by the index, so only the page is fetched
+    return QueryShape(used_by, collection, query, sort, pipeline=[
+        {"$match": query},
+        {"$sort": dict(sort)},
+        {"$limit": 11},
+    ], max_docs_examined=11 if bounded else None)
+
+
+def _filter_shapes() -> List[QueryShape]:
+    shapes = []
+    for f in BLOG_SORT_FIELDS:
+        for order in SortDirection:
+            sort = blog_filters_sort(f, order)
+            # the second tag of $all and the title regex are checked on the fetched documents
+            for query in ({"tags": {"$all": ["python", "api"]}}, {"title": {"$regex": "pyth", "$options": "i"}}):
+                shapes.append(_page_shape("blogs.find_blogs_by_filters", "blogs", query, sort, bounded=False))
+            shapes.append(_page_shape("blogs.find_blogs_by_filters", "blogs", {}, sort))
+    return shapes
+
+
+def query_shapes(sample: Dict[str, str]) -> List[QueryShape]:
+    """
+    The query shapes to verify, filled with ids of the seeded data (see src.scripts.indexes.seed_sample_data).
+    """
+    blog_id, user_id, root_id = ObjectId(sample["blog_id"]), ObjectId(sample["user_id"]), sample["root_id"]
+    return [
+        QueryShape("blogs.find_blog_by_id", "blogs", {"_id": blog_id}),
+        QueryShape("blogs.find_blogs_by_ids", "blogs", {"_id": {"$in": [blog_id]}}),
+        _page_shape("blogs.list_blogs_by_author", "blogs", {"author_id": sample["user_id"]}, AUTHOR_BLOGS_SORT),
+        QueryShape("blogs.count_blogs_by_author", "blogs", {"author_id": sample["user_id"]}),
+        QueryShape("blogs.list_blogs_by_views", "blogs", {}, [("view_count", -1)]),
+        *_filter_shapes(),
+        QueryShape("blogs.is_blog_liked", "blog_likes", {"blog_id": blog_id, "user_id": user_id, "active": True}),
+        QueryShape("blogs.find_liked_blog_ids", "blog_likes", {"blog_id": {"$in": [blog_id]}, "user_id": user_id, "active": True}),
+        QueryShape("blogs.delete_blog", "blog_likes", {"blog_id": blog_id}),
+        QueryShape(
+            "trending._full_refresh", "blogs",
+            {"created_at": {"$gte": datetime(2024, 1, 1)}, "view_count": {"$gt": 0}},
+        ),
+        QueryShape("leaderboard.rebuild_leaderboard", "blogs", {"view_count": {"$gt": 0}}),
+        _page_shape(
+            "comments.list_root_comments_by_blog", "comments", {"blog_id": sample["blog_id"], "is_root": True}, COMMENTS_SORT
+        ),
+        _page_shape("comments.list_replies_by_root", "comments", {"root_id": root_id, "is_root": False}, COMMENTS_SORT),
+        # the pipeline its $lookup runs for every root
+        _page_shape("comments.list_replies_by_roots", "comments", {"root_id": root_id, "is_root": False}, COMMENTS_SORT),
+        QueryShape("comments.delete_root_thread", "comments", {"root_id": root_id}),
+        QueryShape("users.find_by_email", "users", {"email": "user1@example.com"}),
+        QueryShape("users.find_by_username", "users", {"username": "user1"}),
+        _page_shape(
+            "users.search_users_by_relevance", "users",
+            {"username_len": {"$gte": 4}, "username_lower": {"$regex": "^user"}}, USER_SEARCH_SORT,
+        ),
+    ]
+
+
+async def apply_indexes(db: AsyncIOMotorDatabase, replace_conflicting: bool = False) -> List[str]:
+    """
+    Create the missing indexes (existing ones are left untouched) and drop the obsolete ones.
+    An index whose name is taken by a different definition is reported, and rebuilt
+    when replace_conflicting is set. An index that can't be built (e.g. a unique index over
+    duplicates) is reported, and the obsolete indexes of its collection are kept.
+    Return the names of the created indexes.
+    """
+    created = []
+    failed_colls = set()
+    existing_by_coll = {}
+    for spec in INDEXES:
+        if spec.collection not in existing_by_coll:
+            existing_by_coll[spec.collection] = await db[spec.collection].index_information()
+        existing = existing_by_coll[spec.collection].get(spec.name)
+        if existing:
+            same = tuple(tuple(k) for k in existing["key"]) == spec.keys and bool(existing.get("unique")) == spec.unique
+            if same:
+                continue
+            if not replace_conflicting:
+                logger.warning("Index %s.%s differs from its declaration, run the index CLI to rebuild it",
+                               spec.collection, spec.name)
+                continue
+            await db[spec.collection].drop_index(spec.name)
+
+        # background is ignored by MongoDB >= 4.2, whose builds only lock briefly at start and end
+        try:
+            await db[spec.collection].create_index(
+                list(spec.keys), name=spec.name, unique=spec.unique, background=True
+            )
+        except OperationFailure as e:
+            logger.error("Could not create index %s.%s: %s", spec.collection, spec.name, e)
+            failed_colls.add(spec.collection)
+            continue
+        created.append(spec.name)
+        logger.info("Created index %s.%s", spec.collection, spec.name)
+
+    for collection, name in OBSOLETE_INDEXES:
+        if collection in failed_colls:
+            continue
+        try:
+            await db[collection].drop_index(name)
+            logger.info("Dropped obsolete index %s.%s", collection, name)
+        except OperationFailure:
+            pass
+    return created
+
+
+def _plan_stages(explain: dict) -> List[str]:
+    """
+    Names of all the stages of an explain() output, including in-memory $sort stages of a pipeline.
+    """
+    stages = []
+
+    def walk(node):
+        if isinstance(node, dict):
+            if isinstance(node.get("stage"), str):
+                stages.append(node["stage"])
+            if "$sort" in node:
+                stages.append("SORT")
+            for key, value in node.items():
+                # rejected plans were not run, command echoes the request
+                if key not in ("rejectedPlans", "command", "originalCommand"):
+                    walk(value)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+
+    walk(explain)
+    return stages
+
+
+def _docs_examined(explain: dict) -> int:
+    """
+    Largest totalDocsExamined / docsExamined of the executed plan (the aggregate explain nests it
+    per stage).
+    """
+    found = [0]
+
+    def walk(node):
+        if isinstance(node, dict):
+            for key, value in node.items():
+                if key in ("totalDocsExamined", "docsExamined") and isinstance(value, int):
+                    found.append(value)
+                elif key not in ("rejectedPlans", "allPlansExecution", "command", "originalCommand"):
+                    walk(value)
+        elif isinstance(node, list):
+            for item in node:
+                walk(item)
+
+    walk(explain)
+    return max(found)
+
+
+async def explain_shape(db: AsyncIOMotorDatabase, shape: QueryShape) -> dict:
+    if shape.pipeline is not None:
+        command = {"aggregate": shape.collection, "pipeline": shape.pipeline, "cursor": {}}
+    else:
+        command = {"find": shape.collection, "filter": shape.filter, "limit": 11}
+        if shape.sort:
+            command["sort"] = dict(shape.sort)
+    # executionStats runs the plan, for the documents it examined
+    return await db.command("explain", command, verbosity="executionStats")
+
+
+async def verify_plans(db: AsyncIOMotorDatabase, sample: Dict[str, str]) -> List[str]:
+    """
+    explain() every query shape, return one message per shape whose plan scans
+    the collection (COLLSCAN), sorts in memory (SORT) or fetches more than max_docs_examined documents.
+    """
+    failures = []
+    for shape in query_shapes(sample):
+        explain = await explain_shape(db, shape)
+        stages = _plan_stages(explain)
+        bad = sorted({s for s in stages if s in ("COLLSCAN", "SORT") and s not in shape.allowed})
+        if shape.max_docs_examined is not None:
+            examined = _docs_examined(explain)
+            if examined > shape.max_docs_examined:
+                bad.append(f"{examined} documents examined (max {shape.max_docs_examined})")
+        if bad:
+            failures.append(f"{shape.used_by} on {shape.collection} {shape.filter or shape.pipeline}: {', '.join(bad)}")
+    return failures
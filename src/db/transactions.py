@@ -0,0 +1,53 @@
+# src/db/transactions.py
+"""
+Multi-document writes (a document and the counters derived from it) run in a transaction when
+the deployment supports them (replica set or sharded cluster), and as plain sequential writes
+on a standalone mongod.
+"""
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from motor.motor_asyncio import AsyncIOMotorClientSession, AsyncIOMotorDatabase
+
+from src.core.config import MONGO_TRANSACTIONS
+from src.logger import get_logger
+
+T = TypeVar("T")
+
+logger = get_logger()
+
+_supported: Optional[bool] = None
+
+
+async def transactions_supported(db: AsyncIOMotorDatabase) -> bool:
+    """
+    MONGO_TRANSACTIONS "on"/"off" forces the answer, "auto" asks the server once.
+    """
+    global _supported
+    if _supported is None:
+        if MONGO_TRANSACTIONS in ("on", "off"):
+            _supported = MONGO_TRANSACTIONS == "on"
+        else:
+            try:
+                hello = await db.client.admin.command("hello")
+                _supported = bool(hello.get("setName")) or hello.get("msg") == "isdbgrid"
+            except Exception as e:
+                logger.warning(f"Could not detect transaction support, writing without: {e}")
+                _supported = False
+        logger.info("MongoDB transactions %s", "enabled" if _supported else "disabled")
+    return _supported
+
+
+async def run_in_transaction(
+    db: AsyncIOMotorDatabase,
+    fn: Callable[[Optional[AsyncIOMotorClientSession]], Awaitable[T]],
+) -> T:
+    """
+    Await fn(session) inside a transaction, or fn(None) when transactions are not supported.
+    fn must pass session= to each of its operations and run them one after the other
+    (a session is not safe for concurrent use). It is retried on transient errors,
+    so it must not have side effects outside MongoDB.
+    """
+    if not await transactions_supported(db):
+        return await fn(None)
+    async with await db.client.start_session() as session:
+        return await session.with_transaction(fn)
@@ -1,10 +1,18 @@
 # src/logger.py
+import atexit
 import logging
+import queue
 import sys
+import threading
+import time
 from pathlib import Path
 from logging import handlers
+from typing import List, Optional
 from pythonjsonlogger import jsonlogger
 
+from src.core.config import LOG_QUEUE_SIZE, LOG_RATE_PER_SECOND, LOG_RATE_BURST
+from src.utils.metrics import LOG_RECORDS_DROPPED
+
 LOG_DIR = Path(__file__).parent.parent / "logs"
 LOG_DIR.mkdir(parents=True, exist_ok=True)
 DEFAULT_LOGFILE = LOG_DIR / "app.log"
@@ -17,28 +25,134 @@ LEVELS = {
     'critical': logging.CRITICAL
 }
 
-def setup_logging(filename: str | Path = DEFAULT_LOGFILE, level: str = 'info', when: str = 'D', backup_count: int = 7):
+_listener: Optional[handlers.QueueListener] = None
 
-    root_name = "blogapp"
-    root = logging.getLogger(root_name)
-    if root.handlers:
-        return root
 
-    log_level = LEVELS.get(level, logging.DEBUG)
-    root.setLevel(log_level)
-    root.propagate = False
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket per (logger, message template, level): each one passes rate times a second, in
+    bursts of burst, the rest is dropped and counted. The next record let through says how many
+    were dropped. Records at or above max_level (warnings and errors by default) always pass.
+    Keyed by the template, so "id=%s" is one message for every id; an f-string makes one per value,
+    the buckets are then cleared past max_keys.
+    """
 
+    def __init__(self, rate: float = LOG_RATE_PER_SECOND, burst: int = LOG_RATE_BURST,
+                 max_level: int = logging.WARNING, max_keys: int = 10000):
+        super().__init__()
+        self.rate = rate
+        self.burst = burst
+        self.max_level = max_level
+        self.max_keys = max_keys
+        # Key: (logger name, msg, level), Value: [tokens, last refill, dropped]
+        self._buckets = {}
+        self._lock = threading.Lock()
+        self._dropped = LOG_RECORDS_DROPPED.labels("rate_limited")
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.max_level:
+            return True
+        key = (record.name, record.msg, record.levelno)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                if len(self._buckets) >= self.max_keys:
+                    self._buckets.clear()
+                bucket = self._buckets[key] = [self.burst, now, 0]
+            else:
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+            if bucket[0] < 1:
+                bucket[2] += 1
+                self._dropped.inc()
+                return False
+            bucket[0] -= 1
+            dropped, bucket[2] = bucket[2], 0
+        if dropped:
+            record.suppressed = dropped
+        return True
+
+
+class NonBlockingQueueHandler(handlers.QueueHandler):
+    """
+    Puts the records on the queue of the writer thread, never waits: a record is dropped (and
+    counted) when the queue is full. Only the message is rendered here, with its arguments as they
+    are now; the formatters, the exception text and the I/O run on the QueueListener thread.
+    """
+
+    def __init__(self, records: queue.Queue):
+        super().__init__(records)
+        self._dropped = LOG_RECORDS_DROPPED.labels("queue_full")
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        message = record.getMessage()
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            message = f"{message} ({suppressed} similar messages suppressed)"
+        record.msg = message
+        record.args = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self._dropped.inc()
+
+
+def build_handlers(filename: str | Path = DEFAULT_LOGFILE, when: str = 'D', backup_count: int = 7,
+                   stream=None) -> List[logging.Handler]:
+    """
+    The handlers doing the formatting and the writing: stdout in plain text, a daily rotated file
+    in JSON (for ELK).
+    """
     # Console handler (stdout)
     console_fmt = logging.Formatter('[%(asctime)s] %(levelname)s [%(name)s] %(message)s', datefmt="%Y-%m-%d %H:%M:%S")
-    sh = logging.StreamHandler(sys.stdout)
+    sh = logging.StreamHandler(stream or sys.stdout)
     sh.setFormatter(console_fmt)
-    root.addHandler(sh)
 
     # File handler (JSON) - for ELK
     json_fmt = jsonlogger.JsonFormatter('%(asctime)s %(levelname)s %(name)s %(filename)s %(lineno)d %(message)s')
     th = handlers.TimedRotatingFileHandler(filename=str(filename), when=when, backupCount=backup_count, encoding='utf-8')
     th.setFormatter(json_fmt)
-    root.addHandler(th)
+    return [sh, th]
+
+
+def build_queue_pipeline(target_handlers: List[logging.Handler], queue_size: int = LOG_QUEUE_SIZE,
+                         rate_limit: Optional[RateLimitFilter] = None):
+    """
+    (QueueHandler for the loggers, started QueueListener writing to target_handlers).
+    """
+    records = queue.Queue(maxsize=queue_size)
+    qh = NonBlockingQueueHandler(records)
+    if rate_limit is not None:
+        qh.addFilter(rate_limit)
+    listener = handlers.QueueListener(records, *target_handlers, respect_handler_level=True)
+    listener.start()
+    return qh, listener
+
+
+def setup_logging(filename: str | Path = DEFAULT_LOGFILE, level: str = 'info', when: str = 'D', backup_count: int = 7):
+    """
+    The loggers of the app only put their records on a queue; a QueueListener thread formats them
+    and writes them out, so a log call costs the event loop no formatting and no I/O.
+    """
+    global _listener
+
+    root_name = "blogapp"
+    root = logging.getLogger(root_name)
+    if root.handlers:
+        return root
+
+    log_level = LEVELS.get(level, logging.DEBUG)
+    root.setLevel(log_level)
+    root.propagate = False
+
+    qh, _listener = build_queue_pipeline(build_handlers(filename, when, backup_count), rate_limit=RateLimitFilter())
+    root.addHandler(qh)
+    # what is still queued is written before the process exits
+    atexit.register(shutdown_logging)
 
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
     logging.getLogger("uvicorn.error").setLevel(logging.WARNING)
@@ -46,6 +160,17 @@ def setup_logging(filename: str | Path = DEFAULT_LOGFILE, level: str = 'info', w
 
     return root
 
+
+def shutdown_logging() -> None:
+    """
+    Write the queued records and stop the writer thread.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
 def get_logger(name: str = None, level: str = 'info') -> logging.Logger:
 
     root_name = "blogapp"
@@ -3,44 +3,67 @@ from src.db.mongo import db, init_indexes
 from src.api.routes import router as api_router
 from src.logger import logger,setup_logging
 from fastapi.middleware.cors import CORSMiddleware
-from time import time
-from fastapi import FastAPI, Request
+from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from contextlib import asynccontextmanager
-from src.api.blogs.service import get_hottest_tags
+from prometheus_client import make_asgi_app
+from src.utils.http_metrics import HTTPMetricsMiddleware
+from src.utils.db_stats import DBStatsMiddleware
+from src.core.jobs import JobRunner
+from src.api.blogs.service import (
+    ensure_tag_counters, flush_view_counts, refresh_trending_feed, ensure_view_leaderboard,
+    ensure_search_index,
+)
+from src.api.users.service import ensure_user_filters
+from src.api.users.utils import shutdown_password_pool
+from src.core.config import (
+    VIEW_COUNTER_MODE, VIEW_FLUSH_INTERVAL_SECONDS,
+    TRENDING_REFRESH_SECONDS, USER_BLOOM_CHECK_SECONDS, LEADERBOARD_CHECK_SECONDS,
+)
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    scheduler.add_job(
-        get_hottest_tags,
-        'interval',
-        minutes=10,
-        id='calc_hot_tags',
-        replace_existing=True,
-        misfire_grace_time=60
-    )
+    # every worker schedules the jobs, a Redis lease per job lets one instance run each of them
+    if VIEW_COUNTER_MODE == "buffered":
+        jobs.every(flush_view_counts, name="flush_view_counts", seconds=VIEW_FLUSH_INTERVAL_SECONDS)
+
+    # trending feed: rescore dirty blogs often, and apply the time decay to everything every
+    # TRENDING_FULL_REFRESH_MINUTES; one job, under one lease, so the two never overlap
+    jobs.every(refresh_trending_feed, name="refresh_trending", seconds=TRENDING_REFRESH_SECONDS)
 
-    from datetime import datetime, timedelta
-    scheduler.add_job(
-        get_hottest_tags,
-        'date',
-        run_date=datetime.now() + timedelta(seconds=1),
-        id='calc_hot_tags_immediate'
-    )
+    # view leaderboard: rebuilt when Redis lost it (the views counted since only make a partial one)
+    jobs.every(ensure_view_leaderboard, name="ensure_view_leaderboard", seconds=LEADERBOARD_CHECK_SECONDS)
+
+    # username / email filters: rebuilt when a failed add invalidated them
+    jobs.every(ensure_user_filters, name="ensure_user_filters", seconds=USER_BLOOM_CHECK_SECONDS)
+
+    # startup events are not run when a lifespan is given, the indexes are created here
+    logger.info("Initializing MongoDB indexes...")
+    await init_indexes()
+    logger.info("MongoDB indexes initialized")
 
     scheduler.start()
-    try:
-        await get_hottest_tags()
-        print("Initial data loaded to Redis")
-    except Exception as e:
-        print(f"Failed to load initial data: {e}")
+    # cold start rebuilds of the Redis structures, by one worker; failures are logged by the runner
+    await jobs.run_once("ensure_tag_counters", ensure_tag_counters)
+    await jobs.run_once("ensure_view_leaderboard", ensure_view_leaderboard)
+    await jobs.run_once("ensure_search_index", ensure_search_index)
+    await jobs.run_once("ensure_user_filters", ensure_user_filters)
 
     yield
     scheduler.shutdown()
-app = FastAPI(lifespan=lifespan)
+    shutdown_password_pool()
+    if VIEW_COUNTER_MODE == "buffered":
+        # don't lose the views buffered since the last flush
+        await flush_view_counts()
+# orjson for every response still encoded by FastAPI (list endpoints return a ModelResponse)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 scheduler = AsyncIOScheduler()
+jobs = JobRunner(scheduler)
 setup_logging()
 logger.info("Starting app")
 app.include_router(api_router)
+# Prometheus metrics endpoint
+app.mount("/metrics", make_asgi_app())
 origins = [
     "http://localhost:5173",
     "http://127.0.0.1:5173",
@@ -57,20 +80,10 @@ app.add_middleware(
 )
 allow_origins = [],
 
-@app.on_event("startup")
-async def on_startup():
-    logger.info("Initializing MongoDB indexes...")
-    await init_indexes()
-    logger.info("MongoDB indexes initialized")
-
-@app.middleware("http")
-async def add_timing_middleware(request: Request, call_next):
-    start = time()
-    response = await call_next(request)
-    duration = round((time() - start) * 1000, 2)
-    logger.debug(f"{request.method} {request.url.path} took {duration} ms")
-    response.headers["X-Process-Time-ms"] = str(duration)
-    return response
+# MongoDB commands per request: X-DB-Queries / X-DB-Time-ms headers, N+1 warnings
+app.add_middleware(DBStatsMiddleware)
+# latency / status / size metrics per route template and the X-Process-Time-ms header
+app.add_middleware(HTTPMetricsMiddleware)
 
 @app.get("/")
 def read_root():
@@ -0,0 +1,52 @@
+# src/scripts/backfill_username_search.py
+"""
+Store the username search fields (username_lower, username_len) on users created before they existed.
+
+usage: python -m src.scripts.backfill_username_search [--batch-size 1000]
+
+They are written with every username insert / update; users without them are not found by
+/search/users. Users missing them are scanned by _id in batches, each batch written with
+one bulk_write. The script can be re-run safely.
+"""
+import argparse
+import asyncio
+
+from pymongo import UpdateOne
+
+from src.api.users.repository import username_search_fields
+from src.db.mongo import db
+from src.logger import get_logger
+
+logger = get_logger()
+
+
+async def backfill(batch_size: int) -> int:
+    total = 0
+    last_id = None
+    while True:
+        query = {"username_lower": {"$exists": False}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        docs = [doc async for doc in db.users.find(query, {"username": 1}).sort("_id", 1).limit(batch_size)]
+        if not docs:
+            return total
+        ops = [
+            UpdateOne({"_id": doc["_id"]}, {"$set": username_search_fields(doc["username"])})
+            for doc in docs if doc.get("username")
+        ]
+        if ops:
+            await db.users.bulk_write(ops, ordered=False)
+        total += len(ops)
+        last_id = docs[-1]["_id"]
+
+
+async def main(batch_size: int) -> None:
+    users = await backfill(batch_size)
+    logger.info("Username search fields stored on %s users", users)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Backfill username_lower / username_len on users")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size))
@@ -0,0 +1,80 @@
+# src/scripts/bench_logging.py
+"""
+Time a request spends on the event loop in log calls, handlers on the logger vs queue pipeline.
+
+usage: python -m src.scripts.bench_logging [--requests 5000]
+
+direct:     the old setup, the stdout and JSON file handlers attached to the logger: every call
+            formats twice and writes twice on the calling thread
+queue:      QueueHandler -> QueueListener (src/logger.py), the calling thread only renders the
+            message; "drain" is the time the listener thread still needed after the last call
+rate limit: queue pipeline with RateLimitFilter, the hot message of every request goes over its limit
+
+A request logs like the comment routes did: two info records with arguments, one with a dict.
+The files are written to a temporary directory.
+"""
+import argparse
+import logging
+import tempfile
+import time
+from pathlib import Path
+
+from src.logger import RateLimitFilter, build_handlers, build_queue_pipeline
+
+DOC = {"_id": "6650c0ffee", "title": "A post about topic 1", "tags": ["python", "fastapi"], "view_count": 1000}
+
+
+def one_request(logger: logging.Logger, i: int) -> None:
+    logger.info("List comments for blog, blog_id=%s (page=%s,size=%s)", "6650c0ffee", i % 10, 10)
+    logger.info("Delete comment request, comment_id=%s, requester=%s", i, "6650beef")
+    logger.info("Get blog detail: %s", DOC)
+
+
+def run(logger: logging.Logger, requests: int) -> float:
+    start = time.perf_counter()
+    for i in range(requests):
+        one_request(logger, i)
+    return (time.perf_counter() - start) / requests * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=5000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp, open(Path(tmp) / "stdout.log", "w") as stream:
+        results = []
+        for name in ("direct", "queue", "rate limit"):
+            logger = logging.getLogger(f"bench.{name}")
+            logger.setLevel(logging.INFO)
+            logger.propagate = False
+            target = build_handlers(Path(tmp) / f"{name}.log", stream=stream)
+            listener = None
+            if name == "direct":
+                for handler in target:
+                    logger.addHandler(handler)
+            else:
+                rate_limit = RateLimitFilter() if name == "rate limit" else None
+                # unbounded: the bench must not drop records to look faster
+                qh, listener = build_queue_pipeline(target, queue_size=0, rate_limit=rate_limit)
+                logger.addHandler(qh)
+
+            caller = run(logger, args.requests)
+            drain = 0.0
+            if listener is not None:
+                start = time.perf_counter()
+                listener.stop()
+                drain = (time.perf_counter() - start) / args.requests * 1e6
+            for handler in target:
+                handler.close()
+            results.append((name, caller, drain))
+
+    print(f"{args.requests} requests, 3 log calls each, microseconds per request")
+    print(f"{'':<12}{'event loop':>12}{'drain':>12}")
+    base = results[0][1]
+    for name, caller, drain in results:
+        print(f"{name:<12}{caller:>12.1f}{drain:>12.1f}   saved on the loop: {base - caller:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,145 @@
+# src/scripts/bench_serialization.py
+"""
+CPU time per request spent building and serializing the list responses, old path vs fast path.
+
+usage: python -m src.scripts.bench_serialization [--rounds 2000]
+
+old:       models built with validation, validated again against response_model by FastAPI,
+           turned into jsonable data and encoded with the stdlib json (JSONResponse)
+fast:      models built with validation, encoded by the precompiled TypeAdapter (ModelResponse)
+construct: models built with model_construct, encoded by the TypeAdapter; kept for reference,
+           the Python loop of model_construct is slower than pydantic-core's validation
+
+No database is needed, the payloads are synthetic and sized like full pages.
+"""
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+from fastapi.routing import serialize_response
+from fastapi.utils import create_model_field
+
+from src.api.comments.schemas import (
+    CommentResponse, RootCommentResponse, CommentListResponse, ReplyListResponse,
+    COMMENT_LIST_ADAPTER, REPLY_LIST_ADAPTER,
+)
+from src.api.search.schemas import SearchBlogPreview, BlogListPage, SearchBlogsResult, SEARCH_BLOGS_ADAPTER
+from src.utils.responses import ModelResponse
+
+NOW = datetime(2025, 1, 1)
+
+
+def _blog_rows(n: int) -> list:
+    return [
+        dict(
+            blog_id=str(ObjectId()), title=f"A post about topic {i}", author_username=f"user{i}",
+            avatar_url="https://example.com/a.png", created_at=NOW - timedelta(hours=i), updated_at=NOW,
+            tags=["python", "fastapi", "mongodb"], view_count=1000 + i, like_count=10 + i,
+            is_liked=bool(i % 2), comment_count=i,
+        )
+        for i in range(n)
+    ]
+
+
+def _comment_row(i: int, root_id: str = None) -> dict:
+    cid = str(ObjectId())
+    return dict(
+        id=cid, blog_id=str(ObjectId()), author_id=str(ObjectId()), author_username=f"user{i}",
+        author_avatar="https://example.com/a.png", content="a comment of average length " * 3,
+        created_at=NOW, is_root=root_id is None, root_id=root_id or cid,
+        parent_id=root_id, reply_to_comment_id=root_id, reply_to_username="someone" if root_id else None,
+        reply_count=5,
+    )
+
+
+def build_search(rows: list, construct: bool):
+    build = SearchBlogPreview.model_construct if construct else SearchBlogPreview
+    page = (BlogListPage.model_construct if construct else BlogListPage)(
+        total=1000, page=1, size=len(rows), items=[build(**r) for r in rows], next_cursor="abc"
+    )
+    return (SearchBlogsResult.model_construct if construct else SearchBlogsResult)(blogs=page)
+
+
+def build_comments(roots: list, replies: dict, construct: bool):
+    reply = CommentResponse.model_construct if construct else CommentResponse
+    root = RootCommentResponse.model_construct if construct else RootCommentResponse
+    items = [
+        root(
+            **r, replies=[reply(**rp) for rp in replies[r["id"]]],
+            replies_page=1, replies_size=5, replies_total=5, replies_has_next=False,
+        )
+        for r in roots
+    ]
+    return (CommentListResponse.model_construct if construct else CommentListResponse)(
+        items=items, page=1, size=len(roots), total=100, has_next=True, next_cursor="abc"
+    )
+
+
+def build_replies(rows: list, construct: bool):
+    reply = CommentResponse.model_construct if construct else CommentResponse
+    return (ReplyListResponse.model_construct if construct else ReplyListResponse)(
+        items=[reply(**rp) for rp in rows], page=1, size=len(rows), total=100, has_next=True, next_cursor="abc"
+    )
+
+
+async def _old(model, value) -> bytes:
+    # what FastAPI does with the return value of an endpoint having a response_model
+    field = _FIELDS.setdefault(model, create_model_field(f"Response_{model.__name__}", model, mode="serialization"))
+    content = await serialize_response(field=field, response_content=value)
+    return JSONResponse(content).body
+
+
+_FIELDS = {}
+
+
+def bench(name: str, model, adapter, build, rounds: int) -> None:
+    loop = asyncio.new_event_loop()
+    try:
+        start = time.process_time()
+        for _ in range(rounds):
+            loop.run_until_complete(_old(model, build(False)))
+        old = (time.process_time() - start) / rounds
+
+        start = time.process_time()
+        for _ in range(rounds):
+            ModelResponse(adapter, build(False))
+        fast = (time.process_time() - start) / rounds
+
+        start = time.process_time()
+        for _ in range(rounds):
+            ModelResponse(adapter, build(True))
+        construct = (time.process_time() - start) / rounds
+    finally:
+        loop.close()
+    print(f"{name:<32} old {old * 1e6:6.0f} us   fast {fast * 1e6:6.0f} us (x{old / fast:.1f})"
+          f"   construct {construct * 1e6:6.0f} us")
+
+
+def main(rounds: int) -> None:
+    blogs10, blogs50 = _blog_rows(10), _blog_rows(50)
+    roots = [_comment_row(i) for i in range(10)]
+    replies = {r["id"]: [_comment_row(j, r["id"]) for j in range(5)] for r in roots}
+    reply_rows = [_comment_row(j, roots[0]["id"]) for j in range(20)]
+
+    # same bytes either way
+    assert SEARCH_BLOGS_ADAPTER.dump_json(build_search(blogs10, True)) == \
+        SEARCH_BLOGS_ADAPTER.dump_json(build_search(blogs10, False))
+
+    bench("/search/blogs size=10", SearchBlogsResult, SEARCH_BLOGS_ADAPTER,
+          lambda construct: build_search(blogs10, construct), rounds)
+    bench("/search/blogs size=50", SearchBlogsResult, SEARCH_BLOGS_ADAPTER,
+          lambda construct: build_search(blogs50, construct), rounds)
+    bench("/comments/blog 10 roots x 5", CommentListResponse, COMMENT_LIST_ADAPTER,
+          lambda construct: build_comments(roots, replies, construct), rounds)
+    bench("/comments/root/replies size=20", ReplyListResponse, REPLY_LIST_ADAPTER,
+          lambda construct: build_replies(reply_rows, construct), rounds)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the response serialization of the list endpoints")
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+    main(args.rounds)
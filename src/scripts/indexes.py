@@ -0,0 +1,145 @@
+# src/scripts/indexes.py
+"""
+Apply the declared MongoDB indexes, or verify that every repository query uses them.
+
+usage:
+    python -m src.scripts.indexes apply [--replace-conflicting]
+    python -m src.scripts.indexes verify [--url mongodb://localhost:27017/] [--db blog_db_index_check] [--keep]
+
+apply creates the missing indexes of src/db/indexes.py on the app database (the app also does
+it at startup) and drops the obsolete ones; --replace-conflicting rebuilds indexes whose
+definition changed.
+
+verify seeds a scratch database on a local mongod, applies the indexes, runs explain() for
+every query shape and exits with status 1 if a plan contains a COLLSCAN or an in-memory SORT, or
+a page query fetches more documents than the page.
+The scratch database is dropped afterwards unless --keep is given.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+
+from src.api.users.repository import username_search_fields
+from src.db.indexes import apply_indexes, verify_plans
+from src.logger import get_logger
+
+logger = get_logger()
+
+APP_DB = "blog_db"
+TAGS = ["python", "api", "mongodb", "redis", "fastapi", "vue", "docker", "testing"]
+
+
+async def seed_sample_data(db: AsyncIOMotorDatabase, blogs: int = 2000, users: int = 200) -> dict:
+    """
+    Insert data shaped like the app's, so the planner sees realistic selectivity.
+    Return ids used to fill the query shapes.
+    """
+    rnd = random.Random(42)
+    now = datetime.utcnow()
+    user_ids = [ObjectId() for _ in range(users)]
+    await db.users.insert_many([
+        {"_id": uid, "username": f"user{i}", "email": f"user{i}@example.com", "password": "x",
+         **username_search_fields(f"user{i}")}
+        for i, uid in enumerate(user_ids)
+    ])
+
+    blog_docs = []
+    for _ in range(blogs):
+        created = now - timedelta(minutes=rnd.randint(0, 200 * 24 * 60))
+        blog_docs.append({
+            "_id": ObjectId(),
+            "title": f"post about {rnd.choice(TAGS)}",
+            "content": "lorem ipsum",
+            "author_id": str(rnd.choice(user_ids)),
+            "created_at": created,
+            "updated_at": created,
+            "tags": rnd.sample(TAGS, 2),
+            "view_count": rnd.randint(0, 5000),
+            "like_count": rnd.randint(0, 300),
+            "comment_count": rnd.randint(0, 50),
+        })
+    await db.blogs.insert_many(blog_docs)
+    blog = blog_docs[0]
+
+    likes = [
+        {"blog_id": b["_id"], "user_id": uid, "active": True, "updated_at": now}
+        for b in blog_docs[:200] for uid in rnd.sample(user_ids, 5)
+    ]
+    await db.blog_likes.insert_many(likes)
+
+    comments = []
+    for b in blog_docs[:300]:
+        for _ in range(3):
+            root_id = ObjectId()
+            comments.append({
+                "_id": root_id, "blog_id": str(b["_id"]), "author_id": str(rnd.choice(user_ids)),
+                "content": "c", "created_at": now, "is_root": True, "root_id": str(root_id), "parent_id": None,
+            })
+            for _ in range(4):
+                comments.append({
+                    "blog_id": str(b["_id"]), "author_id": str(rnd.choice(user_ids)),
+                    "content": "r", "created_at": now, "is_root": False, "root_id": str(root_id),
+                    "parent_id": str(root_id),
+                })
+    await db.comments.insert_many(comments)
+
+    return {
+        "blog_id": str(blog["_id"]),
+        "user_id": blog["author_id"],
+        "root_id": next(c["root_id"] for c in comments if c["blog_id"] == str(blog["_id"])),
+    }
+
+
+async def apply(replace_conflicting: bool) -> None:
+    from src.db.mongo import db
+    created = await apply_indexes(db, replace_conflicting=replace_conflicting)
+    logger.info("Indexes applied, %s created", len(created))
+
+
+async def verify(url: str, db_name: str, keep: bool) -> int:
+    if db_name == APP_DB:
+        logger.error("verify drops its database, use a scratch database, not %s", APP_DB)
+        return 2
+    client = AsyncIOMotorClient(url, serverSelectionTimeoutMS=5000)
+    db = client[db_name]
+    try:
+        await client.drop_database(db_name)
+        sample = await seed_sample_data(db)
+        await apply_indexes(db)
+        failures = await verify_plans(db, sample)
+    finally:
+        if not keep:
+            await client.drop_database(db_name)
+        client.close()
+
+    for failure in failures:
+        print(f"FAIL {failure}")
+    print(f"{len(failures)} query shape(s) without a bounded index plan" if failures else "All query shapes use an index")
+    return 1 if failures else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+    apply_parser = sub.add_parser("apply", help="create the declared indexes on the app database")
+    apply_parser.add_argument("--replace-conflicting", action="store_true")
+    verify_parser = sub.add_parser("verify", help="explain() every query shape against seeded data")
+    verify_parser.add_argument("--url", default=os.getenv("MONGODB_URL", "mongodb://localhost:27017/"))
+    verify_parser.add_argument("--db", default="blog_db_index_check")
+    verify_parser.add_argument("--keep", action="store_true", help="keep the seeded database")
+    args = parser.parse_args()
+
+    if args.command == "apply":
+        asyncio.run(apply(args.replace_conflicting))
+    else:
+        sys.exit(asyncio.run(verify(args.url, args.db, args.keep)))
+
+
+if __name__ == "__main__":
+    main()
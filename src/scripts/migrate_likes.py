@@ -0,0 +1,117 @@
+# src/scripts/migrate_likes.py
+"""
+Move the liked_by arrays embedded in blog documents into the blog_likes collection.
+
+usage: python -m src.scripts.migrate_likes [--batch-size 500] [--repair-counts]
+
+Blogs are scanned by _id and every liked_by array is copied in slices of batch-size,
+so huge arrays are never loaded at once. like_count is then recomputed from blog_likes
+and the array is removed. The script can be re-run safely.
+
+--repair-counts: recompute like_count of every blog from blog_likes instead, e.g. after a
+like toggle failed between its two writes without a transaction. Blogs are counted in batches
+with one aggregation each, only the drifted ones are written.
+"""
+import argparse
+import asyncio
+from datetime import datetime
+
+from pymongo import UpdateOne
+
+from src.api.blogs import cache as blog_cache
+from src.db.mongo import db, init_indexes
+from src.logger import get_logger
+
+logger = get_logger()
+
+
+async def _migrate_blog(blog_id, batch_size: int) -> int:
+    offset = 0
+    now = datetime.utcnow()
+    while True:
+        doc = await db.blogs.find_one({"_id": blog_id}, {"liked_by": {"$slice": [offset, batch_size]}})
+        user_ids = (doc or {}).get("liked_by") or []
+        if not user_ids:
+            break
+        ops = [
+            UpdateOne(
+                {"blog_id": blog_id, "user_id": uid},
+                {"$set": {"active": True}, "$setOnInsert": {"updated_at": now}},
+                upsert=True,
+            )
+            for uid in user_ids
+        ]
+        await db.blog_likes.bulk_write(ops, ordered=False)
+        offset += len(user_ids)
+
+    like_count = await db.blog_likes.count_documents({"blog_id": blog_id, "active": True})
+    await db.blogs.update_one(
+        {"_id": blog_id},
+        {"$set": {"like_count": like_count}, "$unset": {"liked_by": ""}, "$inc": {"version": 1}},
+    )
+    await blog_cache.invalidate_blog_detail(str(blog_id))
+    return offset
+
+
+async def migrate_likes(batch_size: int = 500) -> None:
+    await init_indexes()
+    last_id = None
+    blogs_done = 0
+    likes_done = 0
+    while True:
+        query = {"liked_by": {"$exists": True}}
+        if last_id is not None:
+            query["_id"] = {"$gt": last_id}
+        blogs = await db.blogs.find(query, {"_id": 1}).sort("_id", 1).limit(batch_size).to_list(batch_size)
+        if not blogs:
+            break
+        for blog in blogs:
+            likes_done += await _migrate_blog(blog["_id"], batch_size)
+        blogs_done += len(blogs)
+        last_id = blogs[-1]["_id"]
+        logger.info("Migrated likes of %s blogs (%s likes)", blogs_done, likes_done)
+
+    logger.info("Likes migration finished: %s blogs, %s likes", blogs_done, likes_done)
+
+
+async def repair_like_counts(batch_size: int = 500) -> None:
+    last_id = None
+    blogs_done = 0
+    repaired = 0
+    while True:
+        query = {} if last_id is None else {"_id": {"$gt": last_id}}
+        blog_ids = [doc["_id"] async for doc in db.blogs.find(query, {"_id": 1}).sort("_id", 1).limit(batch_size)]
+        if not blog_ids:
+            break
+        counts = {
+            doc["_id"]: doc["likes"]
+            async for doc in db.blog_likes.aggregate([
+                {"$match": {"blog_id": {"$in": blog_ids}, "active": True}},
+                {"$group": {"_id": "$blog_id", "likes": {"$sum": 1}}},
+            ])
+        }
+        ops = [
+            UpdateOne(
+                {"_id": bid, "like_count": {"$ne": counts.get(bid, 0)}},
+                {"$set": {"like_count": counts.get(bid, 0)}, "$inc": {"version": 1}},
+            )
+            for bid in blog_ids
+        ]
+        result = await db.blogs.bulk_write(ops, ordered=False)
+        if result.modified_count:
+            # cached details hold the old like_count
+            await blog_cache.invalidate_blog_details([str(bid) for bid in blog_ids])
+        repaired += result.modified_count
+        blogs_done += len(blog_ids)
+        last_id = blog_ids[-1]
+        logger.info("Checked like_count of %s blogs (%s repaired)", blogs_done, repaired)
+
+    logger.info("like_count repair finished: %s blogs, %s repaired", blogs_done, repaired)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move blogs.liked_by arrays into blog_likes")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--repair-counts", action="store_true", help="recompute like_count from blog_likes")
+    args = parser.parse_args()
+    asyncio.run(repair_like_counts(args.batch_size) if args.repair_counts else migrate_likes(args.batch_size))
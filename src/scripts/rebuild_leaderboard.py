@@ -0,0 +1,18 @@
+# src/scripts/rebuild_leaderboard.py
+"""
+Rebuild the /blogs/views/hottest leaderboard (Redis sorted set) from MongoDB.
+
+usage: python -m src.scripts.rebuild_leaderboard
+
+Run it after restoring Redis from scratch or to drop deleted blogs from the ranking.
+The app also rebuilds it at startup and every LEADERBOARD_CHECK_SECONDS when it is not built
+(missing, or recreated by the views counted since Redis lost it).
+"""
+import asyncio
+
+from src.api.blogs.leaderboard import rebuild_leaderboard
+from src.db.mongo import db
+
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_leaderboard(db))
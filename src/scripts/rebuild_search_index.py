@@ -0,0 +1,18 @@
+# src/scripts/rebuild_search_index.py
+"""
+Rebuild the full-text blog search index (Redis) from MongoDB.
+
+usage: python -m src.scripts.rebuild_search_index
+
+The index is kept up to date by blog create/edit/delete; run this if it drifted, after
+restoring Redis or after changing the tokenizer or the BM25 settings. Searches fall back
+to MongoDB while it runs. The app also builds it at startup when it is missing.
+"""
+import asyncio
+
+from src.api.blogs.search_index import rebuild_index
+from src.db.mongo import db
+
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_index(db))
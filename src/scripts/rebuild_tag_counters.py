@@ -0,0 +1,17 @@
+# src/scripts/rebuild_tag_counters.py
+"""
+Recompute the per-day hot tag counters (Redis) from MongoDB.
+
+usage: python -m src.scripts.rebuild_tag_counters
+
+The counters are kept up to date by blog create/edit/delete; run this if they drifted
+or after restoring Redis. The app also backfills them at startup when they are missing.
+"""
+import asyncio
+
+from src.api.blogs.tag_counter import rebuild_tag_buckets
+from src.db.mongo import db
+
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_tag_buckets(db))
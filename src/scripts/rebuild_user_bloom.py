@@ -0,0 +1,19 @@
+# src/scripts/rebuild_user_bloom.py
+"""
+Rebuild the username / email bloom filters (Redis) from MongoDB.
+
+usage: python -m src.scripts.rebuild_user_bloom
+
+The filters get every new username and email; run this after restoring Redis, or to drop
+renamed and deleted values. Availability checks go to MongoDB while it runs. The app also
+builds them at startup when they are missing, e.g. after USER_BLOOM_CAPACITY or
+USER_BLOOM_ERROR_RATE changed.
+"""
+import asyncio
+
+from src.api.users.bloom import rebuild_filters
+from src.db.mongo import db
+
+
+if __name__ == "__main__":
+    asyncio.run(rebuild_filters(db))
@@ -0,0 +1,98 @@
+# src/scripts/repair_comment_counters.py
+"""
+Recompute the comment counters from the comments collection.
+
+usage: python -m src.scripts.repair_comment_counters [--batch-size 500]
+
+Sets comment_count and root_comment_count on blogs and reply_count on root comments.
+They are kept up to date by comment create/delete; run this once to backfill existing data,
+or if they drifted. Blogs and root comments are scanned by _id in batches, each batch is
+counted with one aggregation and written with one bulk_write. The script can be re-run safely.
+"""
+import argparse
+import asyncio
+
+from pymongo import UpdateOne
+
+from src.api.blogs import cache as blog_cache
+from src.db.mongo import db
+from src.logger import get_logger
+
+logger = get_logger()
+
+
+async def _batches(collection, query: dict, batch_size: int):
+    last_id = None
+    while True:
+        page_query = dict(query)
+        if last_id is not None:
+            page_query["_id"] = {"$gt": last_id}
+        ids = [doc["_id"] async for doc in collection.find(page_query, {"_id": 1}).sort("_id", 1).limit(batch_size)]
+        if not ids:
+            return
+        yield ids
+        last_id = ids[-1]
+
+
+async def repair_blog_counters(batch_size: int) -> int:
+    total = 0
+    async for blog_ids in _batches(db.blogs, {}, batch_size):
+        counts = {
+            doc["_id"]: doc
+            async for doc in db.comments.aggregate([
+                {"$match": {"blog_id": {"$in": [str(bid) for bid in blog_ids]}}},
+                {"$group": {
+                    "_id": "$blog_id",
+                    "comments": {"$sum": 1},
+                    "roots": {"$sum": {"$cond": ["$is_root", 1, 0]}},
+                }},
+            ])
+        }
+        ops = []
+        for bid in blog_ids:
+            c = counts.get(str(bid), {})
+            ops.append(UpdateOne(
+                {"_id": bid},
+                {
+                    "$set": {"comment_count": c.get("comments", 0), "root_comment_count": c.get("roots", 0)},
+                    "$inc": {"version": 1, "comments_version": 1},
+                },
+            ))
+        await db.blogs.bulk_write(ops, ordered=False)
+        # cached details hold the old comment_count
+        await blog_cache.invalidate_blog_details([str(bid) for bid in blog_ids])
+        total += len(ops)
+    return total
+
+
+async def repair_reply_counters(batch_size: int) -> int:
+    total = 0
+    async for root_ids in _batches(db.comments, {"is_root": True}, batch_size):
+        counts = {
+            doc["_id"]: doc["replies"]
+            async for doc in db.comments.aggregate([
+                {"$match": {"root_id": {"$in": [str(rid) for rid in root_ids]}, "is_root": False}},
+                {"$group": {"_id": "$root_id", "replies": {"$sum": 1}}},
+            ])
+        }
+        ops = [
+            UpdateOne({"_id": rid}, {"$set": {"reply_count": counts.get(str(rid), 0)}})
+            for rid in root_ids
+        ]
+        await db.comments.bulk_write(ops, ordered=False)
+        total += len(ops)
+    return total
+
+
+async def main(batch_size: int) -> None:
+    roots = await repair_reply_counters(batch_size)
+    # after the reply counts: bumping comments_version of the blogs also renews the ETags of their comment lists
+    blogs = await repair_blog_counters(batch_size)
+    logger.info("Comment counters repaired on %s blogs and %s root comments", blogs, roots)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recompute blog and root comment counters")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+    asyncio.run(main(args.batch_size))
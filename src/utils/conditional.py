@@ -0,0 +1,114 @@
+# src/utils/conditional.py
+import hashlib
+import time
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+
+from fastapi import HTTPException, Request, Response, status
+
+from src.core.redis import redis_client
+from src.logger import get_logger
+
+logger = get_logger()
+
+
+def make_etag(*parts) -> str:
+    """
+    A weak ETag over the given parts (ids, versions, query parameters...). Weak: the counters
+    that move on every read (view_count) are not part of it.
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def has_credentials(request: Request) -> bool:
+    return "access_token" in request.cookies or request.headers.get("Authorization", "").startswith("Bearer ")
+
+
+class Conditional:
+    """
+    Conditional GET of one request, built by the conditional() dependency.
+    The service computes the validator of what it is about to return, before the expensive part:
+
+        if cond and cond.validate(etag):
+            raise cond.not_modified()
+
+    The Cache-Control / ETag / Last-Modified headers are put on the response in both cases.
+    Anonymous responses may be stored by shared caches, the ones to a request carrying
+    credentials only by the browser.
+    """
+
+    def __init__(self, request: Request, response: Response, max_age: int, vary_credentials: bool):
+        self.if_none_match = request.headers.get("if-none-match")
+        self.if_modified_since = request.headers.get("if-modified-since")
+        scope = "private" if has_credentials(request) else "public"
+        self.headers = {"Cache-Control": f"{scope}, max-age={max_age}, must-revalidate"}
+        if vary_credentials:
+            # the body depends on the user (e.g. is_liked), an anonymous copy must not be served to them
+            self.headers["Vary"] = "Cookie, Authorization"
+        self._response = response
+        self._response.headers.update(self.headers)
+
+    def validate(self, etag: str, last_modified: Optional[datetime] = None) -> bool:
+        """
+        Set the validators of the response, return True if the client's copy is still fresh.
+        """
+        self.headers["ETag"] = etag
+        if last_modified is not None:
+            if last_modified.tzinfo is None:
+                last_modified = last_modified.replace(tzinfo=timezone.utc)
+            self.headers["Last-Modified"] = format_datetime(last_modified.astimezone(timezone.utc), usegmt=True)
+        self._response.headers.update(self.headers)
+
+        if self.if_none_match is not None:
+            # If-None-Match wins over If-Modified-Since, compared weakly
+            if self.if_none_match.strip() == "*":
+                return True
+            opaque = etag.removeprefix("W/")
+            return any(tag.strip().removeprefix("W/") == opaque for tag in self.if_none_match.split(","))
+        if self.if_modified_since is not None and last_modified is not None:
+            try:
+                since = parsedate_to_datetime(self.if_modified_since)
+            except (TypeError, ValueError):
+                return False
+            # HTTP dates have a one second resolution
+            return last_modified.replace(microsecond=0) <= since
+        return False
+
+    def not_modified(self) -> HTTPException:
+        return HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=dict(self.headers))
+
+
+def conditional(max_age: int = 0, vary_credentials: bool = False):
+    """
+    Dependency giving the endpoint a Conditional. max_age is how long a client may reuse
+    a response without asking again, 0 to revalidate every time.
+    """
+    def dependency(request: Request, response: Response) -> Conditional:
+        return Conditional(request, response, max_age, vary_credentials)
+    return dependency
+
+
+async def get_generation(key: str) -> Optional[int]:
+    """
+    Current value of a Redis counter bumped on every change of a set of documents (e.g. every
+    profile edit), for the ETags of lists that show them. None if Redis can't tell: no ETag then.
+    """
+    try:
+        value = await redis_client.get(key)
+        if value is None:
+            # not 0: a counter that restarted would repeat values already used in ETags
+            await redis_client.set(key, time.time_ns(), nx=True)
+            value = await redis_client.get(key)
+        return int(value)
+    except Exception as e:
+        logger.error(f"Failed to read generation {key}: {e}")
+        return None
+
+
+async def bump_generation(key: str) -> None:
+    try:
+        await redis_client.incr(key)
+    except Exception as e:
+        logger.error(f"Failed to bump generation {key}: {e}")
@@ -0,0 +1,143 @@
+# src/utils/db_stats.py
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import List, Optional, Tuple
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.core.config import DB_QUERY_WARN_THRESHOLD, DB_REPEAT_WARN_THRESHOLD
+from src.logger import get_logger
+from src.utils.http_metrics import route_template
+from src.utils.metrics import HTTP_REQUEST_DB_QUERIES, DB_QUERY_WARNINGS
+
+logger = get_logger()
+
+
+class DBStats:
+    """
+    The MongoDB commands issued on behalf of one request (or one query_budget block),
+    filled by MongoQueryMonitor from the driver threads (list.append is atomic).
+    """
+
+    def __init__(self):
+        # (shape, duration in microseconds)
+        self.commands: List[Tuple[str, int]] = []
+
+    def add(self, shape: str, duration_micros: int) -> None:
+        self.commands.append((shape, duration_micros))
+
+    @property
+    def count(self) -> int:
+        return len(self.commands)
+
+    @property
+    def time_ms(self) -> float:
+        return sum(duration for _, duration in self.commands) / 1000
+
+    def repeated(self, threshold: int = DB_REPEAT_WARN_THRESHOLD) -> List[Tuple[str, int]]:
+        """
+        The shapes issued at least threshold times, most repeated first. getMore is the
+        iteration of one cursor, not a loop of queries.
+        """
+        counts = Counter(shape for shape, _ in self.commands if not shape.startswith("getMore "))
+        return [(shape, n) for shape, n in counts.most_common() if n >= threshold]
+
+
+_current: ContextVar[Optional[DBStats]] = ContextVar("db_stats", default=None)
+
+
+def current_db_stats() -> Optional[DBStats]:
+    return _current.get()
+
+
+class DBStatsMiddleware:
+    """
+    Count the MongoDB commands of each HTTP request: X-DB-Queries / X-DB-Time-ms response headers,
+    http_request_db_queries per route, and a warning when a route goes over DB_QUERY_WARN_THRESHOLD
+    commands or repeats a command shape DB_REPEAT_WARN_THRESHOLD times (a query in a loop).
+    Motor copies the context into its threads, so the commands reach the DBStats set here.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        root_path = scope.get("root_path", "")
+        stats = DBStats()
+        token = _current.set(stats)
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = MutableHeaders(scope=message)
+                headers.append("X-DB-Queries", str(stats.count))
+                headers.append("X-DB-Time-ms", f"{stats.time_ms:.2f}")
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = route_template(scope, root_path)
+            HTTP_REQUEST_DB_QUERIES.labels(route).observe(stats.count)
+            if stats.count > DB_QUERY_WARN_THRESHOLD:
+                DB_QUERY_WARNINGS.labels(route, "budget").inc()
+                logger.warning(
+                    "%s %s issued %s MongoDB commands (%.2f ms), over the budget of %s",
+                    scope["method"], route, stats.count, stats.time_ms, DB_QUERY_WARN_THRESHOLD,
+                )
+            repeated = stats.repeated()
+            if repeated:
+                DB_QUERY_WARNINGS.labels(route, "repeat").inc()
+                logger.warning(
+                    "%s %s repeated MongoDB commands, N+1? %s",
+                    scope["method"], route, "; ".join(f"{n}x {shape}" for shape, n in repeated),
+                )
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@contextmanager
+def query_budget(max_queries: int, max_repeats: Optional[int] = None):
+    """
+    Test helper: fail if the code awaited in the block issues more than max_queries MongoDB
+    commands, or (with max_repeats) the same command shape more than max_repeats times.
+
+        with query_budget(3):
+            await comment_service.get_comments_for_blog(blog_id, page=1, size=10)
+
+    Over HTTP (the app runs in another context), use assert_query_budget on the response.
+    """
+    stats = DBStats()
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+    if stats.count > max_queries:
+        raise QueryBudgetExceeded(
+            f"{stats.count} MongoDB commands, budget {max_queries}: "
+            + ", ".join(shape for shape, _ in stats.commands)
+        )
+    if max_repeats is not None:
+        repeated = stats.repeated(max_repeats + 1)
+        if repeated:
+            raise QueryBudgetExceeded(f"Repeated MongoDB commands: {repeated}")
+
+
+def assert_query_budget(response, max_queries: int) -> None:
+    """
+    Test helper for a response of the app (e.g. from TestClient), read from X-DB-Queries.
+    """
+    count = int(response.headers["X-DB-Queries"])
+    if count > max_queries:
+        raise QueryBudgetExceeded(
+            f"{response.request.method} {response.request.url.path}: {count} MongoDB commands, budget {max_queries}"
+        )
@@ -0,0 +1,80 @@
+# src/utils/http_metrics.py
+import time
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from src.logger import get_logger
+from src.utils.metrics import (
+    HTTP_REQUEST_DURATION, HTTP_REQUESTS, HTTP_REQUESTS_IN_PROGRESS, HTTP_REQUEST_SIZE, HTTP_RESPONSE_SIZE,
+)
+
+logger = get_logger()
+
+
+def route_template(scope: Scope, root_path: str) -> str:
+    """
+    The template of the route that handled the request (/blogs/{blog_id}), the prefix of a mounted
+    app (/metrics), or "unmatched": raw paths would make a label value per blog id.
+    """
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    mounted = scope.get("root_path", "")
+    if mounted != root_path:
+        return mounted[len(root_path):]
+    return "unmatched"
+
+
+class HTTPMetricsMiddleware:
+    """
+    Latency, status, in-flight and body size metrics of every HTTP request, labelled by the
+    matched route template, plus the X-Process-Time-ms header (time until the response started).
+    Plain ASGI: the body is streamed through, not buffered as with BaseHTTPMiddleware.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        root_path = scope.get("root_path", "")
+        start = time.perf_counter()
+        request_size = 0
+        response_size = 0
+        status = 500
+
+        async def receive_wrapper() -> Message:
+            nonlocal request_size
+            message = await receive()
+            if message["type"] == "http.request":
+                request_size += len(message.get("body", b""))
+            return message
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, response_size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                duration_ms = round((time.perf_counter() - start) * 1000, 2)
+                MutableHeaders(scope=message).append("X-Process-Time-ms", str(duration_ms))
+            elif message["type"] == "http.response.body":
+                response_size += len(message.get("body", b""))
+            await send(message)
+
+        in_progress = HTTP_REQUESTS_IN_PROGRESS.labels(method)
+        in_progress.inc()
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        finally:
+            in_progress.dec()
+            duration = time.perf_counter() - start
+            route = route_template(scope, root_path)
+            HTTP_REQUEST_DURATION.labels(method, route).observe(duration)
+            HTTP_REQUESTS.labels(method, route, str(status)).inc()
+            HTTP_REQUEST_SIZE.labels(method, route).observe(request_size)
+            HTTP_RESPONSE_SIZE.labels(method, route).observe(response_size)
+            logger.debug("%s %s (%s) took %.2f ms", method, scope["path"], route, duration * 1000)
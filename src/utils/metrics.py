@@ -0,0 +1,147 @@
+# src/utils/metrics.py
+from prometheus_client import Counter, Gauge, Histogram
+
+# Application metrics, exported on /metrics (see main.py)
+
+BLOG_DETAIL_CACHE = Counter(
+    "blog_detail_cache_requests_total",
+    "Blog detail cache lookups",
+    ["result"],
+)
+
+PASSWORD_HASH_QUEUE_WAIT = Histogram(
+    "password_hash_queue_wait_seconds",
+    "Time a password hash waited for a worker of the pool",
+    ["op"],
+)
+PASSWORD_HASH_DURATION = Histogram(
+    "password_hash_duration_seconds",
+    "Time spent hashing or verifying a password in the pool",
+    ["op"],
+)
+PASSWORD_HASH_PENDING = Gauge(
+    "password_hash_pending",
+    "Password hashes queued or running in the pool",
+)
+PASSWORD_HASH_REJECTED = Counter(
+    "password_hash_rejected_total",
+    "Password hashes refused with a 429 because the pool was saturated",
+    ["op"],
+)
+
+# MongoDB commands, from the command listener (src/utils/monitor.py)
+MONGO_COMMAND_DURATION = Histogram(
+    "mongo_command_duration_seconds",
+    "Duration of MongoDB commands as seen by the driver",
+    ["command", "collection", "status"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10),
+)
+MONGO_COMMAND_ERRORS = Counter(
+    "mongo_command_errors_total",
+    "MongoDB commands that failed",
+    ["command", "collection", "code"],
+)
+MONGO_SLOW_COMMANDS = Counter(
+    "mongo_slow_commands_total",
+    "MongoDB commands slower than MONGO_SLOW_QUERY_MS",
+    ["command", "collection"],
+)
+
+# Motor connection pool, from the pool listener (src/utils/monitor.py)
+MONGO_POOL_CONNECTIONS = Gauge(
+    "mongo_pool_connections",
+    "Open connections of the pool",
+    ["address"],
+)
+MONGO_POOL_CHECKED_OUT = Gauge(
+    "mongo_pool_checked_out_connections",
+    "Connections of the pool in use by an operation",
+    ["address"],
+)
+MONGO_POOL_WAITING = Gauge(
+    "mongo_pool_waiting_operations",
+    "Operations waiting for a connection of the pool",
+    ["address"],
+)
+MONGO_POOL_CHECKOUT_WAIT = Histogram(
+    "mongo_pool_checkout_wait_seconds",
+    "Time an operation waited to get a connection (queue and connection setup)",
+    ["address"],
+    buckets=(0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5),
+)
+MONGO_POOL_CHECKOUT_FAILED = Counter(
+    "mongo_pool_checkout_failed_total",
+    "Connection check outs that failed (timeout, pool closed, connection error)",
+    ["address", "reason"],
+)
+
+# HTTP requests, from HTTPMetricsMiddleware (src/utils/http_metrics.py); route is the matched
+# template (/blogs/{blog_id}), "unmatched" for requests no route matched
+HTTP_REQUEST_DURATION = Histogram(
+    "http_request_duration_seconds",
+    "Time from receiving a request to the end of its response",
+    ["method", "route"],
+    buckets=(0.0025, 0.005, 0.01, 0.025, 0.05, 0.075, 0.1, 0.25, 0.5, 0.75, 1, 2.5, 5, 10),
+)
+HTTP_REQUESTS = Counter(
+    "http_requests_total",
+    "HTTP requests by response status",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_PROGRESS = Gauge(
+    "http_requests_in_progress",
+    "HTTP requests being handled",
+    ["method"],
+)
+HTTP_REQUEST_SIZE = Histogram(
+    "http_request_size_bytes",
+    "Size of the request bodies",
+    ["method", "route"],
+    buckets=(0, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000),
+)
+HTTP_RESPONSE_SIZE = Histogram(
+    "http_response_size_bytes",
+    "Size of the response bodies",
+    ["method", "route"],
+    buckets=(0, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000),
+)
+
+# MongoDB commands per HTTP request, from DBStatsMiddleware (src/utils/db_stats.py)
+HTTP_REQUEST_DB_QUERIES = Histogram(
+    "http_request_db_queries",
+    "MongoDB commands issued by one request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 20, 50, 100),
+)
+DB_QUERY_WARNINGS = Counter(
+    "db_query_warnings_total",
+    "Requests over the command budget (kind=budget) or repeating a command shape (kind=repeat)",
+    ["route", "kind"],
+)
+
+# logging pipeline (src/logger.py): records not written, because the queue to the writer thread
+# was full (reason=queue_full) or the message went over its rate limit (reason=rate_limited)
+LOG_RECORDS_DROPPED = Counter(
+    "log_records_dropped_total",
+    "Log records not written",
+    ["reason"],
+)
+
+# background jobs run by the JobRunner (src/core/jobs.py); outcome: success, failed,
+# skipped_lease (another instance holds the lease), skipped_overlap (still running here)
+JOB_RUNS = Counter(
+    "job_runs_total",
+    "Background job runs",
+    ["job", "outcome"],
+)
+JOB_DURATION = Histogram(
+    "job_duration_seconds",
+    "Duration of the background job runs",
+    ["job", "outcome"],
+    buckets=(0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300, 900),
+)
+JOB_LAST_SUCCESS = Gauge(
+    "job_last_success_timestamp_seconds",
+    "Unix time of the last successful run of the job in this process",
+    ["job"],
+)
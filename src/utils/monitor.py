@@ -1,44 +1,170 @@
 import logging
-from pymongo.monitoring import CommandListener
+import threading
+import time
+from pymongo.monitoring import CommandListener, ConnectionPoolListener
+from src.core.config import MONGO_SLOW_QUERY_MS
 from src.logger import get_logger
+from src.utils.db_stats import current_db_stats
+from src.utils.query_shapes import command_shape, query_shapes
+from src.utils.metrics import (
+    MONGO_COMMAND_DURATION, MONGO_COMMAND_ERRORS, MONGO_SLOW_COMMANDS,
+    MONGO_POOL_CONNECTIONS, MONGO_POOL_CHECKED_OUT, MONGO_POOL_WAITING,
+    MONGO_POOL_CHECKOUT_WAIT, MONGO_POOL_CHECKOUT_FAILED,
+)
 logger = get_logger(level='warning')
 
+# commands started and not finished yet: a command whose end event never comes is dropped after
+# IN_FLIGHT_TTL_SECONDS, or when more than IN_FLIGHT_MAX are waiting
+IN_FLIGHT_MAX = 10000
+IN_FLIGHT_TTL_SECONDS = 300
+
+
+class _InFlight:
+    """
+    request_id -> what started() kept, bounded. Entries are in insertion (so start) order,
+    each put() drops the oldest one if it is over the size or the age limit.
+    """
+
+    def __init__(self, maxsize: int = IN_FLIGHT_MAX, ttl: float = IN_FLIGHT_TTL_SECONDS):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def put(self, key, value) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = (now, value)
+            oldest = next(iter(self._entries))
+            if len(self._entries) > self.maxsize or self._entries[oldest][0] < now - self.ttl:
+                del self._entries[oldest]
+
+    def pop(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+        return entry[1] if entry is not None else None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
 
 class MongoQueryMonitor(CommandListener):
-    def __init__(self):
-        # Key: request_id, Value: command_document
-        self._commands = {}
+    """
+    Feed mongo_command_duration_seconds (by command, collection, status), count the failed and
+    the slow commands, log the slow ones. The driver calls it on every command, so started()
+    only keeps the collection name and the labelled metrics are looked up once per label set.
+    Every command is aggregated by shape (values stripped) for /debug/queries/top, and the ones
+    issued within a request are also added to its DBStats (src/utils/db_stats.py).
+    """
+
+    def __init__(self, slow_ms: float = MONGO_SLOW_QUERY_MS):
+        # Key: request_id, Value: (collection name, DBStats of the request or None, command shape)
+        self._commands = _InFlight()
+        self._slow_micros = slow_ms * 1000
+        # Key: (command, collection, status), Value: histogram child
+        self._durations = {}
 
     def started(self, event):
-        self._commands[event.request_id] = event.command
+        cmd_name = event.command_name
+        # the collection is the value of the command name, getMore names it apart
+        collection = event.command.get("collection" if cmd_name == "getMore" else cmd_name)
+        if not isinstance(collection, str):
+            collection = "none"
+        shape = command_shape(cmd_name, collection, event.command)
+        self._commands.put(event.request_id, (collection, current_db_stats(), shape))
 
     def succeeded(self, event):
-        command_doc = self._commands.pop(event.request_id, None)
-
-        if command_doc:
-            self._log(event, command_doc, "SUCCESS")
+        command = self._commands.pop(event.request_id)
+        if command is not None:
+            self._record(event, *command, "success")
 
     def failed(self, event):
-        command_doc = self._commands.pop(event.request_id, None)
-        if command_doc:
-            self._log(event, command_doc, "FAILED")
+        command = self._commands.pop(event.request_id)
+        if command is not None:
+            collection = command[0]
+            self._record(event, *command, "failed")
+            failure = event.failure if isinstance(event.failure, dict) else {}
+            MONGO_COMMAND_ERRORS.labels(event.command_name, collection, failure.get("codeName", "unknown")).inc()
 
-    def _log(self, event, command_doc, status):
-        duration_ms = event.duration_micros / 1000
+    def _record(self, event, collection, stats, shape, status):
+        query_shapes.record(shape, event.command_name, collection, event.duration_micros, status == "failed")
+        if stats is not None:
+            stats.add(shape, event.duration_micros)
+        key = (event.command_name, collection, status)
+        histogram = self._durations.get(key)
+        if histogram is None:
+            histogram = self._durations[key] = MONGO_COMMAND_DURATION.labels(*key)
+        histogram.observe(event.duration_micros / 1e6)
 
-        cmd_name = event.command_name
-        if cmd_name in ('find', 'insert', 'update', 'delete', 'aggregate'):
+        if event.duration_micros > self._slow_micros:
+            MONGO_SLOW_COMMANDS.labels(event.command_name, collection).inc()
+            logger.warning(
+                f"🐢 SLOW QUERY! [DBQUERYCOST][{status.upper()}] Cmd: {event.command_name} | "
+                f"Shape: {shape} | "
+                f"Time: {event.duration_micros / 1000:.2f}ms"
+            )
 
-            collection_name = command_doc.get(cmd_name, "unknown")
 
-            log_msg = (
-                f"[DBQUERYCOST][{status}] Cmd: {cmd_name} | "
-                f"Coll: {collection_name} | "
-                f"Time: {duration_ms:.2f}ms"
+class MongoPoolMonitor(ConnectionPoolListener):
+    """
+    Motor pool statistics: open / checked out connections, operations waiting for one,
+    the check out wait and the failed check outs, per server address.
+    Called on every check out and check in, the labelled metrics are looked up once per server.
+    """
+
+    def __init__(self):
+        # Key: address, Value: (connections, checked_out, waiting, checkout_wait)
+        self._servers = {}
+
+    def _metrics(self, event):
+        metrics = self._servers.get(event.address)
+        if metrics is None:
+            host, port = event.address
+            address = f"{host}:{port}"
+            metrics = self._servers[event.address] = (
+                MONGO_POOL_CONNECTIONS.labels(address),
+                MONGO_POOL_CHECKED_OUT.labels(address),
+                MONGO_POOL_WAITING.labels(address),
+                MONGO_POOL_CHECKOUT_WAIT.labels(address),
             )
+        return metrics
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self._metrics(event)[0].inc()
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._metrics(event)[0].dec()
+
+    def connection_check_out_started(self, event):
+        self._metrics(event)[2].inc()
+
+    def connection_check_out_failed(self, event):
+        _, _, waiting, checkout_wait = self._metrics(event)
+        waiting.dec()
+        checkout_wait.observe(event.duration)
+        host, port = event.address
+        MONGO_POOL_CHECKOUT_FAILED.labels(f"{host}:{port}", event.reason).inc()
+
+    def connection_checked_out(self, event):
+        _, checked_out, waiting, checkout_wait = self._metrics(event)
+        waiting.dec()
+        checked_out.inc()
+        checkout_wait.observe(event.duration)
 
-            if duration_ms > 100:
-                logger.warning(f"🐢 SLOW QUERY! {log_msg}")
-                # logger.warning(f"   Query: {command_doc}")
-            else:
-                logger.debug(log_msg)
\ No newline at end of file
+    def connection_checked_in(self, event):
+        self._metrics(event)[1].dec()
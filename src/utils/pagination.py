@@ -0,0 +1,197 @@
+# src/utils/pagination.py
+import asyncio
+import base64
+import hashlib
+from enum import Enum
+from typing import Any, List, Optional, Sequence, Tuple
+
+from bson import json_util
+from motor.motor_asyncio import AsyncIOMotorCollection
+
+from src.core.config import APPROX_TOTAL_TTL_SECONDS
+from src.core.redis import redis_client
+from src.logger import get_logger
+
+# A sort spec is the list of (field, direction) used by the query, ending with a unique
+# tie-breaker (normally _id), e.g. [("created_at", -1), ("_id", -1)].
+SortSpec = Sequence[Tuple[str, int]]
+
+# total counts, cached by filter for APPROX_TOTAL_TTL_SECONDS
+COUNT_KEY = "count:{}:{}"
+
+logger = get_logger()
+
+
+class TotalMode(str, Enum):
+    EXACT = "exact"     # counted by a count_documents sent along with the page
+    APPROX = "approx"   # cached count, may be APPROX_TOTAL_TTL_SECONDS old
+    NONE = "none"       # not counted, total is None
+
+
+def total_mode(include_total: bool = True, approx_total: bool = False) -> TotalMode:
+    if not include_total:
+        return TotalMode.NONE
+    return TotalMode.APPROX if approx_total else TotalMode.EXACT
+
+
+def encode_cursor(doc: dict, sort: SortSpec) -> str:
+    """
+    Build an opaque cursor pointing right after doc (a raw MongoDB document) in sort order.
+    """
+    position = {field: doc.get(field) for field, _ in sort}
+    raw = json_util.dumps(position).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: SortSpec) -> List[Any]:
+    """
+    Return the sort values stored in the cursor. Raise ValueError if the cursor is malformed
+    or was issued for another sort order.
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        position = json_util.loads(raw)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    if not isinstance(position, dict) or list(position) != [field for field, _ in sort]:
+        raise ValueError("Cursor does not match the requested sort order")
+    return list(position.values())
+
+
+def keyset_filter(sort: SortSpec, values: Sequence[Any]) -> dict:
+    """
+    Match the documents strictly after values in sort order.
+    Follows MongoDB ordering, where null and missing fields sort lowest.
+    """
+    branches = []
+    for i, (field, direction) in enumerate(sort):
+        branch = {f: values[j] for j, (f, _) in enumerate(sort[:i])}
+        value = values[i]
+        if value is None:
+            if direction < 0:
+                # nothing sorts below null in a descending scan
+                continue
+            branch[field] = {"$ne": None}
+        elif direction > 0:
+            branch[field] = {"$gt": value}
+        else:
+            branch["$or"] = [{field: {"$lt": value}}, {field: None}]
+        branches.append(branch)
+    return {"$or": branches}
+
+
+def apply_cursor(query: dict, sort: SortSpec, cursor: Optional[str]) -> dict:
+    """
+    Restrict query to the documents after cursor; return query unchanged without a cursor.
+    """
+    if not cursor:
+        return query
+    after = keyset_filter(sort, decode_cursor(cursor, sort))
+    return {"$and": [query, after]} if query else after
+
+
+def split_page(docs: List[dict], limit: int, sort: SortSpec) -> Tuple[List[dict], Optional[str]]:
+    """
+    docs were fetched with limit + 1; return the page and the cursor of the next page (None on the last page).
+    """
+    if len(docs) <= limit:
+        return docs, None
+    page = docs[:limit]
+    return page, encode_cursor(page[-1], sort)
+
+
+async def cached_count(collection: AsyncIOMotorCollection, query: dict) -> int:
+    """
+    count_documents(query), served from Redis for APPROX_TOTAL_TTL_SECONDS.
+    """
+    digest = hashlib.sha1(json_util.dumps(query, sort_keys=True).encode()).hexdigest()
+    key = COUNT_KEY.format(collection.name, digest)
+    try:
+        cached = await redis_client.get(key)
+        if cached is not None:
+            return int(cached)
+    except Exception as e:
+        logger.error(f"Failed to read cached count: {e}")
+
+    total = await collection.count_documents(query)
+    try:
+        await redis_client.set(key, total, ex=APPROX_TOTAL_TTL_SECONDS)
+    except Exception as e:
+        logger.error(f"Failed to cache count: {e}")
+    return total
+
+
+async def aggregate_page(
+    collection: AsyncIOMotorCollection,
+    stages: List[dict],
+    sort: SortSpec,
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    projection: Optional[dict] = None,
+    mode: TotalMode = TotalMode.EXACT,
+    count_query: Optional[dict] = None,
+) -> Tuple[List[dict], Optional[int], Optional[str]]:
+    """
+    Run stages (which select the documents, e.g. a $match), then return (page, total, next_cursor).
+    The page is bounded by the index: cursor / $skip / $limit come right after the $sort, so only
+    skip + limit + 1 entries are read. The total is counted by a count_documents(count_query) sent
+    at the same time (a COUNT_SCAN when the filter is indexed), not by fetching every match.
+    With a cursor, skip is ignored and the page starts right after it.
+    """
+    pipeline = list(stages)
+    if cursor:
+        pipeline.append({"$match": keyset_filter(sort, decode_cursor(cursor, sort))})
+        skip = 0
+    # $sort + $limit are merged into a top-k the index serves, the stages after them see one page
+    pipeline.append({"$sort": dict(sort)})
+    if skip:
+        pipeline.append({"$skip": skip})
+    pipeline.append({"$limit": limit + 1})
+    if projection:
+        pipeline.append({"$project": projection})
+
+    page_task = collection.aggregate(pipeline).to_list(length=limit + 1)
+    if mode == TotalMode.EXACT:
+        count_task = (
+            collection.count_documents(count_query) if count_query is not None else _count_stages(collection, stages)
+        )
+        docs, total = await asyncio.gather(page_task, count_task)
+    elif mode == TotalMode.APPROX:
+        docs, total = await asyncio.gather(page_task, cached_count(collection, count_query or {}))
+    else:
+        docs, total = await page_task, None
+
+    page, next_cursor = split_page(docs, limit, sort)
+    return page, total, next_cursor
+
+
+async def _count_stages(collection: AsyncIOMotorCollection, stages: List[dict]) -> int:
+    result = await collection.aggregate(list(stages) + [{"$count": "n"}]).to_list(length=1)
+    return result[0]["n"] if result else 0
+
+
+async def find_page(
+    collection: AsyncIOMotorCollection,
+    query: dict,
+    sort: SortSpec,
+    limit: int,
+    skip: int = 0,
+    cursor: Optional[str] = None,
+    projection: Optional[dict] = None,
+    mode: TotalMode = TotalMode.EXACT,
+) -> Tuple[List[dict], Optional[int], Optional[str]]:
+    """
+    find(query).sort(sort), one page and the total of query, see aggregate_page.
+    """
+    return await aggregate_page(
+        collection,
+        [{"$match": query}],
+        sort,
+        limit,
+        skip=skip,
+        cursor=cursor,
+        projection=projection,
+        mode=mode,
+        count_query=query,
+    )
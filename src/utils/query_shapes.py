@@ -0,0 +1,186 @@
+# src/utils/query_shapes.py
+import threading
+from bisect import bisect_left
+from datetime import datetime
+from typing import List
+
+from src.core.config import QUERY_SHAPES_MAX
+
+# where the filter of each command is, values are replaced by "?" to get its shape
+_FILTER_FIELDS = {
+    "find": "filter",
+    "count": "query",
+    "distinct": "query",
+    "findAndModify": "query",
+    "aggregate": "pipeline",
+    "update": "updates",
+    "delete": "deletes",
+}
+
+# upper bounds (microseconds) of the duration buckets of a shape: 50us to about a minute, 25% apart
+BUCKET_BOUNDS = [50 * 1.25 ** i for i in range(64)]
+
+
+def _write_shape(value, out: List[str]) -> None:
+    # appends to one list instead of joining strings per level, this runs for every command
+    if isinstance(value, dict):
+        out.append("{")
+        for key, item in value.items():
+            out.append(key)
+            out.append(":")
+            _write_shape(item, out)
+            out.append(",")
+        if value:
+            out[-1] = "}"
+        else:
+            out.append("}")
+    elif isinstance(value, list) and value and isinstance(value[0], dict):
+        # $and / $or / pipelines keep their structure, lists of values collapse
+        out.append("[")
+        for item in value:
+            _write_shape(item, out)
+            out.append(",")
+        out[-1] = "]"
+    else:
+        out.append("?")
+
+
+def command_shape(cmd_name: str, collection: str, command: dict) -> str:
+    """
+    The command without its values, keys and operators kept: "find blogs {author_id:?}"
+    is the same shape for every author.
+    """
+    field = _FILTER_FIELDS.get(cmd_name)
+    if field is None:
+        return f"{cmd_name} {collection}"
+    value = command.get(field)
+    if field in ("updates", "deletes"):
+        value = value[0].get("q") if value else None
+    out = [cmd_name, " ", collection, " "]
+    _write_shape(value, out)
+    sort = command.get("sort")
+    if sort:
+        # the directions are kept, they decide which index serves the sort
+        out.append(" sort:")
+        out.append(",".join(f"{key}:{direction}" for key, direction in sort.items()))
+    return "".join(out)
+
+
+class ShapeStats:
+    """
+    Count, errors, total / max duration and a fixed histogram of the durations of one shape.
+    A shape that took the place of an evicted one starts from its count and total (Space-Saving):
+    error_count / error_micros are how much of them may not belong to this shape.
+    """
+    __slots__ = ("command", "collection", "count", "errors", "total_micros", "max_micros", "buckets",
+                 "error_count", "error_micros")
+
+    def __init__(self, command: str, collection: str, error_count: int = 0, error_micros: int = 0):
+        self.command = command
+        self.collection = collection
+        self.count = error_count
+        self.errors = 0
+        self.total_micros = error_micros
+        self.max_micros = 0
+        self.buckets = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.error_count = error_count
+        self.error_micros = error_micros
+
+    def quantile_ms(self, q: float) -> float:
+        """
+        Upper bound of the bucket holding the q quantile, within 25% (the max if it is lower).
+        From the durations seen by this shape only.
+        """
+        rank = q * (self.count - self.error_count)
+        seen = 0
+        for i, n in enumerate(self.buckets):
+            seen += n
+            if seen >= rank and n:
+                bound = BUCKET_BOUNDS[i] if i < len(BUCKET_BOUNDS) else self.max_micros
+                return round(min(bound, self.max_micros) / 1000, 3)
+        return round(self.max_micros / 1000, 3)
+
+    def avg_ms(self) -> float:
+        # of the commands seen by this shape only, the inherited part has no durations of its own
+        return round((self.total_micros - self.error_micros) / (self.count - self.error_count) / 1000, 3)
+
+
+class QueryShapeRegistry:
+    """
+    Per process aggregate of the MongoDB commands by shape, filled by MongoQueryMonitor from the
+    driver threads. Holds at most max_shapes shapes, weighted Space-Saving: a new shape replaces
+    the one with the least total time and inherits its count and total. A new shape is usually the
+    cheapest one, starting from zero it would be evicted by the next one before building up stats;
+    this way any shape above total / max_shapes stays, with totals overestimated by at most error_ms.
+    No query values are kept.
+    """
+
+    def __init__(self, max_shapes: int = QUERY_SHAPES_MAX):
+        self.max_shapes = max_shapes
+        self._shapes = {}
+        self._lock = threading.Lock()
+        self.since = datetime.utcnow()
+        self.dropped = 0
+
+    def record(self, shape: str, command: str, collection: str, duration_micros: int, failed: bool = False) -> None:
+        bucket = bisect_left(BUCKET_BOUNDS, duration_micros)
+        with self._lock:
+            stats = self._shapes.get(shape)
+            if stats is None:
+                if len(self._shapes) >= self.max_shapes:
+                    cheapest = min(self._shapes, key=lambda s: self._shapes[s].total_micros)
+                    evicted = self._shapes.pop(cheapest)
+                    self.dropped += 1
+                    stats = ShapeStats(command, collection, evicted.count, evicted.total_micros)
+                else:
+                    stats = ShapeStats(command, collection)
+                self._shapes[shape] = stats
+            stats.count += 1
+            stats.errors += failed
+            stats.total_micros += duration_micros
+            if duration_micros > stats.max_micros:
+                stats.max_micros = duration_micros
+            stats.buckets[bucket] += 1
+
+    def top(self, limit: int = 20, sort_by: str = "total") -> List[dict]:
+        """
+        The limit shapes with the highest total time (sort_by="total"), count, average or p99.
+        """
+        with self._lock:
+            snapshot = [(shape, stats) for shape, stats in self._shapes.items()]
+        keys = {
+            "total": lambda item: item[1].total_micros,
+            "count": lambda item: item[1].count,
+            "avg": lambda item: item[1].avg_ms(),
+            "p99": lambda item: item[1].quantile_ms(0.99),
+        }
+        snapshot.sort(key=keys[sort_by], reverse=True)
+        return [
+            {
+                "shape": shape,
+                "command": stats.command,
+                "collection": stats.collection,
+                "count": stats.count,
+                "errors": stats.errors,
+                "total_ms": round(stats.total_micros / 1000, 3),
+                "avg_ms": stats.avg_ms(),
+                "p50_ms": stats.quantile_ms(0.5),
+                "p99_ms": stats.quantile_ms(0.99),
+                "max_ms": round(stats.max_micros / 1000, 3),
+                "error_count": stats.error_count,
+                "error_ms": round(stats.error_micros / 1000, 3),
+            }
+            for shape, stats in snapshot[:limit]
+        ]
+
+    def __len__(self) -> int:
+        return len(self._shapes)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._shapes.clear()
+            self.since = datetime.utcnow()
+            self.dropped = 0
+
+
+query_shapes = QueryShapeRegistry()
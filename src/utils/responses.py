@@ -0,0 +1,18 @@
+# src/utils/responses.py
+from typing import Any
+
+from fastapi import Response, status
+from pydantic import TypeAdapter
+
+
+class ModelResponse(Response):
+    """
+    A response serialized by pydantic-core straight to JSON bytes. Returned from an endpoint it skips
+    FastAPI's second validation of the return value against response_model and its
+    jsonable_encoder + json pass. content must already be the response model (validated when it
+    was built); response_model still documents the endpoint.
+    """
+    media_type = "application/json"
+
+    def __init__(self, adapter: TypeAdapter, content: Any, status_code: int = status.HTTP_200_OK, **kwargs):
+        super().__init__(content=adapter.dump_json(content), status_code=status_code, **kwargs)
@@ -0,0 +1,83 @@
+# tests/test_auth.py
+import inspect
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from src.auth import auth
+
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    auth._claims_cache.clear()
+    auth._user_cache.clear()
+    yield
+    auth._claims_cache.clear()
+    auth._user_cache.clear()
+
+
+def _request(token=None):
+    headers = {"Authorization": f"Bearer {token}"} if token else {}
+    return SimpleNamespace(cookies={}, headers=headers)
+
+
+def test_decode_token_verifies_once(monkeypatch):
+    token = auth.create_access_token({"sub": str(ObjectId())})
+    calls = []
+    decode = auth.jwt.decode
+    monkeypatch.setattr(auth.jwt, "decode", lambda *a, **kw: calls.append(1) or decode(*a, **kw))
+
+    assert auth.decode_token(token) == auth.decode_token(token)
+    assert len(calls) == 1
+
+
+def test_decode_token_returns_a_copy():
+    user_id = str(ObjectId())
+    token = auth.create_access_token({"sub": user_id})
+    auth.decode_token(token)["sub"] = "someone else"
+    assert auth.decode_token(token)["sub"] == user_id
+
+
+@pytest.mark.anyio
+async def test_verify_access_token_runs_on_the_loop():
+    # a sync dependency would run in the threadpool, the caches are not locked
+    assert inspect.iscoroutinefunction(auth.verify_access_token)
+    user_id = str(ObjectId())
+    claims = await auth.verify_access_token(_request(auth.create_access_token({"sub": user_id})))
+    assert claims["sub"] == user_id
+
+    for request in (_request(), _request("not-a-token")):
+        with pytest.raises(HTTPException) as e:
+            await auth.verify_access_token(request)
+        assert e.value.status_code == 401
+
+
+class _Users:
+    def __init__(self, doc):
+        self.doc = doc
+        self.reads = 0
+
+    async def find_one(self, query, projection=None):
+        self.reads += 1
+        return dict(self.doc) if self.doc["_id"] == query["_id"] else None
+
+
+@pytest.mark.anyio
+async def test_load_principal_is_cached_until_invalidated(monkeypatch):
+    user_id = ObjectId()
+    users = _Users({"_id": user_id, "username": "alice", "email": "alice@example.com"})
+    monkeypatch.setattr(auth, "db", SimpleNamespace(users=users))
+
+    first = await auth.load_principal(str(user_id))
+    first["username"] = "changed by a caller"
+    second = await auth.load_principal(str(user_id))
+    assert second == {"id": str(user_id), "username": "alice", "email": "alice@example.com"}
+    assert users.reads == 1
+
+    users.doc["username"] = "alice2"
+    auth.invalidate_user(str(user_id))
+    assert (await auth.load_principal(str(user_id)))["username"] == "alice2"
+    assert users.reads == 2
+    assert await auth.load_principal(str(ObjectId())) is None
@@ -0,0 +1,64 @@
+# tests/test_blog_detail_cache.py
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from src.api.blogs import cache as blog_cache
+from src.api.blogs import service
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+async def blog(redis, mongo_db, monkeypatch):
+    monkeypatch.setattr(service, "db", mongo_db)
+    author = ObjectId()
+    await mongo_db.users.insert_one({"_id": author, "username": "alice"})
+    result = await mongo_db.blogs.insert_one({
+        "title": "First title", "content": "body", "author_id": str(author), "tags": [],
+        "created_at": datetime(2024, 1, 1), "updated_at": datetime(2024, 1, 1), "view_count": 0, "like_count": 0,
+    })
+    return str(result.inserted_id), str(author)
+
+
+async def test_detail_is_served_from_the_cache(blog, mongo_db):
+    blog_id, _ = blog
+    first = await service.get_blog(blog_id)
+    assert first["title"] == "First title" and first["author_username"] == "alice"
+    assert await blog_cache.get_blog_detail(blog_id) is not None
+
+    # a change behind the app's back is not seen until the entry goes
+    await mongo_db.blogs.update_one({"_id": ObjectId(blog_id)}, {"$set": {"title": "Changed directly"}})
+    second = await service.get_blog(blog_id)
+    assert second["title"] == "First title"
+    # the views are counted per request, not cached
+    assert (first["view_count"], second["view_count"]) == (1, 2)
+
+
+async def test_edit_and_delete_invalidate_the_detail(blog):
+    blog_id, author_id = blog
+    await service.get_blog(blog_id)
+
+    await service.edit_blog(blog_id, author_id, {"title": "Edited"})
+    assert await blog_cache.get_blog_detail(blog_id) is None
+    assert (await service.get_blog(blog_id))["title"] == "Edited"
+
+    await service.remove_blog(blog_id, author_id)
+    with pytest.raises(HTTPException) as e:
+        await service.get_blog(blog_id)
+    assert e.value.status_code == 404
+
+
+async def test_detail_without_redis_reads_mongodb(blog, monkeypatch):
+    blog_id, _ = blog
+
+    class Down:
+        async def get(self, *args, **kwargs):
+            raise ConnectionError("Redis down")
+
+        set = get
+
+    monkeypatch.setattr(blog_cache, "redis_client", Down())
+    assert (await service.get_blog(blog_id))["title"] == "First title"
@@ -0,0 +1,26 @@
+# tests/test_bloom.py
+from src.api.users.bloom import NUM_BITS, NUM_HASHES, _offsets
+
+
+def test_offsets_are_k_positions_in_the_filter():
+    offsets = _offsets("alice")
+    assert len(offsets) == NUM_HASHES
+    assert all(0 <= o < NUM_BITS for o in offsets)
+
+
+def test_offsets_are_stable():
+    # the filters are shared by all workers and survive restarts
+    assert _offsets("alice@example.com") == _offsets("alice@example.com")
+
+
+def test_offsets_spread_values():
+    assert _offsets("alice") != _offsets("Alice")
+    values = [f"user{i}" for i in range(1000)]
+    first = {_offsets(v)[0] for v in values}
+    assert len(first) > 990
+
+
+def test_offsets_are_distinct_per_value():
+    # h2 is odd, so the k positions only repeat if NUM_BITS shares a factor with it
+    for value in ("bob", "carol", "dave@example.com"):
+        assert len(set(_offsets(value))) == NUM_HASHES
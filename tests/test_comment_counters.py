@@ -0,0 +1,72 @@
+# tests/test_comment_counters.py
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from src.api.comments import repository
+from src.scripts import repair_comment_counters
+
+pytestmark = pytest.mark.anyio
+
+
+def _comment(blog_id: str, parent: dict = None) -> dict:
+    return {
+        "content": "c", "blog_id": blog_id, "author_id": str(ObjectId()), "created_at": datetime.utcnow(),
+        "is_root": parent is None, "root_id": parent["root_id"] if parent else None,
+        "parent_id": parent["id"] if parent else None,
+    }
+
+
+async def _blog(db, **counters) -> str:
+    return str((await db.blogs.insert_one({"title": "t", "version": 1, **counters})).inserted_id)
+
+
+async def _counters(db, blog_id):
+    return await db.blogs.find_one({"_id": ObjectId(blog_id)}, {"_id": 0, "comment_count": 1, "root_comment_count": 1})
+
+
+async def test_counters_follow_comments(redis, mongo_db):
+    blog_id = await _blog(mongo_db, comment_count=0, root_comment_count=0)
+    root = await repository.add_comment(mongo_db, _comment(blog_id), blog_id)
+    reply = await repository.add_comment(mongo_db, _comment(blog_id, root), blog_id)
+    await repository.add_comment(mongo_db, _comment(blog_id, root), blog_id)
+
+    assert await _counters(mongo_db, blog_id) == {"comment_count": 3, "root_comment_count": 1}
+    assert (await repository.find_comment_by_id(mongo_db, root["id"]))["reply_count"] == 2
+
+    assert await repository.delete_single_comment(mongo_db, reply["id"], blog_id)
+    assert (await repository.find_comment_by_id(mongo_db, root["id"]))["reply_count"] == 1
+    assert await repository.delete_root_thread(mongo_db, root["id"], blog_id) == 2
+    assert await _counters(mongo_db, blog_id) == {"comment_count": 0, "root_comment_count": 0}
+
+
+async def test_counters_not_backfilled_stay_missing(redis, mongo_db):
+    # a blog and a root from before the counters: a counter started at 1 would be trusted
+    blog_id = await _blog(mongo_db, comment_count=40)
+    legacy_root = (await mongo_db.comments.insert_one({**_comment(blog_id), "root_id": None})).inserted_id
+    await mongo_db.comments.update_one({"_id": legacy_root}, {"$set": {"root_id": str(legacy_root)}})
+    legacy = await repository.find_comment_by_id(mongo_db, str(legacy_root))
+
+    await repository.add_comment(mongo_db, _comment(blog_id), blog_id)
+    await repository.add_comment(mongo_db, _comment(blog_id, legacy), blog_id)
+    assert await _counters(mongo_db, blog_id) == {"comment_count": 42}
+    assert (await repository.find_comment_by_id(mongo_db, str(legacy_root)))["reply_count"] is None
+
+
+async def test_add_comment_to_a_missing_blog(redis, mongo_db):
+    assert await repository.add_comment(mongo_db, _comment(str(ObjectId())), str(ObjectId())) is None
+    assert await mongo_db.comments.count_documents({}) == 0
+
+
+async def test_repair_backfills_the_counters(redis, mongo_db, monkeypatch):
+    blog_id = await _blog(mongo_db, comment_count=7)
+    root = await repository.add_comment(mongo_db, _comment(blog_id), blog_id)
+    await mongo_db.comments.insert_one({**_comment(blog_id, root)})
+    await mongo_db.comments.update_one({"_id": ObjectId(root["id"])}, {"$unset": {"reply_count": ""}})
+    monkeypatch.setattr(repair_comment_counters, "db", mongo_db)
+
+    await repair_comment_counters.repair_blog_counters(batch_size=1)
+    await repair_comment_counters.repair_reply_counters(batch_size=1)
+    assert await _counters(mongo_db, blog_id) == {"comment_count": 2, "root_comment_count": 1}
+    assert (await repository.find_comment_by_id(mongo_db, root["id"]))["reply_count"] == 1
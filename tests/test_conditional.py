@@ -0,0 +1,83 @@
+# tests/test_conditional.py
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException, Response
+from starlette.requests import Request
+
+from src.api.blogs import service as blog_service
+from src.api.users import service as user_service
+from src.api.users.schemas import UserInfoUpdate
+from src.utils.conditional import Conditional, make_etag
+
+
+def _cond(headers=None, max_age=0, vary_credentials=False):
+    scope = {
+        "type": "http", "method": "GET", "path": "/",
+        "headers": [(k.lower().encode(), v.encode()) for k, v in (headers or {}).items()],
+    }
+    response = Response()
+    return Conditional(Request(scope), response, max_age, vary_credentials), response
+
+
+def test_if_none_match_is_compared_weakly():
+    etag = make_etag("blog", "1", 3)
+    assert etag.startswith('W/"') and etag == make_etag("blog", "1", 3) != make_etag("blog", "1", 4)
+
+    cond, response = _cond()
+    assert not cond.validate(etag)
+    assert response.headers["ETag"] == etag
+
+    for header in (etag, etag.removeprefix("W/"), f'"other", {etag}', "*"):
+        assert _cond({"If-None-Match": header})[0].validate(etag)
+    assert not _cond({"If-None-Match": make_etag("blog", "1", 2)})[0].validate(etag)
+
+
+def test_if_modified_since_without_if_none_match():
+    last_modified = datetime(2024, 5, 1, 12, 0, 0, 500000)
+    since = "Wed, 01 May 2024 12:00:00 GMT"
+    assert _cond({"If-Modified-Since": since})[0].validate("x", last_modified)
+    assert not _cond({"If-Modified-Since": since})[0].validate("x", last_modified + timedelta(seconds=1))
+    # If-None-Match wins
+    assert not _cond({"If-Modified-Since": since, "If-None-Match": '"other"'})[0].validate("x", last_modified)
+
+
+def test_cache_headers_by_credentials():
+    cond, response = _cond(max_age=30, vary_credentials=True)
+    assert response.headers["Cache-Control"] == "public, max-age=30, must-revalidate"
+    assert response.headers["Vary"] == "Cookie, Authorization"
+    _, response = _cond({"Authorization": "Bearer token"})
+    assert response.headers["Cache-Control"].startswith("private")
+
+
+@pytest.mark.anyio
+async def test_blog_detail_304_until_the_author_is_renamed(redis, mongo_db, monkeypatch):
+    monkeypatch.setattr(blog_service, "db", mongo_db)
+    monkeypatch.setattr(user_service, "db", mongo_db)
+    author = ObjectId()
+    await mongo_db.users.insert_one({"_id": author, "username": "alice", "version": 1})
+    blog_id = str((await mongo_db.blogs.insert_one({
+        "title": "t", "content": "c", "author_id": str(author), "tags": [], "version": 1,
+        "created_at": datetime(2024, 1, 1), "view_count": 0, "like_count": 0,
+    })).inserted_id)
+
+    cond, response = _cond()
+    await blog_service.get_blog(blog_id, cond=cond)
+    etag = response.headers["ETag"]
+
+    cond, _ = _cond({"If-None-Match": etag})
+    with pytest.raises(HTTPException) as e:
+        await blog_service.get_blog(blog_id, cond=cond)
+    assert e.value.status_code == 304 and e.value.headers["ETag"] == etag
+    # the ETag is per user (is_liked)
+    cond, response = _cond({"If-None-Match": etag})
+    await blog_service.get_blog(blog_id, user_id=str(ObjectId()), cond=cond)
+    assert response.headers["ETag"] != etag
+
+    await user_service.update_user_info(str(author), UserInfoUpdate(username="alice2"))
+    cond, response = _cond({"If-None-Match": etag})
+    doc = await blog_service.get_blog(blog_id, cond=cond)
+    assert doc["author_username"] == "alice2" and response.headers["ETag"] != etag
+    # the views of the 304s were counted too
+    assert doc["view_count"] == 4
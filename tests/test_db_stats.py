@@ -0,0 +1,91 @@
+# tests/test_db_stats.py
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+
+from src.api.comments import service as comment_service
+from src.utils.db_stats import QueryBudgetExceeded, assert_query_budget, query_budget
+from src.utils.pagination import TotalMode
+
+
+def test_query_budget_counts_the_commands_of_the_block():
+    with query_budget(2) as stats:
+        stats.add("find blogs {_id}", 100)
+        stats.add("find comments {blog_id}", 200)
+    assert stats.count == 2
+
+    with pytest.raises(QueryBudgetExceeded):
+        with query_budget(1) as stats:
+            stats.add("find blogs {_id}", 100)
+            stats.add("find comments {blog_id}", 200)
+
+
+def test_query_budget_repeats():
+    with pytest.raises(QueryBudgetExceeded, match="Repeated"):
+        with query_budget(10, max_repeats=1) as stats:
+            for _ in range(3):
+                stats.add("find users {_id}", 100)
+    # iterating one cursor is not a repeat
+    with query_budget(10, max_repeats=1) as stats:
+        stats.add("find comments {blog_id}", 100)
+        stats.add("getMore comments", 100)
+        stats.add("getMore comments", 100)
+
+
+def test_assert_query_budget_reads_the_header():
+    request = SimpleNamespace(method="GET", url=SimpleNamespace(path="/comments/blog/1"))
+    assert_query_budget(SimpleNamespace(headers={"X-DB-Queries": "4"}, request=request), 4)
+    with pytest.raises(QueryBudgetExceeded, match="/comments/blog/1"):
+        assert_query_budget(SimpleNamespace(headers={"X-DB-Queries": "5"}, request=request), 4)
+
+
+ROOTS = 20
+REPLIES = 8
+
+
+async def _seed(db, legacy_roots: int = 0) -> str:
+    # the first legacy_roots roots have no reply_count, as before the counters were backfilled
+    now = datetime.utcnow()
+    authors = [ObjectId() for _ in range(5)]
+    await db.users.insert_many([{"_id": a, "username": f"user{i}", "email": f"user{i}@example.com"}
+                                for i, a in enumerate(authors)])
+    blog_id = ObjectId()
+    await db.blogs.insert_one({"_id": blog_id, "title": "t", "author_id": str(authors[0]),
+                               "root_comment_count": ROOTS, "comments_version": 1})
+    for r in range(ROOTS):
+        root_id = ObjectId()
+        root = {
+            "_id": root_id, "blog_id": str(blog_id), "root_id": str(root_id), "is_root": True,
+            "author_id": str(authors[r % 5]), "content": f"root {r}", "created_at": now + timedelta(seconds=r),
+        }
+        if r >= legacy_roots:
+            root["reply_count"] = REPLIES
+        await db.comments.insert_one(root)
+        await db.comments.insert_many([{
+            "blog_id": str(blog_id), "root_id": str(root_id), "parent_id": str(root_id), "is_root": False,
+            "author_id": str(authors[i % 5]), "content": f"reply {i}", "created_at": now + timedelta(seconds=i),
+        } for i in range(REPLIES)])
+    return str(blog_id)
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("legacy_roots, budget", [
+    # blog, root page, replies of every root, their authors
+    (0, 4),
+    # + one count of the replies of all the roots without reply_count
+    (ROOTS // 2, 5),
+])
+async def test_comment_list_query_budget(mongo_db, monkeypatch, legacy_roots, budget):
+    blog_id = await _seed(mongo_db, legacy_roots)
+    monkeypatch.setattr(comment_service, "db", mongo_db)
+    # the same for any page size
+    with query_budget(budget, max_repeats=1):
+        page = await comment_service.get_comments_for_blog(
+            blog_id, page=1, size=ROOTS, replies_page=1, replies_size=5, mode=TotalMode.EXACT,
+        )
+    assert len(page.items) == ROOTS
+    assert page.total == ROOTS
+    assert all(len(root.replies) == 5 and root.replies_total == REPLIES for root in page.items)
+    assert [r.content for r in page.items[0].replies] == [f"reply {i}" for i in range(5)]
@@ -0,0 +1,49 @@
+# tests/test_leaderboard.py
+import pytest
+from bson import ObjectId
+
+from src.api.blogs import leaderboard, view_counter
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_empty_leaderboard_is_built(redis, mongo_db):
+    assert await leaderboard.get_top(10) is None
+    await leaderboard.ensure_leaderboard(mongo_db)
+    # no blog viewed yet: answered from Redis, not sorted in MongoDB on every request
+    assert await leaderboard.get_top(10) == []
+
+
+async def test_rebuild_ranks_mongodb_and_buffered_views(redis, mongo_db):
+    a, b, c = ObjectId(), ObjectId(), ObjectId()
+    await mongo_db.blogs.insert_many([
+        {"_id": a, "view_count": 5}, {"_id": b, "view_count": 3}, {"_id": c, "view_count": 0},
+    ])
+    await redis.hset(view_counter.PENDING_KEY, str(b), 4)
+
+    assert await leaderboard.rebuild_leaderboard(mongo_db) == 2
+    assert await leaderboard.get_top(10) == [(str(b), 7), (str(a), 5)]
+    assert await leaderboard.get_top(1) == [(str(b), 7)]
+
+
+async def test_views_after_a_lost_leaderboard_are_not_trusted(redis, mongo_db):
+    a, b = ObjectId(), ObjectId()
+    await mongo_db.blogs.insert_many([{"_id": a, "view_count": 50}, {"_id": b, "view_count": 1}])
+    await leaderboard.rebuild_leaderboard(mongo_db)
+
+    # Redis restarted: the views counted since only rank b
+    await redis.delete(leaderboard.LEADERBOARD_KEY)
+    await view_counter.record_view(mongo_db, str(b))
+    assert await leaderboard.get_top(10) is None
+
+    await leaderboard.ensure_leaderboard(mongo_db)
+    assert await leaderboard.get_top(10) == [(str(a), 50), (str(b), 2)]
+
+
+async def test_get_top_without_redis(monkeypatch):
+    class Down:
+        def pipeline(self, **kwargs):
+            raise ConnectionError("Redis down")
+
+    monkeypatch.setattr(leaderboard, "redis_client", Down())
+    assert await leaderboard.get_top(10) is None
@@ -0,0 +1,46 @@
+# tests/test_likes.py
+import pytest
+from bson import ObjectId
+
+from src.api.blogs import repository
+from src.scripts import migrate_likes
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_toggle_like_flips_and_counts(redis, mongo_db):
+    blog_id, alice, bob = ObjectId(), str(ObjectId()), str(ObjectId())
+    await mongo_db.blogs.insert_one({"_id": blog_id, "like_count": 0, "version": 1})
+
+    assert await repository.toggle_like(mongo_db, str(blog_id), alice) == {"is_liked": True, "like_count": 1}
+    assert await repository.toggle_like(mongo_db, str(blog_id), bob) == {"is_liked": True, "like_count": 2}
+    assert await repository.toggle_like(mongo_db, str(blog_id), alice) == {"is_liked": False, "like_count": 1}
+
+    # unliked rows are kept inactive
+    assert await mongo_db.blog_likes.count_documents({"blog_id": blog_id}) == 2
+    assert await repository.is_blog_liked(mongo_db, str(blog_id), bob)
+    assert not await repository.is_blog_liked(mongo_db, str(blog_id), alice)
+    assert await repository.find_liked_blog_ids(mongo_db, bob, [str(blog_id), str(ObjectId())]) == {str(blog_id)}
+
+
+async def test_toggle_like_of_a_missing_blog(redis, mongo_db):
+    assert await repository.toggle_like(mongo_db, str(ObjectId()), str(ObjectId())) is None
+    assert await mongo_db.blog_likes.count_documents({}) == 0
+
+
+async def test_repair_like_counts_from_blog_likes(redis, mongo_db, monkeypatch):
+    drifted, right = ObjectId(), ObjectId()
+    await mongo_db.blogs.insert_many([
+        {"_id": drifted, "like_count": 5, "version": 1}, {"_id": right, "like_count": 0, "version": 1},
+    ])
+    await mongo_db.blog_likes.insert_many([
+        {"blog_id": drifted, "user_id": ObjectId(), "active": True},
+        {"blog_id": drifted, "user_id": ObjectId(), "active": False},
+    ])
+    monkeypatch.setattr(migrate_likes, "db", mongo_db)
+
+    await migrate_likes.repair_like_counts(batch_size=1)
+    blogs = {doc["_id"]: doc async for doc in mongo_db.blogs.find()}
+    assert (blogs[drifted]["like_count"], blogs[drifted]["version"]) == (1, 2)
+    # only the drifted blogs are written
+    assert (blogs[right]["like_count"], blogs[right]["version"]) == (0, 1)
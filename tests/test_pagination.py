@@ -0,0 +1,75 @@
+# tests/test_pagination.py
+from itertools import product
+
+import pytest
+
+from src.utils.pagination import keyset_filter
+
+# MongoDB ordering: null and missing fields sort lowest
+DOCS = [
+    {"_id": i, "created_at": created_at}
+    for i, created_at in enumerate([None, 1, 2, None, 2, 3])
+]
+
+
+def _sort_key(doc, sort):
+    # (is not null, value) per field, reversed for descending fields
+    key = []
+    for field, direction in sort:
+        value = doc.get(field)
+        part = (value is not None, value if value is not None else 0)
+        key.append(part if direction > 0 else tuple(-p for p in part))
+    return key
+
+
+def _matches(doc, query) -> bool:
+    # the subset of the query language keyset_filter uses
+    for field, cond in query.items():
+        if field == "$or":
+            if not any(_matches(doc, branch) for branch in cond):
+                return False
+            continue
+        value = doc.get(field)
+        if not isinstance(cond, dict):
+            if value != cond:
+                return False
+        elif "$ne" in cond:
+            if value == cond["$ne"]:
+                return False
+        elif value is None:
+            # null is not greater or lower than anything
+            return False
+        elif "$gt" in cond and not value > cond["$gt"]:
+            return False
+        elif "$lt" in cond and not value < cond["$lt"]:
+            return False
+    return True
+
+
+@pytest.mark.parametrize("created_dir, id_dir", list(product([1, -1], [1, -1])))
+def test_keyset_filter_matches_the_documents_after_the_cursor(created_dir, id_dir):
+    sort = [("created_at", created_dir), ("_id", id_dir)]
+    ordered = sorted(DOCS, key=lambda d: _sort_key(d, sort))
+    for i, cursor_doc in enumerate(ordered):
+        query = keyset_filter(sort, [cursor_doc["created_at"], cursor_doc["_id"]])
+        after = [doc["_id"] for doc in ordered if _matches(doc, query)]
+        assert after == [doc["_id"] for doc in ordered[i + 1:]], cursor_doc
+
+
+def test_keyset_filter_null_ascending_continues_with_the_non_null_values():
+    query = keyset_filter([("created_at", 1), ("_id", 1)], [None, 3])
+    assert query == {"$or": [
+        {"created_at": {"$ne": None}},
+        {"created_at": None, "_id": {"$gt": 3}},
+    ]}
+
+
+def test_keyset_filter_null_descending_only_ties_remain():
+    # nulls come last in a descending scan, only the tie-breaker moves on
+    query = keyset_filter([("created_at", -1), ("_id", -1)], [None, 3])
+    assert query == {"$or": [{"created_at": None, "$or": [{"_id": {"$lt": 3}}, {"_id": None}]}]}
+
+
+def test_keyset_filter_descending_value_includes_the_nulls():
+    query = keyset_filter([("created_at", -1), ("_id", -1)], [2, 3])
+    assert query["$or"][0] == {"$or": [{"created_at": {"$lt": 2}}, {"created_at": None}]}
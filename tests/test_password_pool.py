@@ -0,0 +1,65 @@
+# tests/test_password_pool.py
+import asyncio
+import threading
+
+import pytest
+from fastapi import HTTPException
+from passlib.context import CryptContext
+
+from src.api.users import utils
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture(autouse=True)
+def fresh_pool():
+    utils.shutdown_password_pool()
+    yield
+    utils.shutdown_password_pool()
+
+
+async def test_hash_and_verify_in_the_pool():
+    hashed = await utils.hash_password("s3cret")
+
+    assert hashed != "s3cret"
+    assert await utils.verify_password("s3cret", hashed)
+    assert not await utils.verify_password("wrong", hashed)
+    assert utils._pending == 0
+
+
+async def test_rehash_when_rounds_changed():
+    old = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("s3cret")
+
+    valid, new_hash = await utils.verify_and_rehash("s3cret", old)
+    assert valid
+    assert new_hash is not None and new_hash != old
+    # the new hash uses the configured rounds and needs no further update
+    assert await utils.verify_and_rehash("s3cret", new_hash) == (True, None)
+
+    assert await utils.verify_and_rehash("wrong", old) == (False, None)
+
+
+async def test_saturated_pool_answers_429(monkeypatch):
+    release = threading.Event()
+
+    def slow_hash(password):
+        release.wait(5)
+        return "hashed", 0.0, 0.0
+
+    monkeypatch.setattr(utils, "PASSWORD_HASH_MAX_PENDING", 1)
+    monkeypatch.setattr(utils, "_hash", slow_hash)
+
+    first = asyncio.create_task(utils.hash_password("one"))
+    while utils._pending == 0:
+        await asyncio.sleep(0.01)
+
+    with pytest.raises(HTTPException) as exc:
+        await utils.hash_password("two")
+    assert exc.value.status_code == 429
+    assert exc.value.headers == {"Retry-After": "1"}
+
+    # the refused call did not take a slot, and the running one gives its slot back
+    release.set()
+    assert await first == "hashed"
+    assert utils._pending == 0
+    assert await utils.hash_password("three") == "hashed"
@@ -0,0 +1,117 @@
+# tests/test_search_index.py
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from src.api.blogs import search_index
+from src.api.blogs.search_index import MAX_TOKEN_LENGTH, _bm25_tf, _idf, _term_weights, tokenize
+from src.api.search import service as search_service
+from src.api.search.schemas import BlogSortField, SortDirection
+from src.core.config import SEARCH_BM25_K1, SEARCH_TITLE_WEIGHT
+from src.utils.pagination import TotalMode
+
+
+def test_tokenize_normalizes_and_drops_stop_words():
+    assert tokenize("The FastAPI and MongoDB guide") == ["fastapi", "mongodb", "guide"]
+    # NFKC: full-width letters and the ligature are folded
+    assert tokenize("Ｐｙｔｈｏｎ ﬁle") == ["python", "file"]
+    assert tokenize("Straße") == ["strasse"]
+
+
+def test_tokenize_splits_on_punctuation_and_underscores():
+    assert tokenize("async/await, snake_case!") == ["async", "await", "snake", "case"]
+
+
+def test_tokenize_empty_and_long_words():
+    assert tokenize(None) == []
+    assert tokenize("") == []
+    assert tokenize("x" * (MAX_TOKEN_LENGTH + 1) + " ok") == ["ok"]
+
+
+def test_tokenize_cjk_as_character_pairs():
+    assert tokenize("数据库") == ["数据", "据库"]
+    assert tokenize("字") == ["字"]
+    # latin and CJK in one word are split apart
+    assert tokenize("redis缓存") == ["redis", "缓存"]
+
+
+def test_term_weights_title_counts_more():
+    weights = _term_weights({"title": "Redis", "content": "redis cache redis"})
+    assert weights == {"redis": 2 + SEARCH_TITLE_WEIGHT, "cache": 1}
+
+
+def test_bm25_tf_saturates():
+    scores = [_bm25_tf(tf, 100, 100) for tf in (1, 2, 3, 50)]
+    assert scores == sorted(scores)
+    assert scores[-1] < SEARCH_BM25_K1 + 1
+    # each repeat adds less
+    assert scores[1] - scores[0] > scores[2] - scores[1]
+
+
+def test_bm25_tf_favours_shorter_documents():
+    assert _bm25_tf(3, 50, 100) > _bm25_tf(3, 100, 100) > _bm25_tf(3, 400, 100)
+    # an empty index does not divide by zero
+    assert _bm25_tf(1, 0, 0) > 0
+
+
+def test_idf_rare_terms_weigh_more():
+    assert _idf(1000, 1) > _idf(1000, 100) > _idf(1000, 1000) > 0
+
+
+def _blog(i: int, title: str, content: str = "") -> dict:
+    return {
+        "id": str(ObjectId()), "title": title, "content": content, "tags": ["python"] if i % 2 else [],
+        "author_id": "author", "created_at": datetime(2024, 1, 1) + timedelta(days=i), "view_count": i,
+    }
+
+
+@pytest.mark.anyio
+async def test_search_ranks_by_bm25(redis):
+    title = _blog(0, "Redis caching")
+    content = _blog(1, "Notes", "a long post that mentions redis once among many other words here")
+    other = _blog(2, "MongoDB indexes")
+    for blog in (title, content, other):
+        await search_index.index_blog(blog)
+
+    ids, total = await search_index.search("redis")
+    assert (ids, total) == ([title["id"], content["id"]], 2)
+    # all the tags are required
+    assert await search_index.search("redis", tags=["python"]) == ([content["id"]], 1)
+    ids, _ = await search_index.search("redis", sort_by="created_at")
+    assert ids == [content["id"], title["id"]]
+
+
+@pytest.mark.anyio
+async def test_search_counter_sort_ranks_candidates_only(redis, monkeypatch):
+    blogs = [_blog(i, f"python tips {i}") for i in range(5)]
+    for blog in blogs:
+        await search_index.index_blog(blog)
+    monkeypatch.setattr(search_index, "SEARCH_MAX_CANDIDATES", 3)
+
+    ids, total = await search_index.search("python", sort_by="view_count", offset=2, limit=1)
+    # the candidates for the caller to sort, the total of every match
+    assert len(ids) == 3 and total == 5
+
+
+@pytest.mark.anyio
+async def test_search_blogs_counter_sort_keeps_the_total(redis, mongo_db, monkeypatch):
+    blogs = [_blog(i, f"python tips {i}") for i in range(5)]
+    await mongo_db.blogs.insert_many([{**b, "_id": ObjectId(b["id"])} for b in blogs])
+    for blog in blogs:
+        await search_index.index_blog(blog)
+    await redis.set(search_index.READY_KEY, "1")
+    monkeypatch.setattr(search_service, "db", mongo_db)
+    monkeypatch.setattr(search_index, "SEARCH_MAX_CANDIDATES", 3)
+    monkeypatch.setattr(search_service, "SEARCH_MAX_CANDIDATES", 3)
+
+    docs, total, next_cursor = await search_service._search_blogs_in_index(
+        "python", None, 0, 2, BlogSortField.VIEWS_COUNT, SortDirection.DESC, None, TotalMode.EXACT,
+    )
+    assert total == 5 and next_cursor is not None
+    assert [d["view_count"] for d in docs] == sorted([d["view_count"] for d in docs], reverse=True)
+    # the ranked candidates end after 3
+    _, total, next_cursor = await search_service._search_blogs_in_index(
+        "python", None, 2, 2, BlogSortField.VIEWS_COUNT, SortDirection.DESC, None, TotalMode.NONE,
+    )
+    assert total is None and next_cursor is None
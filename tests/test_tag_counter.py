@@ -0,0 +1,44 @@
+# tests/test_tag_counter.py
+from datetime import datetime, timedelta
+
+import pytest
+
+from src.api.blogs import tag_counter
+from src.core.config import HOT_TAGS_WINDOW_DAYS
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_hot_tags_count_blogs_of_the_window(redis):
+    now = datetime.utcnow()
+    await tag_counter.apply_tag_delta(now, added=["python", "redis"])
+    await tag_counter.apply_tag_delta(now - timedelta(days=3), added=["python"])
+    # created before the window: not counted
+    await tag_counter.apply_tag_delta(now - timedelta(days=HOT_TAGS_WINDOW_DAYS + 5), added=["cobol"] * 3)
+
+    assert await tag_counter.get_hot_tags(10) == [("python", 2), ("redis", 1)]
+    assert await tag_counter.get_hot_tags(1) == [("python", 2)]
+
+
+async def test_edits_and_deletes_move_the_counts(redis):
+    created = datetime.utcnow() - timedelta(days=1)
+    await tag_counter.apply_tag_delta(created, added=["python", "api"])
+    assert sorted(await tag_counter.get_hot_tags(10)) == [("api", 1), ("python", 1)]
+
+    # a write drops the cached window, the next read sees it
+    await tag_counter.apply_tag_delta(created, added=["fastapi"], removed=["api"])
+    assert sorted(await tag_counter.get_hot_tags(10)) == [("fastapi", 1), ("python", 1)]
+    await tag_counter.apply_tag_delta(created, removed=["python", "fastapi"])
+    assert await tag_counter.get_hot_tags(10) == []
+
+
+async def test_rebuild_from_mongodb(redis, mongo_db):
+    now = datetime.utcnow()
+    await mongo_db.blogs.insert_many([
+        {"created_at": now, "tags": ["python", "redis"]},
+        {"created_at": now - timedelta(days=2), "tags": ["python"]},
+        {"created_at": now - timedelta(days=HOT_TAGS_WINDOW_DAYS + 5), "tags": ["cobol"]},
+    ])
+    await tag_counter.ensure_tag_buckets(mongo_db)
+    assert await redis.exists(tag_counter.READY_KEY)
+    assert await tag_counter.get_hot_tags(10) == [("python", 2), ("redis", 1)]
@@ -0,0 +1,80 @@
+# tests/test_trending.py
+from datetime import datetime, timedelta
+
+import pytest
+from bson import ObjectId
+
+from src.api.blogs import trending
+from src.core.config import TRENDING_FULL_REFRESH_MINUTES, TRENDING_WINDOW_DAYS
+
+pytestmark = pytest.mark.anyio
+
+
+def _blog(hours_old: float, views: int, likes: int = 0) -> dict:
+    return {
+        "_id": ObjectId(), "view_count": views, "like_count": likes,
+        "created_at": datetime.utcnow() - timedelta(hours=hours_old),
+    }
+
+
+def test_trend_score_decays_with_age():
+    now = datetime.utcnow()
+    assert trending.trend_score(100, 0, now, now) > trending.trend_score(100, 0, now - timedelta(hours=5), now)
+    # a like weighs five views
+    assert trending.trend_score(0, 1, now, now) == trending.trend_score(5, 0, now, now)
+
+
+async def test_refresh_ranks_and_rescores_dirty_blogs(redis, mongo_db):
+    fresh, old, unseen = _blog(1, 10), _blog(48, 100), _blog(1, 0)
+    stale = _blog(24 * (TRENDING_WINDOW_DAYS + 1), 1000)
+    await mongo_db.blogs.insert_many([fresh, old, unseen, stale])
+
+    assert await trending.refresh_trending(mongo_db) == 2
+    assert await trending.get_trending_page(1, 10) == ([str(fresh["_id"]), str(old["_id"])], 2)
+
+    # the old blog goes viral, the fresh one is deleted: only they are rescored
+    await mongo_db.blogs.update_one({"_id": old["_id"]}, {"$set": {"view_count": 100000}})
+    await mongo_db.blogs.delete_one({"_id": fresh["_id"]})
+    await trending.mark_dirty([str(old["_id"]), str(fresh["_id"])])
+    assert await trending.refresh_trending(mongo_db) == 2
+    assert await trending.get_trending_page(1, 10) == ([str(old["_id"])], 1)
+
+
+async def test_quiet_site_is_not_rescanned_every_tick(redis, mongo_db, monkeypatch):
+    assert await trending.get_trending_page(1, 10) is None
+    assert await trending.refresh_trending(mongo_db) == 0
+    # nothing to rank, but the ranking is built
+    assert await trending.get_trending_page(1, 10) == ([], 0)
+
+    full_runs = []
+    full_refresh = trending._full_refresh
+    monkeypatch.setattr(trending, "_full_refresh", lambda db: full_runs.append(1) or full_refresh(db))
+    await trending.refresh_trending(mongo_db)
+    await trending.refresh_trending(mongo_db)
+    assert full_runs == []
+
+
+async def test_the_job_applies_the_decay_once_the_reference_time_is_old(redis, mongo_db, monkeypatch):
+    blog = _blog(1, 10)
+    await mongo_db.blogs.insert_one(blog)
+    await trending.refresh_trending(mongo_db)
+
+    full_runs = []
+    full_refresh = trending._full_refresh
+    monkeypatch.setattr(trending, "_full_refresh", lambda db: full_runs.append(1) or full_refresh(db))
+
+    # recent reference time: dirty blogs are rescored at it
+    await trending.mark_dirty([str(blog["_id"])])
+    assert await trending.refresh_trending(mongo_db) == 1
+    assert full_runs == []
+
+    # the last full run is too old: the same job rescans the window and moves the reference time
+    old_ref = datetime.utcnow() - timedelta(minutes=TRENDING_FULL_REFRESH_MINUTES + 1)
+    await redis.set(trending.REF_TIME_KEY, old_ref.isoformat())
+    assert await trending.refresh_trending(mongo_db) == 1
+    assert full_runs == [1]
+    assert datetime.fromisoformat(await redis.get(trending.REF_TIME_KEY)) > old_ref
+    assert await trending.get_trending_page(1, 10) == ([str(blog["_id"])], 1)
+
+    await trending.refresh_trending(mongo_db)
+    assert full_runs == [1]
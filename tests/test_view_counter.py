@@ -0,0 +1,67 @@
+# tests/test_view_counter.py
+import pytest
+from bson import ObjectId
+
+from src.api.blogs import view_counter
+
+pytestmark = pytest.mark.anyio
+
+
+async def _views(db, blog_id):
+    return (await db.blogs.find_one({"_id": blog_id}))["view_count"]
+
+
+async def test_views_are_buffered_then_flushed(redis, mongo_db):
+    a, b = ObjectId(), ObjectId()
+    await mongo_db.blogs.insert_many([{"_id": a, "view_count": 10}, {"_id": b, "view_count": 0}])
+
+    # each view returns what is still buffered, for the reader to add to the stored count
+    assert [await view_counter.record_view(mongo_db, str(a)) for _ in range(3)] == [1, 2, 3]
+    await view_counter.record_view(mongo_db, str(b))
+    assert await _views(mongo_db, a) == 10
+
+    assert await view_counter.flush_views(mongo_db) == 2
+    assert (await _views(mongo_db, a), await _views(mongo_db, b)) == (13, 1)
+    assert not await redis.exists(view_counter.PENDING_KEY, view_counter.FLUSHING_KEY)
+    # nothing left to write
+    assert await view_counter.flush_views(mongo_db) == 0
+    assert await view_counter.record_view(mongo_db, str(a)) == 1
+
+
+async def test_a_snapshot_written_again_is_not_counted_twice(redis, mongo_db):
+    a = ObjectId()
+    await mongo_db.blogs.insert_one({"_id": a, "view_count": 0})
+    await view_counter.record_view(mongo_db, str(a))
+    await view_counter.record_view(mongo_db, str(a))
+
+    # the bulk_write went through but the DEL of the snapshot failed: it is flushed again
+    snapshot = {}
+    delete = redis.delete
+
+    async def failing_delete(*keys):
+        if view_counter.FLUSHING_KEY in keys:
+            snapshot.update(await redis.hgetall(view_counter.FLUSHING_KEY))
+            raise ConnectionError("Redis down")
+        return await delete(*keys)
+
+    redis.delete = failing_delete
+    try:
+        assert await view_counter.flush_views(mongo_db) == 0
+    finally:
+        redis.delete = delete
+    assert snapshot == {str(a): "2"} and await _views(mongo_db, a) == 2
+
+    await view_counter.record_view(mongo_db, str(a))
+    # the old snapshot first (skipped, already applied), the new views on the next flush
+    await view_counter.flush_views(mongo_db)
+    await view_counter.flush_views(mongo_db)
+    assert await _views(mongo_db, a) == 3
+
+
+async def test_flush_skips_while_another_worker_holds_the_lock(redis, mongo_db):
+    a = ObjectId()
+    await mongo_db.blogs.insert_one({"_id": a, "view_count": 0})
+    await view_counter.record_view(mongo_db, str(a))
+    await redis.set(view_counter.FLUSH_LOCK_KEY, "other worker")
+    assert await view_counter.flush_views(mongo_db) == 0
+    assert await _views(mongo_db, a) == 0